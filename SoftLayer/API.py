@@ -5,17 +5,26 @@
 
     :license: MIT, see LICENSE for more details.
 """
+from collections import deque
+from itertools import islice
+import logging
 import time
 
+from concurrent import futures
+
 from .consts import API_PUBLIC_ENDPOINT, API_PRIVATE_ENDPOINT, USER_AGENT
-from .transports import make_xml_rpc_api_call
+from .transports import (
+    make_xml_rpc_api_call, iter_xml_rpc_api_call, ConnectionPool)
 from .auth import TokenAuthentication
 from .config import get_client_settings
+from .metrics import CallRecord
 
 
-__all__ = ['Client', 'TimedClient', 'API_PUBLIC_ENDPOINT',
+__all__ = ['Client', 'TimedClient', 'Batch', 'API_PUBLIC_ENDPOINT',
            'API_PRIVATE_ENDPOINT']
 
+LOGGER = logging.getLogger(__name__)
+
 VALID_CALL_ARGS = set([
     'id',
     'mask',
@@ -43,6 +52,35 @@ class Client(object):
     :param auth: an object which responds to get_headers() to be inserted into
         the xml-rpc headers. Example: `BasicAuthentication`
     :param config_file: A path to a configuration file used to load settings
+    :param integer pool_connections: number of per-host connection pools to
+        keep open
+    :param integer pool_maxsize: maximum number of keep-alive connections per
+        host. Raise this when sharing one client between many threads.
+    :param pool_idle_timeout: close pooled connections after they have been
+        idle for this many seconds
+    :param cache: an optional :class:`SoftLayer.cache.ResponseCache` used to
+        cache responses of idempotent methods
+    :param catalog_cache: an optional :class:`SoftLayer.cache.CatalogCache`
+        which managers use to keep product catalog data on disk
+    :param retry: an optional :class:`SoftLayer.retry.RetryPolicy` used to
+        retry calls which failed with a transient error
+    :param rate_limiter: an optional :class:`SoftLayer.ratelimit.RateLimiter`
+        which limits how many calls are made per second and at once
+    :param single_flight: an optional :class:`SoftLayer.cache.SingleFlight`
+        used to send identical calls made at the same time only once
+    :param observers: callables which are passed a
+        :class:`SoftLayer.metrics.CallRecord` after every call, E.G. a
+        :class:`SoftLayer.metrics.MetricsRecorder`
+    :param cassette: an optional :class:`SoftLayer.cassette.Cassette` which
+        records every HTTP exchange or replays recorded exchanges instead of
+        using the network
+    :param identifier_index: an optional
+        :class:`SoftLayer.cache.IdentifierIndex` which the CCI and hardware
+        managers use to resolve hostnames and IP addresses without a query
+        per identifier
+    :param item_index: an optional :class:`SoftLayer.cache.PackageItemIndex`
+        which managers use to look up product package items without
+        fetching the package for every order
 
     Usage:
 
@@ -56,7 +94,12 @@ class Client(object):
     _prefix = "SoftLayer_"
 
     def __init__(self, username=None, api_key=None, endpoint_url=None,
-                 timeout=None, auth=None, config_file=None, proxy=None):
+                 timeout=None, auth=None, config_file=None, proxy=None,
+                 pool_connections=None, pool_maxsize=None,
+                 pool_idle_timeout=None, cache=None, catalog_cache=None,
+                 retry=None, rate_limiter=None, single_flight=None,
+                 observers=None, cassette=None, identifier_index=None,
+                 item_index=None):
 
         settings = get_client_settings(username=username,
                                        api_key=api_key,
@@ -64,7 +107,10 @@ class Client(object):
                                        timeout=timeout,
                                        auth=auth,
                                        proxy=proxy,
-                                       config_file=config_file)
+                                       config_file=config_file,
+                                       pool_connections=pool_connections,
+                                       pool_maxsize=pool_maxsize,
+                                       pool_idle_timeout=pool_idle_timeout)
         self.auth = settings.get('auth')
         self.endpoint_url = (
             settings.get('endpoint_url') or API_PUBLIC_ENDPOINT).rstrip('/')
@@ -75,6 +121,27 @@ class Client(object):
         if settings.get('proxy'):
             self.proxy = settings.get('proxy')
 
+        idle_timeout = None
+        if settings.get('pool_idle_timeout'):
+            idle_timeout = float(settings.get('pool_idle_timeout'))
+        self.connection_pool = ConnectionPool(
+            pool_connections=int(settings.get('pool_connections') or 0),
+            pool_maxsize=int(settings.get('pool_maxsize') or 0),
+            idle_timeout=idle_timeout,
+            cassette=cassette)
+        self.cassette = cassette
+        self.cache = cache
+        self.catalog_cache = catalog_cache
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.single_flight = single_flight
+        self.observers = list(observers or [])
+        self.identifier_index = identifier_index
+        if identifier_index is not None:
+            # The index is dropped after calls which may change it
+            self.observers.append(identifier_index)
+        self.item_index = item_index
+
     def authenticate_with_password(self, username, password,
                                    security_question_id=None,
                                    security_question_answer=None):
@@ -132,6 +199,93 @@ class Client(object):
         if kwargs.pop('iter', False):
             return self.iter_call(service, method, *args, **kwargs)
 
+        stream = kwargs.pop('stream', False)
+        service = self._check_call(service, kwargs)
+        if not self.observers:
+            return self._cached_call(service, method, args, kwargs, stream)
+
+        record = CallRecord(service, method)
+        try:
+            return self._cached_call(service, method, args, kwargs, stream,
+                                     record=record)
+        except Exception as ex:
+            record.error = ex.__class__.__name__
+            raise
+        finally:
+            record.finish()
+            self._notify(record)
+
+    __call__ = call
+
+    def add_observer(self, observer):
+        """ Registers a callable which is passed a
+            :class:`SoftLayer.metrics.CallRecord` after every call.
+
+        :param observer: the callable, E.G. a
+                         :class:`SoftLayer.metrics.MetricsRecorder`
+        """
+        self.observers.append(observer)
+
+    def _notify(self, record):
+        """ Passes a call record to every observer """
+        for observer in self.observers:
+            try:
+                observer(record)
+            except Exception:  # pylint: disable=W0703
+                LOGGER.exception('Observer %r failed', observer)
+
+    def _cached_call(self, service, method, args, kwargs, stream,
+                     record=None):
+        """ Makes a call, going through the response cache if there is
+            one """
+        # Streamed responses are read lazily, so they can't be cached
+        if stream:
+            return self._call(service, method, args, kwargs, stream=True,
+                              record=record)
+
+        if self.cache is None:
+            return self._shared_call(service, method, args, kwargs, record)
+
+        key = self.cache.make_key(service, method, args, kwargs)
+        if key is not None:
+            found, result = self.cache.get(key)
+            if found:
+                if record is not None:
+                    record.cache_hit = True
+                return result
+
+        try:
+            result = self._shared_call(service, method, args, kwargs, record)
+        finally:
+            if self.cache.is_mutating(method):
+                self.cache.invalidate(service)
+
+        if key is not None:
+            self.cache.set(key, service, method, result)
+        return result
+
+    def _shared_call(self, service, method, args, kwargs, record=None):
+        """ Makes a call, sharing the result of an identical call which is
+            already in flight if there is one """
+        key = None
+        if self.single_flight is not None:
+            key = self.single_flight.make_key(service, method, args, kwargs)
+        if key is None:
+            return self._call(service, method, args, kwargs, record=record)
+
+        def lead():
+            """ Makes the call for every caller sharing it """
+            if record is not None:
+                record.coalesced = False
+            return self._call(service, method, args, kwargs, record=record)
+
+        if record is not None:
+            record.coalesced = True
+        return self.single_flight.do(key, lead)
+
+    def _check_call(self, service, kwargs):
+        """ Validates the keyword arguments of a call and returns the full
+            name of the service """
         invalid_kwargs = set(kwargs.keys()) - VALID_CALL_ARGS
         if invalid_kwargs:
             raise TypeError(
@@ -139,8 +293,13 @@ class Client(object):
 
         if not service.startswith(self._prefix):
             service = self._prefix + service
+        return service
 
-        headers = kwargs.get('headers', {})
+    def _build_request(self, service, kwargs):
+        """ Returns the URI, XML-RPC headers and HTTP headers for a call """
+        # Copied so that concurrent calls sharing the caller's headers don't
+        # step on each other
+        headers = dict(kwargs.get('headers') or {})
 
         if self.auth:
             headers.update(self.auth.get_headers())
@@ -174,13 +333,71 @@ class Client(object):
             http_headers.update(kwargs.get('raw_headers'))
 
         uri = '/'.join([self.endpoint_url, service])
-        return make_xml_rpc_api_call(uri, method, args,
-                                     headers=headers,
-                                     http_headers=http_headers,
-                                     timeout=self.timeout,
-                                     proxy=self.proxy)
+        return uri, headers, http_headers
+
+    def _call(self, service, method, args, kwargs, stream=False,
+              record=None):
+        """ Builds the headers for a call and sends it to the API """
+        uri, headers, http_headers = self._build_request(service, kwargs)
+        transport_call = make_xml_rpc_api_call
+        if stream:
+            transport_call = iter_xml_rpc_api_call
+
+        extra = {}
+        attempts = []
+        if record is not None:
+            extra['stats'] = {}
+
+        def send(timeout):
+            """ Sends the call using the given timeout """
+            attempts.append(timeout)
+            return transport_call(uri, method, args,
+                                  headers=headers,
+                                  http_headers=http_headers,
+                                  timeout=timeout,
+                                  proxy=self.proxy,
+                                  session=self.connection_pool.get_session(),
+                                  **extra)
+
+        def limited_send(timeout):
+            """ Sends the call once the rate limiter allows it """
+            with self.rate_limiter.limit(service):
+                return send(timeout)
+
+        sender = send
+        if self.rate_limiter is not None:
+            sender = limited_send
+
+        try:
+            if self.retry is None:
+                return sender(self.timeout)
+            return self.retry.call(sender, self.endpoint_url, method,
+                                   timeout=self.timeout)
+        finally:
+            if record is not None:
+                record.update(extra['stats'])
+                record.retries = max(len(attempts) - 1, 0)
+
+    def batch(self, max_workers=None):
+        """ Returns a :class:`Batch` which runs API calls concurrently.
+
+        :param integer max_workers: maximum number of calls to run at once.
+                                    Defaults to the connection pool's
+                                    ``pool_maxsize``.
 
-    __call__ = call
+        Usage:
+            >>> import SoftLayer
+            >>> client = SoftLayer.Client()
+            >>> with client.batch() as batch:
+            ...     account = batch['Account'].getObject()
+            ...     guests = batch['Account'].getVirtualGuests(mask='id')
+            >>> account.result()['companyName']
+            'Your Company'
+
+        """
+        return Batch(self,
+                     max_workers=max_workers or
+                     self.connection_pool.pool_maxsize)
 
     def iter_call(self, service, method,
                   chunk=100, limit=None, offset=0, *args, **kwargs):
@@ -189,19 +406,45 @@ class Client(object):
         :param service: the name of the SoftLayer API service
         :param method: the method to call on the service
         :param integer chunk: result size for each API call
+        :param integer prefetch: number of pages to keep requesting
+                                 concurrently while earlier pages are being
+                                 consumed. Results are still yielded in order
+                                 and at most this many pages are held in
+                                 memory at once. Defaults to 0, which fetches
+                                 one page at a time. Keep this at or below
+                                 the client's ``pool_maxsize``.
+        :param boolean stream: parse each page as it is received instead of
+                               buffering it, so that only one result is held
+                               in memory at a time. Can't be combined with
+                               prefetch.
         :param \\*args: same optional arguments that ``Service.call`` takes
         :param \\*\\*kwargs: same optional keyword arguments that
                            ``Service.call`` takes
 
         """
+        prefetch = kwargs.pop('prefetch', 0)
+        stream = kwargs.pop('stream', False)
         if chunk <= 0:
             raise AttributeError("Chunk size should be greater than zero.")
 
+        if prefetch and stream:
+            raise TypeError("prefetch and stream can't be combined")
+
         if limit:
             chunk = min(chunk, limit)
 
-        result_count = 0
         kwargs['iter'] = False
+        if prefetch:
+            pages = _page_plan(chunk, limit, offset)
+            for item in self._iter_prefetched(service, method, pages,
+                                              prefetch, *args, **kwargs):
+                yield item
+            return
+
+        if stream:
+            kwargs['stream'] = True
+
+        result_count = 0
         while True:
             if limit:
                 # We've reached the end of the results
@@ -214,6 +457,18 @@ class Client(object):
             results = self.call(service, method,
                                 offset=offset, limit=chunk, *args, **kwargs)
 
+            if stream:
+                page_count = 0
+                for item in results:
+                    yield item
+                    page_count += 1
+                result_count += page_count
+
+                if not results.is_list or page_count < chunk:
+                    break
+                offset += chunk
+                continue
+
             # It looks like we ran out results
             if not results:
                 break
@@ -233,6 +488,55 @@ class Client(object):
             if len(results) < chunk:
                 break
 
+    def _iter_prefetched(self, service, method, pages, prefetch,
+                         *args, **kwargs):
+        """ Yields the results of each (offset, limit) page from pages while
+            keeping up to prefetch page requests in flight. """
+        executor = futures.ThreadPoolExecutor(max_workers=prefetch)
+        in_flight = deque()
+
+        def submit(page):
+            """ Starts fetching a page in the background """
+            page_offset, page_limit = page
+            future = executor.submit(self.call, service, method,
+                                     offset=page_offset, limit=page_limit,
+                                     *args, **kwargs)
+            in_flight.append((page_limit, future))
+
+        try:
+            for page in islice(pages, prefetch):
+                submit(page)
+
+            while in_flight:
+                page_limit, future = in_flight.popleft()
+                results = future.result()
+
+                # It looks like we ran out results
+                if not results:
+                    break
+
+                # Apparently this method doesn't return a list.
+                if not isinstance(results, list):
+                    yield results
+                    break
+
+                # Keep the pipeline full before handing results out
+                if len(results) >= page_limit:
+                    for page in islice(pages, 1):
+                        submit(page)
+
+                for item in results:
+                    yield item
+
+                if len(results) < page_limit:
+                    break
+        finally:
+            # Pages past the end of the results (or past the point where the
+            # consumer stopped) are thrown away.
+            for _, future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
     def __format_object_mask(self, objectmask, service):
         """ Format new and old style object masks into proper headers.
 
@@ -252,6 +556,11 @@ class Client(object):
 
         return {mheader: {'mask': objectmask}}
 
+    def close(self):
+        """ Closes the pooled connections used by this client. The client can
+            still be used afterwards; new connections will be opened. """
+        self.connection_pool.close()
+
     def __repr__(self):
         return "<Client: endpoint=%s, user=%r>" \
             % (self.endpoint_url, self.auth)
@@ -266,12 +575,16 @@ class TimedClient(Client):
     """ Subclass of Client()
 
     Using this class will time every call to the API and store it in an
-    internal list. This will have a slight impact on your client's memory
-    usage and performance. You should only use this for debugging.
+    internal list which holds up to max_calls calls. You should only use
+    this for debugging; :class:`SoftLayer.metrics.MetricsRecorder` measures
+    calls in more detail with bounded memory use.
+
+    :param integer max_calls: number of calls to keep. Older calls are
+        dropped.
     """
 
     def __init__(self, *args, **kwargs):
-        self.last_calls = []
+        self.last_calls = deque(maxlen=kwargs.pop('max_calls', 1000))
         super(TimedClient, self).__init__(*args, **kwargs)
 
     def call(self, service, method, *args, **kwargs):
@@ -290,10 +603,111 @@ class TimedClient(Client):
         This property will contain a list of tuples in the form
         ('SERVICE.METHOD', initiated_utc_timestamp, execution_time)
         """
-        last_calls = self.last_calls
-        self.last_calls = []
+        last_calls = list(self.last_calls)
+        self.last_calls.clear()
         return last_calls
 
+    def get_retry_stats(self):
+        """ Retrieves the retry counters of the client's retry policy.
+
+        This is a dictionary with the number of calls, retries and calls
+        rejected by an open circuit breaker, as well as the total number of
+        seconds spent waiting between attempts. It's empty if the client
+        doesn't retry calls.
+        """
+        if self.retry is None:
+            return {}
+        return self.retry.stats()
+
+
+class Batch(object):
+    """ Runs independent API calls concurrently.
+
+    Calls are queued with ``batch['Service'].method(...)`` or
+    ``batch.call('Service', 'method', ...)``, which take the same arguments as
+    :func:`Service.call`. Each one immediately starts running on a worker
+    thread and a future for its result is returned. Leaving the ``with``
+    block waits for every queued call to finish.
+
+    :param client: the client used to make the calls
+    :param integer max_workers: maximum number of calls to run at once
+    """
+    def __init__(self, client, max_workers=10):
+        self.client = client
+        self.max_workers = max_workers
+        self.futures = []
+        self._executor = None
+
+    def __getitem__(self, name):
+        """ Get a SoftLayer Service whose calls are queued on this batch.
+
+        :param name: The name of the service. E.G. Account
+        """
+        return Service(self, name)
+
+    def call(self, service, method, *args, **kwargs):
+        """ Queues a SoftLayer API call.
+
+        :param service: the name of the SoftLayer API service
+        :param method: the method to call on the service
+        :param \\*args: same optional arguments that ``Service.call`` takes
+        :param \\*\\*kwargs: same optional keyword arguments that
+                           ``Service.call`` takes
+        :returns: a future which holds the result of the call
+        """
+        if self._executor is None:
+            self._executor = futures.ThreadPoolExecutor(
+                max_workers=self.max_workers)
+
+        func = getattr(self.client[service], method)
+        future = self._executor.submit(func, *args, **kwargs)
+        self.futures.append(future)
+        return future
+
+    __call__ = call
+
+    def wait(self):
+        """ Blocks until every queued call has finished """
+        futures.wait(self.futures)
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def results(self):
+        """ Waits for every queued call and returns their results in the order
+            the calls were queued. Calls that failed have their exception
+            in place of a result. """
+        self.wait()
+        results = []
+        for future in self.futures:
+            error = future.exception()
+            if error is not None:
+                results.append(error)
+            else:
+                results.append(future.result())
+        return results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.wait()
+
+    def __repr__(self):
+        return "<Batch: %s calls>" % len(self.futures)
+
+
+def _page_plan(chunk, limit=None, offset=0):
+    """ Generates the (offset, limit) pairs needed to page through results
+        chunk at a time, stopping at limit if given. """
+    fetched = 0
+    while not limit or fetched < limit:
+        size = chunk
+        if limit:
+            size = min(chunk, limit - fetched)
+        yield offset + fetched, size
+        fetched += size
+
 
 class Service(object):
     """ A SoftLayer Service.
@@ -320,6 +734,11 @@ class Service(object):
         :param int offset: (optional) offset results by this many
         :param boolean iter: (optional) if True, returns a generator with the
                              results
+        :param int prefetch: (optional) with iter=True, the number of pages
+                             to fetch concurrently
+        :param boolean stream: (optional) if True, returns an iterator which
+                               parses the response as it is received. Array
+                               members are yielded one at a time.
 
         Usage:
             >>> import SoftLayer
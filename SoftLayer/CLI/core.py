@@ -35,6 +35,8 @@ General:
   config    View and edit configuration for this tool
   ticket    Manage account tickets
   summary   Display an overall summary of your account
+  shell     Run commands in an interactive shell
+  daemon    Run commands in a background process
   help      Show help
 
 See 'sl help <module>' for more information on a specific module.
@@ -44,15 +46,21 @@ The easiest way to do that is to use: 'sl config setup'
 """
 # :license: MIT, see LICENSE for more details.
 
+import os
 import sys
 import logging
 
 from docopt import docopt, DocoptExit
 
 from SoftLayer import Client, TimedClient, SoftLayerError, SoftLayerAPIError
+from SoftLayer.cache import (
+    CatalogCache, IdentifierIndex, PackageItemIndex, ResponseCache)
 from SoftLayer.consts import VERSION
-from .helpers import CLIAbort, ArgumentError, format_output, KeyValueTable
+from SoftLayer.retry import RetryPolicy
+from .helpers import (
+    CLIAbort, ArgumentError, format_output, iter_output, KeyValueTable)
 from .environment import Environment, InvalidCommand, InvalidModule
+from .manifest import Manifest
 
 
 DEBUG_LOGGING_MAP = {
@@ -62,7 +70,7 @@ DEBUG_LOGGING_MAP = {
     '3': logging.DEBUG
 }
 
-VALID_FORMATS = ['raw', 'table', 'json']
+VALID_FORMATS = ['raw', 'table', 'json', 'csv', 'tsv', 'ndjson']
 
 
 class CommandParser(object):
@@ -88,7 +96,7 @@ class CommandParser(object):
         command = self.env.get_command(module_name, command_name)
 
         default_format = 'raw'
-        if sys.stdout.isatty():
+        if self.env.stdout.isatty():
             default_format = 'table'
 
         arg_doc = command.__doc__
@@ -102,12 +110,15 @@ Prompt Options:
         if '[options]' in arg_doc:
             arg_doc += """
 Standard Options:
-  --format=ARG            Output format. [Options: table, raw] [Default: %s]
+  --format=ARG            Output format: table, raw, json, csv, tsv or
+                            ndjson. [Default: %s]
   -C FILE --config=FILE   Config file location. [Default: ~/.softlayer]
   --debug=LEVEL           Specifies the debug noise level
                            1=warn, 2=info, 3=debug
   --timings               Time each API call and display after results
   --proxy=PROTO:PROXY_URL HTTP[s] proxy to be use to make API calls
+  --record=FILE           Record every API call to a cassette file
+  --replay=FILE           Answer API calls from a recorded cassette file
   -h --help               Show this screen
 """ % default_format
         return arg_doc.strip()
@@ -159,13 +170,37 @@ Standard Options:
             main_args['<args>'])
 
 
-def main(args=sys.argv[1:], env=Environment()):
+def main(args=sys.argv[1:], env=None):
     """
-    Entry point for the command-line client.
+    Entry point for the command-line client. With SL_DAEMON set, commands
+    are sent to `sl daemon` when it's running. Without an env, one using the
+    on-disk manifest of CLI modules (see SoftLayer.CLI.manifest) is made.
+    """
+    if env is None:
+        env = Environment()
+        env.manifest = Manifest()
+    if os.environ.get('SL_DAEMON'):
+        from SoftLayer.CLI.daemon import run_in_daemon
+        exit_status = run_in_daemon(args)
+        if exit_status is not None:
+            sys.exit(exit_status)
+    sys.exit(run(args, env))
+
+
+def run(args, env, clients=None):
+    """ Runs a command and returns its exit status.
+
+    :param list args: command-line arguments, without the leading 'sl'
+    :param env: Environment instance
+    :param dict clients: clients kept between runs, keyed by their settings.
+                         A client made for a run is added to it and reused by
+                         later runs with the same settings. Used by `sl shell`
+                         and `sl daemon` to keep connections and caches warm.
     """
     # Parse Top-Level Arguments
     exit_status = 0
     resolver = CommandParser(env)
+    cassette = None
     try:
         command, command_args = resolver.parse(args)
 
@@ -179,12 +214,24 @@ def main(args=sys.argv[1:], env=Environment()):
 
         kwargs = {
             'proxy': command_args.get('--proxy'),
-            'config_file': command_args.get('--config')
+            'config_file': command_args.get('--config'),
         }
-        if command_args.get('--timings'):
-            client = TimedClient(**kwargs)
+        if command_args.get('--record'):
+            # Importing the cassette module imports requests, which is slow
+            from SoftLayer.cassette import Cassette
+            cassette = Cassette(command_args['--record'], mode='record')
+        elif command_args.get('--replay'):
+            from SoftLayer.cassette import Cassette
+            try:
+                cassette = Cassette(command_args['--replay'])
+            except IOError as ex:
+                raise ArgumentError('Unable to read cassette: %s' % ex)
+
+        timed = bool(command_args.get('--timings'))
+        if cassette is not None or clients is None:
+            client = make_client(kwargs, timed=timed, cassette=cassette)
         else:
-            client = Client(**kwargs)
+            client = get_client(clients, kwargs, timed=timed)
 
         # Do the thing
         runnable = command(client=client, env=env)
@@ -193,9 +240,9 @@ def main(args=sys.argv[1:], env=Environment()):
             out_format = command_args.get('--format', 'table')
             if out_format not in VALID_FORMATS:
                 raise ArgumentError('Invalid format "%s"' % out_format)
-            output = format_output(data, fmt=out_format)
-            if output:
-                env.out(output)
+            for output in iter_output(data, fmt=out_format):
+                if output:
+                    env.out(output)
 
         if command_args.get('--timings'):
             out_format = command_args.get('--format', 'table')
@@ -205,6 +252,12 @@ def main(args=sys.argv[1:], env=Environment()):
             for call, _, duration in api_calls:
                 timing_table.add_row([call, duration])
 
+            retry_stats = client.get_retry_stats()
+            if retry_stats.get('retries'):
+                timing_table.add_row(['retries', retry_stats['retries']])
+                timing_table.add_row(['backoff',
+                                      retry_stats['backoff_time']])
+
             env.err(format_output(timing_table, fmt=out_format))
 
     except InvalidCommand as ex:
@@ -227,6 +280,9 @@ def main(args=sys.argv[1:], env=Environment()):
     except KeyboardInterrupt:
         env.out('')
         exit_status = 1
+    except EOFError:
+        env.err('Unable to read a response to the prompt')
+        exit_status = 1
     except CLIAbort as ex:
         env.err(str(ex.message))
         exit_status = ex.code
@@ -246,5 +302,51 @@ def main(args=sys.argv[1:], env=Environment()):
         import traceback
         env.err(traceback.format_exc())
         exit_status = 1
+    finally:
+        if cassette is not None:
+            cassette.close()
+
+    return exit_status
+
 
-    sys.exit(exit_status)
+def make_client(kwargs, timed=False, cassette=None, cache=None,
+                identifier_index=None, item_index=None):
+    """ Returns a client for the CLI.
+
+    :param dict kwargs: Client arguments taken from the command line
+    :param bool timed: returns a TimedClient when True
+    :param cassette: a SoftLayer.cassette.Cassette to record or replay calls
+    :param cache: a SoftLayer.cache.ResponseCache for the client
+    :param identifier_index: a SoftLayer.cache.IdentifierIndex for the client
+    :param item_index: a SoftLayer.cache.PackageItemIndex for the client
+    """
+    client_class = TimedClient if timed else Client
+    return client_class(catalog_cache=CatalogCache(), retry=RetryPolicy(),
+                        cassette=cassette, cache=cache,
+                        identifier_index=identifier_index,
+                        item_index=item_index, **kwargs)
+
+
+def get_client(clients, kwargs, timed=False):
+    """ Returns the client in clients with the given settings, making it
+        first if there isn't one. Clients made here cache responses which
+        rarely change (see SoftLayer.cache.DEFAULT_TTLS) and index the
+        account's hostnames and IP addresses and the product packages they
+        order from, since they're reused across commands.
+
+    :param dict clients: clients, keyed by their settings
+    :param dict kwargs: Client arguments taken from the command line
+    :param bool timed: whether the client should be a TimedClient
+    """
+    # Credentials can come from the environment, so they're part of the key
+    key = (tuple(sorted(kwargs.items())), timed,
+           os.environ.get('SL_USERNAME'), os.environ.get('SL_API_KEY'))
+    client = clients.get(key)
+    if client is None:
+        client = make_client(kwargs, timed=timed, cache=ResponseCache(),
+                             identifier_index=IdentifierIndex(),
+                             item_index=PackageItemIndex())
+        clients[key] = client
+    elif timed:
+        client.get_last_calls()  # drop the calls made by earlier commands
+    return client
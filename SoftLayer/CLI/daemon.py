@@ -0,0 +1,380 @@
+"""
+    SoftLayer.CLI.daemon
+    ~~~~~~~~~~~~~~~~~~~~
+    A background process which runs sl commands with warm clients, and the
+    code which forwards commands to it
+
+    :license: MIT, see LICENSE for more details.
+"""
+import getpass
+import json
+import logging
+import os
+import os.path
+import socket
+import subprocess
+import sys
+import time
+
+from SoftLayer.consts import VERSION
+from SoftLayer.CLI.environment import Environment
+from SoftLayer.CLI.exceptions import CLIAbort
+
+__all__ = ['Daemon', 'RemoteEnvironment', 'forward', 'request', 'start',
+           'run_in_daemon']
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_SOCKET_PATH = '~/.softlayer_cache/daemon.sock'
+
+# Modules which always run in the sl process itself
+LOCAL_MODULES = ['config', 'daemon', 'shell']
+
+# Environment variables which are sent along with each command
+ENVIRON_KEYS = ['SL_USERNAME', 'SL_API_KEY']
+
+
+def socket_path(path=None):
+    """ Returns the path of the daemon's socket: path, $SL_DAEMON_SOCKET or
+        ~/.softlayer_cache/daemon.sock """
+    return os.path.expanduser(
+        path or os.environ.get('SL_DAEMON_SOCKET') or DEFAULT_SOCKET_PATH)
+
+
+def _send(stream, message):
+    """ Writes a message, a JSON object on a line of its own """
+    stream.write((json.dumps(message) + '\n').encode('utf-8'))
+    stream.flush()
+
+
+def _receive(stream):
+    """ Reads a message. Returns None once the other side hangs up. """
+    line = stream.readline()
+    if not line:
+        return None
+    return json.loads(line.decode('utf-8'))
+
+
+def _connect(path):
+    """ Returns a socket connected to the daemon, or None if no daemon is
+        listening """
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except socket.error:
+        sock.close()
+        return None
+    return sock
+
+
+class _MessageWriter(object):
+    """ A file-like object which sends everything written to it as
+        {name: text} messages """
+    def __init__(self, stream, name, tty=False):
+        self.stream = stream
+        self.name = name
+        self.tty = tty
+
+    def write(self, text):
+        """ Sends text """
+        _send(self.stream, {self.name: text})
+
+    def flush(self):
+        """ Messages are sent as they're written """
+
+    def isatty(self):
+        """ Whether the stream the text ends up on is a terminal """
+        return self.tty
+
+
+class _MessageReader(object):
+    """ A file-like object which reads lines by asking the sl process which
+        forwarded the command to prompt for them """
+    def __init__(self, stream):
+        self.stream = stream
+
+    def ask(self, prompt, secret=False):
+        """ Has the sl process prompt for a line and returns it. Raises
+            EOFError if there's nothing more to read. """
+        _send(self.stream, {'prompt': prompt, 'secret': secret})
+        message = _receive(self.stream)
+        if message is None or 'line' not in message:
+            raise EOFError()
+        return message['line']
+
+    def readline(self):
+        """ Reads a line, E.G. for input(). Returns '' at the end. """
+        try:
+            return self.ask('') + '\n'
+        except EOFError:
+            return ''
+
+
+class RemoteEnvironment(Environment):
+    """ The environment of a command run by the daemon. Output is sent to
+        the sl process which forwarded the command and prompts are answered
+        there.
+
+    :param stream: the connection to the sl process
+    :param bool tty: whether the sl process's stdout is a terminal
+    """
+    def __init__(self, stream, tty=False):
+        self.stdin = _MessageReader(stream)
+        self.stdout = _MessageWriter(stream, 'out', tty)
+        self.stderr = _MessageWriter(stream, 'err', tty)
+
+    def input(self, prompt):
+        return self.stdin.ask(prompt)
+
+    def getpass(self, prompt):
+        return self.stdin.ask(prompt, secret=True)
+
+
+class Daemon(object):
+    """ Listens on a local socket and runs the sl commands sent to it.
+
+    Clients are kept between commands (see SoftLayer.CLI.core.get_client),
+    so their connections, response caches and catalog caches stay warm.
+    Commands are run one at a time, in the working directory and with the
+    SL_USERNAME and SL_API_KEY environment variables of the sl process which
+    sent them. While a command runs, sys.stdin and sys.stdout are swapped for
+    that process's, so confirmation prompts are answered there too. Only the
+    user running the daemon can connect to its socket.
+
+    :param string path: path of the socket. See :func:`socket_path`.
+    :param int idle_timeout: seconds without a command before the daemon
+                             exits
+    """
+    def __init__(self, path=None, idle_timeout=3600):
+        self.path = socket_path(path)
+        self.idle_timeout = idle_timeout
+        self.clients = {}
+        self.started = None
+        self.commands = 0
+        self._running = False
+        self._sock = None
+
+    def bind(self):
+        """ Creates the socket and starts listening on it """
+        directory = os.path.dirname(self.path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        if _connect(self.path) is not None:
+            raise CLIAbort('sl daemon is already running on %s' % self.path)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        old_umask = os.umask(0o177)
+        try:
+            self._sock.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        self._sock.listen(5)
+        self._sock.settimeout(self.idle_timeout)
+        self.started = time.time()
+
+    def serve_forever(self):
+        """ Runs commands until stopped or idle for idle_timeout seconds """
+        if self._sock is None:
+            self.bind()
+        self._running = True
+        try:
+            while self._running:
+                try:
+                    conn, _ = self._sock.accept()
+                except socket.timeout:
+                    LOGGER.info('Idle for %ss, exiting', self.idle_timeout)
+                    break
+                conn.settimeout(None)
+                try:
+                    self.handle(conn.makefile('rwb'))
+                except (socket.error, ValueError) as ex:
+                    LOGGER.warning('Lost connection: %s', ex)
+                finally:
+                    conn.close()
+        finally:
+            self.close()
+
+    def handle(self, stream):
+        """ Answers one request """
+        message = _receive(stream)
+        if message is None:
+            return
+
+        if message.get('control') == 'status':
+            return _send(stream, self.status())
+        if message.get('control') == 'stop':
+            self._running = False
+            return _send(stream, {'stopped': True})
+
+        if message.get('version') != VERSION:
+            return _send(stream, {'error': 'sl daemon is running version %s'
+                                           % VERSION})
+
+        from SoftLayer.CLI.core import run
+
+        environ = dict((key, os.environ.get(key)) for key in ENVIRON_KEYS)
+        cwd = os.getcwd()
+        stdin, stdout = sys.stdin, sys.stdout
+        try:
+            os.chdir(message.get('cwd') or cwd)
+            for key in ENVIRON_KEYS:
+                _set_environ(key, message.get('environ', {}).get(key))
+            env = RemoteEnvironment(stream, tty=message.get('tty', False))
+            # Prompts like formatting.confirm() use input() directly
+            sys.stdin, sys.stdout = env.stdin, env.stdout
+            exit_status = run(message['args'], env, clients=self.clients)
+        finally:
+            sys.stdin, sys.stdout = stdin, stdout
+            os.chdir(cwd)
+            for key, value in environ.items():
+                _set_environ(key, value)
+        self.commands += 1
+        _send(stream, {'exit': exit_status})
+
+    def status(self):
+        """ Returns details about the running daemon """
+        return {
+            'pid': os.getpid(),
+            'version': VERSION,
+            'socket': self.path,
+            'uptime': time.time() - (self.started or time.time()),
+            'commands': self.commands,
+            'clients': len(self.clients),
+        }
+
+    def close(self):
+        """ Stops listening and removes the socket """
+        self._running = False
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def _set_environ(key, value):
+    """ Sets (or with None, removes) an environment variable """
+    if value is None:
+        os.environ.pop(key, None)
+    else:
+        os.environ[key] = value
+
+
+def request(message, path=None):
+    """ Sends a control message ({'control': 'status'} or
+        {'control': 'stop'}) to the daemon and returns its answer, or None if
+        no daemon is listening """
+    sock = _connect(socket_path(path))
+    if sock is None:
+        return None
+    try:
+        stream = sock.makefile('rwb')
+        _send(stream, message)
+        return _receive(stream)
+    finally:
+        sock.close()
+
+
+def _prompt(message, stdin, stdout):
+    """ Prompts for the line the daemon asked for. Returns the answer, as a
+        message. """
+    try:
+        if message.get('secret'):
+            return {'line': getpass.getpass(message['prompt'])}
+        stdout.write(message['prompt'])
+        stdout.flush()
+        line = stdin.readline()
+    except EOFError:
+        return {'eof': True}
+    if not line:
+        return {'eof': True}
+    return {'line': line.rstrip('\r\n')}
+
+
+def forward(args, path=None, stdin=None, stdout=None, stderr=None):
+    """ Runs a command in the daemon, writing its output to stdout and
+        stderr and answering its prompts from stdin. Returns the command's
+        exit status, or None if there's no daemon to run it (or it's running
+        another version of the library).
+
+    :param list args: command-line arguments, without the leading 'sl'
+    :param string path: path of the daemon's socket
+    """
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    stderr = stderr or sys.stderr
+    sock = _connect(socket_path(path))
+    if sock is None:
+        return None
+
+    try:
+        stream = sock.makefile('rwb')
+        _send(stream, {
+            'args': list(args),
+            'cwd': os.getcwd(),
+            'environ': dict((key, os.environ[key]) for key in ENVIRON_KEYS
+                            if key in os.environ),
+            'tty': stdout.isatty(),
+            'version': VERSION,
+        })
+        while True:
+            message = _receive(stream)
+            if message is None:
+                stderr.write('sl daemon stopped before the command finished'
+                             + os.linesep)
+                return 1
+            if 'out' in message:
+                stdout.write(message['out'])
+            elif 'err' in message:
+                stderr.write(message['err'])
+            elif 'prompt' in message:
+                _send(stream, _prompt(message, stdin, stdout))
+            elif 'exit' in message:
+                stdout.flush()
+                return message['exit']
+            elif 'error' in message:
+                LOGGER.info('Not forwarding: %s', message['error'])
+                return None
+    finally:
+        sock.close()
+
+
+def start(path=None, idle_timeout=3600, wait=5):
+    """ Starts a daemon in the background and waits up to wait seconds for
+        it to listen. Returns its status, or None if it didn't start. """
+    command = [sys.executable, '-m', 'SoftLayer.CLI.daemon',
+               socket_path(path), str(idle_timeout)]
+    kwargs = {}
+    if hasattr(os, 'setsid'):
+        kwargs['preexec_fn'] = os.setsid
+    with open(os.devnull, 'r+') as devnull:
+        subprocess.Popen(command, stdin=devnull, stdout=devnull,
+                         stderr=devnull, close_fds=True, **kwargs)
+
+    deadline = time.time() + wait
+    while time.time() < deadline:
+        status = request({'control': 'status'}, path)
+        if status is not None:
+            return status
+        time.sleep(0.05)
+    return None
+
+
+def run_in_daemon(args, path=None):
+    """ Runs a command in the daemon if one is running. Returns the
+        command's exit status, or None if it should be run locally.
+
+    :param list args: command-line arguments, without the leading 'sl'
+    :param string path: path of the daemon's socket
+    """
+    if not args or args[0] in LOCAL_MODULES:
+        return None
+    return forward(args, path)
+
+
+if __name__ == '__main__':
+    Daemon(sys.argv[1], idle_timeout=float(sys.argv[2])).serve_forever()
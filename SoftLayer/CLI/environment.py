@@ -50,6 +50,10 @@ class Environment(object):
     }
     stdout = sys.stdout
     stderr = sys.stderr
+    # Index of the modules and commands (a SoftLayer.CLI.manifest.Manifest),
+    # set by the sl entry point. Without one the modules are inspected
+    # themselves.
+    manifest = None
 
     def get_command(self, module_name, command_name):
         """ Based on the loaded modules, return a command """
@@ -67,7 +71,18 @@ class Environment(object):
         return module_name
 
     def load_module(self, module_name):  # pragma: no cover
-        """ Loads module by name """
+        """ Loads module by name. With a manifest, the module's commands are
+            only imported when they're run. """
+        if self.manifest is not None:
+            module = self.manifest.get_module(module_name)
+            if module is None:
+                raise InvalidModule(module_name)
+            actions = self.plugins.setdefault(module_name, {})
+            for action, command in \
+                    self.manifest.get_commands(module_name).items():
+                actions.setdefault(action, command)
+            return module
+
         try:
             module = import_module('SoftLayer.CLI.modules.%s' % module_name)
             for _, obj in inspect.getmembers(module):
@@ -7,12 +7,19 @@
     :license: MIT, see LICENSE for more details.
 """
 # pylint: disable=E0202
+from collections import OrderedDict
+import csv
+from itertools import chain, islice
 import os
 import json
 
 from prettytable import PrettyTable, FRAME, NONE
 
-from SoftLayer.utils import string_types, console_input
+from SoftLayer.utils import string_types, text_type, console_input, \
+    StringIO, PY2
+
+# Formats which are written a line at a time by iter_output()
+LINE_FORMATS = ['csv', 'tsv', 'ndjson']
 
 
 def format_output(data, fmt='table'):  # pylint: disable=R0911,R0912
@@ -20,8 +27,13 @@ def format_output(data, fmt='table'):  # pylint: disable=R0911,R0912
 
     :param data: One of: String, Table, FormattedItem, List, Tuple,
                  SequentialOutput
-    :param string fmt (optional): One of: table, raw, json, python
+    :param string fmt (optional): One of: table, raw, json, python, csv,
+                                  tsv, ndjson
     """
+    if fmt in LINE_FORMATS or \
+            (isinstance(data, StreamingTable) and fmt != 'python'):
+        return os.linesep.join(iter_output(data, fmt=fmt))
+
     if isinstance(data, string_types):
         if fmt == 'json':
             return json.dumps(data)
@@ -65,6 +77,193 @@ def format_output(data, fmt='table'):  # pylint: disable=R0911,R0912
     return data
 
 
+def iter_output(data, fmt='table'):
+    """ Given some data, yields its output. A StreamingTable, and anything
+        written as csv, tsv or ndjson, is written out a line at a time as
+        its rows are read; anything else is formatted with format_output()
+        and yielded as a whole.
+
+    :param data: anything format_output() accepts
+    :param string fmt (optional): One of: table, raw, json, csv, tsv, ndjson
+    """
+    if fmt == 'csv':
+        lines = _iter_delimited_lines(data, ',')
+    elif fmt == 'tsv':
+        lines = _iter_delimited_lines(data, '\t')
+    elif fmt == 'ndjson':
+        lines = _iter_ndjson_lines(data)
+    elif not isinstance(data, StreamingTable):
+        lines = [format_output(data, fmt=fmt)]
+    elif fmt == 'table':
+        lines = _iter_table_lines(data)
+    elif fmt == 'raw':
+        lines = _iter_raw_lines(data)
+    elif fmt == 'json':
+        lines = _iter_json_lines(data)
+    else:
+        lines = [format_output(list(data.rows), fmt=fmt)]
+    for line in lines:
+        yield line
+
+
+def _machine_value(value):
+    """ Returns the machine-readable form of a value. FormattedItems give
+        their original value and tables their to_python() form. """
+    if hasattr(value, 'to_python'):
+        return value.to_python()
+    return value
+
+
+def _sorted_rows(table):
+    """ Returns the rows of a table, sorted by its sortby column if it has
+        one. The rows of a StreamingTable are never sorted. """
+    if isinstance(table, StreamingTable) or table.sortby not in table.columns:
+        return table.rows
+
+    index = table.columns.index(table.sortby)
+    try:
+        return sorted(table.rows, key=lambda row: _machine_value(row[index]))
+    except TypeError:
+        return sorted(table.rows,
+                      key=lambda row: str(_machine_value(row[index])))
+
+
+def _iter_delimited_lines(data, delimiter):
+    """ Yields a header line and a line per row of a table, as CSV (or TSV,
+        with a tab delimiter). Values which aren't strings or numbers, like
+        nested tables, are written as JSON. Anything other than a table is
+        written as it is in the raw format. """
+    if not isinstance(data, Table):
+        yield str(format_output(data, fmt='raw'))
+        return
+
+    buf = StringIO()
+    writer = csv.writer(buf, delimiter=delimiter, lineterminator='')
+
+    def line(values):
+        """ Encodes a row """
+        buf.seek(0)
+        buf.truncate()
+        if PY2:
+            # The Python 2 csv module only writes byte strings
+            values = [value.encode('utf-8') if isinstance(value, text_type)
+                      else value for value in values]
+            writer.writerow(values)
+            return buf.getvalue().decode('utf-8')
+        writer.writerow(values)
+        return buf.getvalue()
+
+    yield line(data.columns)
+    for row in _sorted_rows(data):
+        values = []
+        for value in row:
+            value = _machine_value(value)
+            if isinstance(value, (list, tuple, dict)) or value is True \
+                    or value is False:
+                value = json.dumps(value, cls=CLIJSONEncoder)
+            elif value is None:
+                value = ''
+            values.append(value)
+        yield line(values)
+
+
+def _iter_ndjson_lines(data):
+    """ Yields a JSON object per row of a table, a line each. A KeyValueTable
+        is a single object, as it is in the json format; a list gives a line
+        per item and anything else a single line. """
+    encode = CLIJSONEncoder().encode
+    if isinstance(data, KeyValueTable) or not isinstance(data, Table):
+        data = _machine_value(data)
+        if not isinstance(data, (list, tuple)):
+            data = [data]
+        for item in data:
+            yield encode(item)
+        return
+
+    columns = data.columns
+    for row in _sorted_rows(data):
+        yield encode(OrderedDict(zip(columns, [_machine_value(value)
+                                               for value in row])))
+
+
+def _iter_table_lines(table):
+    """ Yields the lines of a StreamingTable in the style of
+        format_prettytable(). Column widths are fixed or sampled from the
+        first rows; longer values later on are written in full. """
+    def cells(row):
+        """ Formats each cell of a row, split into lines """
+        return [str(format_output(item)).split('\n') for item in row]
+
+    rows = (cells(row) for row in table.rows)
+    widths = [len(str(column)) for column in table.columns]
+    if table.widths:
+        widths = [max(width, table.widths.get(column, 0))
+                  for width, column in zip(widths, table.columns)]
+    else:
+        sample = list(islice(rows, table.sample_size))
+        for row in sample:
+            widths = [max([width] + [len(line) for line in cell])
+                      for width, cell in zip(widths, row)]
+        rows = chain(sample, rows)
+
+    aligns = [table.align.get(column, 'c') for column in table.columns]
+    border = ':%s:' % ':'.join('.' * (width + 2) for width in widths)
+
+    def lines(row):
+        """ Yields the lines of a row """
+        for index in range(max([len(cell) for cell in row] or [1])):
+            values = []
+            for cell, width, align in zip(row, widths, aligns):
+                value = cell[index] if index < len(cell) else ''
+                if align == 'l':
+                    value = value.ljust(width)
+                elif align == 'r':
+                    value = value.rjust(width)
+                else:
+                    value = value.center(width)
+                values.append(' %s ' % value)
+            yield ':%s:' % ':'.join(values)
+
+    yield border
+    for line in lines([[str(column)] for column in table.columns]):
+        yield line
+    yield border
+    for row in rows:
+        for line in lines(row):
+            yield line
+    yield border
+
+
+def _iter_raw_lines(table):
+    """ Yields the lines of a StreamingTable in the style of
+        format_no_tty(), a row at a time. Columns are as wide as the widest
+        value seen so far. """
+    widths = [table.widths.get(column, 0) for column in table.columns]
+    for row in table.rows:
+        values = [str(format_output(item, fmt='raw')) for item in row]
+        widths = [max(width, len(value))
+                  for width, value in zip(widths, values)]
+        yield ''.join(value.ljust(width) + '  '
+                      for value, width in zip(values, widths))
+
+
+def _iter_json_lines(table):
+    """ Yields a JSON list of the rows of a StreamingTable, a row per
+        line """
+    yield '['
+    previous = None
+    for row in table.rows:
+        if previous is not None:
+            yield '    %s,' % previous
+        previous = json.dumps(
+            dict(zip(table.columns, [_format_python_value(value)
+                                     for value in row])),
+            cls=CLIJSONEncoder, sort_keys=True)
+    if previous is not None:
+        yield '    %s' % previous
+    yield ']'
+
+
 def format_prettytable(table):
     """ Takes a SoftLayer.CLI.formatting.Table instance and returns a formatted
         prettytable """
@@ -285,6 +484,35 @@ class Table(object):
         return table
 
 
+class StreamingTable(Table):
+    """ A Table whose rows are read from an iterable, such as a paginated
+    API call made with iter=True, while it's written out. Only a small
+    number of rows are held in memory at a time, and the first rows are
+    written before the last ones are received. Rows can't be sorted.
+
+    :param list columns: a list of column names
+    :param rows: an iterable of rows
+    :param dict widths: minimum column widths, keyed by column name. When
+                        given, the table format doesn't sample any rows.
+    :param int sample_size: number of rows read to pick column widths for
+                            the table format
+    """
+    def __init__(self, columns, rows, widths=None, sample_size=100):
+        super(StreamingTable, self).__init__(columns)
+        self.rows = rows
+        self.widths = widths or {}
+        self.sample_size = sample_size
+
+    def add_row(self, row):
+        raise TypeError('rows of a StreamingTable come from its iterable')
+
+    def prettytable(self):
+        """ Returns a new prettytable instance with every row. This reads
+            every row into memory. """
+        self.rows = list(self.rows)
+        return super(StreamingTable, self).prettytable()
+
+
 class KeyValueTable(Table):
     """ This is a Table which is intended to be used to display key-value
         pairs. It expects there to be only two columns."""
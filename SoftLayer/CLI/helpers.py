@@ -10,22 +10,26 @@ from SoftLayer.utils import NestedDict
 from SoftLayer.CLI.environment import CLIRunnable
 from .exceptions import CLIHalt, CLIAbort, ArgumentError
 from .formatting import (
-    Table, KeyValueTable, FormattedItem, SequentialOutput, confirm,
-    no_going_back, mb_to_gb, gb, listing, blank, format_output,
-    active_txn, valid_response, transaction_status)
-from .template import update_with_template_args, export_to_template
+    Table, KeyValueTable, StreamingTable, FormattedItem, SequentialOutput,
+    confirm, no_going_back, mb_to_gb, gb, listing, blank, format_output,
+    iter_output, active_txn, valid_response, transaction_status)
+from .template import (
+    update_with_template_args, export_to_template, read_template_sections)
 
 __all__ = [
     # Core/Misc
-    'CLIRunnable', 'NestedDict', 'FALSE_VALUES', 'resolve_id',
+    'CLIRunnable', 'NestedDict', 'FALSE_VALUES', 'resolve_id', 'resolve_many',
+    'stream_args',
     # Exceptions
     'CLIAbort', 'CLIHalt', 'ArgumentError',
     # Formatting
-    'Table', 'KeyValueTable', 'FormattedItem', 'SequentialOutput',
-    'valid_response', 'confirm', 'no_going_back', 'mb_to_gb', 'gb',
-    'listing', 'format_output', 'blank', 'active_txn', 'transaction_status',
+    'Table', 'KeyValueTable', 'StreamingTable', 'FormattedItem',
+    'SequentialOutput', 'valid_response', 'confirm', 'no_going_back',
+    'mb_to_gb', 'gb', 'listing', 'format_output', 'iter_output', 'blank',
+    'active_txn', 'transaction_status',
     # Template
     'update_with_template_args', 'export_to_template',
+    'read_template_sections',
 ]
 
 FALSE_VALUES = ['0', 'false', 'FALSE', 'no', 'False']
@@ -41,9 +45,28 @@ def resolve_id(resolver, identifier, name='object'):
     :param string name: the object type, to be used in error messages
 
     """
-    ids = resolver(identifier)
+    return _single_id(resolver(identifier), identifier, name)
 
-    if len(ids) == 0:
+
+def resolve_many(resolver, identifiers, name='object'):
+    """ Resolves several ids at once using a resolver which takes a list of
+        identifiers, like the managers' resolve_many. Returns the ids in the
+        same order as the identifiers.
+
+    :param resolver: function that resolves ids. Should return a dict of the
+                     list of ids for each identifier.
+    :param list identifiers: string identifiers used to resolve ids
+    :param string name: the object type, to be used in error messages
+
+    """
+    resolved = resolver(identifiers)
+    return [_single_id(resolved.get(identifier) or [], identifier, name)
+            for identifier in identifiers]
+
+
+def _single_id(ids, identifier, name):
+    """ Returns the only id in ids, or aborts if there isn't exactly one """
+    if not ids:
         raise CLIAbort("Error: Unable to find %s '%s'" % (name, identifier))
 
     if len(ids) > 1:
@@ -52,3 +75,17 @@ def resolve_id(resolver, identifier, name='object'):
             (name, identifier, ', '.join([str(_id) for _id in ids])))
 
     return ids[0]
+
+
+def stream_args(args):
+    """ Returns the keyword arguments which make a list call page through
+        its results, parsing each page as it arrives, when --stream was
+        given. Without --stream, returns an empty dict.
+
+    :param dict args: the parsed command arguments
+    """
+    if not args.get('--stream'):
+        return {}
+    if args.get('--sortby'):
+        raise ArgumentError('--sortby cannot be used with --stream')
+    return {'iter': True, 'stream': True}
@@ -0,0 +1,223 @@
+"""
+    SoftLayer.CLI.manifest
+    ~~~~~~~~~~~~~~~~~~~~~~
+    A cached index of the CLI modules and their commands, so that a run only
+    imports the module it dispatches to
+
+    :license: MIT, see LICENSE for more details.
+"""
+from importlib import import_module
+import inspect
+import json
+import logging
+import os
+import os.path
+import tempfile
+import threading
+
+from SoftLayer.CLI import modules
+from SoftLayer.consts import VERSION
+
+__all__ = ['Manifest', 'ManifestModule', 'LazyCommand', 'build_manifest']
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MANIFEST_PATH = '~/.softlayer_cache/cli_manifest.json'
+
+
+def module_signature():
+    """ Returns the name, size and modification time of each CLI module
+        source file. The manifest is rebuilt when any of them change. """
+    signature = []
+    for name in sorted(os.listdir(modules.__path__[0])):
+        if not name.endswith('.py'):
+            continue
+        stat = os.stat(os.path.join(modules.__path__[0], name))
+        signature.append([name, stat.st_size, int(stat.st_mtime)])
+    return signature
+
+
+def build_manifest():
+    """ Imports every CLI module and returns a dict describing it and its
+        commands, keyed by module name. Modules which can't be imported are
+        left out. """
+    from SoftLayer.CLI.environment import CLIRunnable
+
+    found = {}
+    for module_name in modules.get_module_list():
+        try:
+            module = import_module('SoftLayer.CLI.modules.%s' % module_name)
+        except ImportError as ex:
+            LOGGER.debug('Unable to import CLI module %s: %s',
+                         module_name, ex)
+            continue
+
+        commands = []
+        for _, obj in inspect.getmembers(module):
+            if inspect.isclass(obj) and issubclass(obj, CLIRunnable) \
+                    and obj.__module__ == module.__name__:
+                commands.append({
+                    'action': obj.action,
+                    'class': '%s:%s' % (obj.__module__, obj.__name__),
+                    'doc': obj.__doc__,
+                    'options': list(obj.options),
+                })
+        found[module_name] = {'doc': module.__doc__, 'commands': commands}
+    return found
+
+
+class ManifestModule(object):
+    """ Stands in for a CLI module whose help text comes from the manifest
+
+    :param string name: module name, E.G.: 'cci'
+    :param string doc: the module's docstring
+    """
+    def __init__(self, name, doc):
+        self.__name__ = 'SoftLayer.CLI.modules.%s' % name
+        self.__doc__ = doc
+
+    def __repr__(self):
+        return "<ManifestModule: %s>" % self.__name__
+
+
+class LazyCommand(object):
+    """ Stands in for a CLIRunnable class until the command is run. The
+        class is imported when the command is instantiated.
+
+    :param string class_path: 'module:ClassName' of the command
+    :param string action: the command's action
+    :param string doc: the command's docstring
+    :param list options: the command's CLIRunnable.options
+    """
+    def __init__(self, class_path, action, doc, options):
+        self.class_path = class_path
+        self.action = action
+        self.__doc__ = doc
+        self.options = options
+        self._cls = None
+
+    def load(self):
+        """ Imports and returns the command's class """
+        if self._cls is None:
+            module_name, class_name = self.class_path.split(':')
+            self._cls = getattr(import_module(module_name), class_name)
+        return self._cls
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+    def __repr__(self):
+        return "<LazyCommand: %s>" % self.class_path
+
+
+class Manifest(object):
+    """ A cached index of every CLI module, its help text and its commands.
+
+    Without the index, running a command imports its module and inspects it
+    for commands. The manifest is built once by importing every module, then
+    saved as JSON and reused until the library version or any of the module
+    source files change. If it can't be saved the index is only kept for the
+    current process.
+
+    :param string path: file to keep the manifest in
+
+    Usage:
+
+        >>> from SoftLayer.CLI.manifest import Manifest
+        >>> manifest = Manifest()
+        >>> manifest.get_module('cci').__doc__
+        '...usage: sl cci [<command>] [<args>...] [options]...'
+        >>> manifest.get_commands('cci')['list']
+        <LazyCommand: SoftLayer.CLI.modules.cci:ListCCIs>
+
+    """
+    format_version = 2
+
+    def __init__(self, path=DEFAULT_MANIFEST_PATH):
+        self.path = os.path.expanduser(path)
+        self._lock = threading.Lock()
+        self._modules = None
+
+    @property
+    def modules(self):
+        """ The index, keyed by module name. Loaded (or built) on first
+            use. """
+        with self._lock:
+            if self._modules is None:
+                signature = module_signature()
+                self._modules = self.load(signature)
+                if self._modules is None:
+                    self._modules = build_manifest()
+                    self.save(signature, self._modules)
+            return self._modules
+
+    def load(self, signature):
+        """ Reads the manifest from disk. Returns None unless it was written
+            by this version of the library for the same module files.
+
+        :param list signature: the current :func:`module_signature`
+        """
+        try:
+            with open(self.path) as manifest_file:
+                manifest = json.load(manifest_file)
+        except (IOError, OSError, ValueError):
+            return None
+
+        if not isinstance(manifest, dict) or any([
+                manifest.get('format') != self.format_version,
+                manifest.get('library') != VERSION,
+                manifest.get('signature') != signature]):
+            return None
+        return manifest['modules']
+
+    def save(self, signature, found):
+        """ Writes the manifest to disk. Errors are logged and otherwise
+            ignored since the manifest is only an optimization.
+
+        :param list signature: the current :func:`module_signature`
+        :param dict found: the index, as returned by :func:`build_manifest`
+        """
+        manifest = json.dumps({
+            'format': self.format_version,
+            'library': VERSION,
+            'signature': signature,
+            'modules': found,
+        })
+        directory = os.path.dirname(self.path)
+        try:
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+
+            # Write to a temporary file first so that readers never see a
+            # partially written manifest
+            handle, tmp_name = tempfile.mkstemp(dir=directory)
+            with os.fdopen(handle, 'w') as tmp_file:
+                tmp_file.write(manifest)
+            os.rename(tmp_name, self.path)
+        except (IOError, OSError) as ex:
+            LOGGER.warning('Unable to write CLI manifest %s: %s',
+                           self.path, ex)
+
+    def get_module(self, module_name):
+        """ Returns a :class:`ManifestModule` for a module, or None if there
+            is no such module """
+        entry = self.modules.get(module_name)
+        if entry is None:
+            return None
+        return ManifestModule(module_name, entry['doc'])
+
+    def get_commands(self, module_name):
+        """ Returns a :class:`LazyCommand` for each command of a module,
+            keyed by action """
+        entry = self.modules.get(module_name) or {'commands': []}
+        return dict((command['action'], LazyCommand(
+            command['class'], command['action'], command['doc'],
+            command['options']))
+            for command in entry['commands'])
+
+    def clear(self):
+        """ Removes the manifest from disk and forgets the index """
+        with self._lock:
+            self._modules = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
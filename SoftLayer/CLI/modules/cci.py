@@ -31,15 +31,17 @@ hostname or the ip address for a CCI.
 from os import linesep
 import os.path
 
-from SoftLayer import CCIManager, SshKeyManager, DNSManager, DNSZoneNotFound
+from SoftLayer import (
+    CCIManager, SshKeyManager, DNSManager, DNSZoneNotFound, WaitTimeout)
 from SoftLayer.utils import lookup
 from SoftLayer.CLI import (
-    CLIRunnable, Table, no_going_back, confirm, mb_to_gb, listing,
-    FormattedItem)
+    CLIRunnable, Table, StreamingTable, no_going_back, confirm, mb_to_gb,
+    listing, FormattedItem)
 from SoftLayer.CLI.helpers import (
-    CLIAbort, ArgumentError, NestedDict, blank, resolve_id, KeyValueTable,
-    update_with_template_args, FALSE_VALUES, export_to_template,
-    active_txn, transaction_status)
+    CLIAbort, ArgumentError, NestedDict, blank, resolve_id, resolve_many,
+    KeyValueTable, update_with_template_args, FALSE_VALUES, export_to_template,
+    active_txn, transaction_status, stream_args, read_template_sections,
+    format_output)
 
 
 class ListCCIs(CLIRunnable):
@@ -58,6 +60,7 @@ Examples:
 Options:
   --sortby=ARG  Column to sort by. options: id, datacenter, host,
                 Cores, memory, primary_ip, backend_ip
+  --stream      Print CCIs as they're received, unsorted
 
 Filters:
   -c --cpu=CPU             Number of CPU cores
@@ -82,6 +85,7 @@ For more on filters see 'sl help filters'
         if args.get('--tags'):
             tags = [tag.strip() for tag in args.get('--tags').split(',')]
 
+        stream = stream_args(args)
         guests = cci.list_instances(hourly=args.get('--hourly'),
                                     monthly=args.get('--monthly'),
                                     hostname=args.get('--hostname'),
@@ -90,30 +94,38 @@ For more on filters see 'sl help filters'
                                     memory=args.get('--memory'),
                                     datacenter=args.get('--datacenter'),
                                     nic_speed=args.get('--network'),
-                                    tags=tags)
+                                    tags=tags,
+                                    **stream)
 
-        table = Table([
+        columns = [
             'id', 'datacenter', 'host',
             'cores', 'memory', 'primary_ip',
             'backend_ip', 'active_transaction',
-        ])
-        table.sortby = args.get('--sortby') or 'host'
-
-        for guest in guests:
-            guest = NestedDict(guest)
-            table.add_row([
-                guest['id'],
-                guest['datacenter']['name'] or blank(),
-                guest['fullyQualifiedDomainName'],
-                guest['maxCpu'],
-                mb_to_gb(guest['maxMemory']),
-                guest['primaryIpAddress'] or blank(),
-                guest['primaryBackendIpAddress'] or blank(),
-                active_txn(guest),
-            ])
+        ]
+        rows = (self._row(NestedDict(guest)) for guest in guests)
+        if stream:
+            return StreamingTable(columns, rows)
 
+        table = Table(columns)
+        table.sortby = args.get('--sortby') or 'host'
+        for row in rows:
+            table.add_row(row)
         return table
 
+    @staticmethod
+    def _row(guest):
+        """ Returns the table row for a CCI """
+        return [
+            guest['id'],
+            guest['datacenter']['name'] or blank(),
+            guest['fullyQualifiedDomainName'],
+            guest['maxCpu'],
+            mb_to_gb(guest['maxMemory']),
+            guest['primaryIpAddress'] or blank(),
+            guest['primaryBackendIpAddress'] or blank(),
+            active_txn(guest),
+        ]
+
 
 class CCIDetails(CLIRunnable):
     """
@@ -377,6 +389,14 @@ Optional:
                            placed.
   --wait=SECONDS         Block until CCI is finished provisioning for up to X
                            seconds before returning
+
+Several CCIs:
+  --count=COUNT          Create COUNT CCIs with these options. A number is
+                           added to each hostname: HOST-1, HOST-2, ...
+  --from-file=FILE       Create a CCI for each section of FILE, in INI format.
+                           The section name is the hostname and its options
+                           override the ones given here
+  --batch-size=SIZE      The most CCIs to order with one API call. Default: 10
 """
     action = 'create'
     options = ['confirm']
@@ -386,14 +406,10 @@ Optional:
         update_with_template_args(args)
         cci = CCIManager(self.client)
         self._update_with_like_args(args)
+        self._split_list_args(args)
 
-        # Disks will be a comma-separated list. Let's make it a real list.
-        if isinstance(args.get('--disk'), str):
-            args['--disk'] = args.get('--disk').split(',')
-
-        # SSH keys may be a comma-separated list. Let's make it a real list.
-        if isinstance(args.get('--key'), str):
-            args['--key'] = args.get('--key').split(',')
+        if args.get('--count') or args.get('--from-file'):
+            return self._create_many(cci, args)
 
         self._validate_args(args)
 
@@ -469,6 +485,140 @@ Optional:
 
         return output
 
+    def _create_many(self, cci, args):
+        """ Quotes or creates a CCI for each set of options from --count or
+            --from-file. Quotes are requested concurrently and CCIs are
+            ordered batch-size at a time. """
+        if args.get('--export'):
+            raise ArgumentError(
+                '[--export] not allowed with [--count | --from-file]')
+        if all([args.get('--count'), args.get('--from-file')]):
+            raise ArgumentError('[--count] not allowed with [--from-file]')
+
+        # Resolved once here rather than again for every CCI
+        if args.get('--key'):
+            ssh = SshKeyManager(self.client)
+            args['--key'] = [str(resolve_id(ssh.resolve_ids, key, 'SshKey'))
+                             for key in args['--key']]
+
+        specs = []
+        for spec_args in self._expand_args(args):
+            self._split_list_args(spec_args)
+            self._validate_args(spec_args)
+            specs.append(self._parse_create_args(spec_args))
+
+        if args.get('--test'):
+            table = Table(['hostname', 'billing', 'cost', 'error'])
+            for spec, result in zip(specs,
+                                    cci.verify_create_instances(specs)):
+                billing = 'hourly' if spec['hourly'] else 'monthly'
+                if isinstance(result, Exception):
+                    table.add_row([spec['hostname'], billing, blank(),
+                                   str(result)])
+                    continue
+                fee = 'hourlyRecurringFee' if spec['hourly'] \
+                    else 'recurringFee'
+                total = sum(float(price.get(fee, 0.0))
+                            for price in result['prices'])
+                table.add_row([spec['hostname'], billing, "%.2f" % total,
+                               blank()])
+            return [table, FormattedItem(
+                None,
+                ' -- ! Prices reflected here are retail and do not '
+                'take account level discounts and are not guaranteed.')]
+
+        if not (args['--really'] or confirm(
+                "This action will incur charges on your account for %s CCIs. "
+                "Continue?" % len(specs))):
+            raise CLIAbort('Aborting CCI order.')
+
+        try:
+            batch_size = int(args.get('--batch-size') or 10)
+        except ValueError:
+            raise ArgumentError('Invalid batch size: %s'
+                                % args['--batch-size'])
+        results = cci.create_instances(specs, batch_size=max(batch_size, 1))
+        created = [result['id'] for result in results
+                   if not isinstance(result, Exception)]
+
+        ready = set()
+        if args.get('--wait') and created:
+            try:
+                for cci_id in cci.wait_for_ready_many(
+                        created, int(args.get('--wait') or 1)):
+                    ready.add(cci_id)
+            except WaitTimeout:
+                pass
+
+        columns = ['hostname', 'id', 'created', 'guid', 'error']
+        if args.get('--wait'):
+            columns.append('ready')
+        table = Table(columns)
+        for spec, result in zip(specs, results):
+            if isinstance(result, Exception):
+                row = [spec['hostname'], blank(), blank(), blank(),
+                       str(result), False]
+            else:
+                row = [spec['hostname'], result['id'], result['createDate'],
+                       result['globalIdentifier'], blank(),
+                       result['id'] in ready]
+            table.add_row(row[:len(columns)])
+
+        failed = len(specs) - len(created)
+        if failed:
+            self.env.out(format_output(table, fmt=args.get('--format')))
+            raise CLIAbort('%s of %s CCIs could not be created'
+                           % (failed, len(specs)))
+        return table
+
+    @staticmethod
+    def _expand_args(args):
+        """ Returns the arguments of each CCI to create with --count or
+            --from-file
+
+        :param dict args: CLI arguments
+        """
+        if args.get('--from-file'):
+            expanded = []
+            for hostname, options in read_template_sections(
+                    args['--from-file']):
+                spec_args = dict(args, **{'--hostname': hostname})
+                # A billing choice in the file replaces the one given here
+                if '--hourly' in options and '--monthly' not in options:
+                    spec_args['--monthly'] = False
+                if '--monthly' in options and '--hourly' not in options:
+                    spec_args['--hourly'] = False
+                spec_args.update(options)
+                expanded.append(spec_args)
+            if not expanded:
+                raise ArgumentError('No CCIs found in %s'
+                                    % args['--from-file'])
+            return expanded
+
+        try:
+            count = int(args['--count'])
+        except ValueError:
+            raise ArgumentError('Invalid count: %s' % args['--count'])
+        if count < 1:
+            raise ArgumentError('Invalid count: %s' % args['--count'])
+        if not args.get('--hostname'):
+            raise ArgumentError('Missing required options: --hostname')
+
+        return [dict(args, **{'--hostname': '%s-%s' % (args['--hostname'],
+                                                       number)})
+                for number in range(1, count + 1)]
+
+    @staticmethod
+    def _split_list_args(args):
+        """ Disks and SSH keys may be comma-separated lists. Makes them real
+            lists.
+
+        :param dict args: CLI arguments
+        """
+        for key in ['--disk', '--key']:
+            if isinstance(args.get(key), str):
+                args[key] = args[key].split(',')
+
     def _validate_args(self, args):
         """ Raises an ArgumentError if the given arguments are not valid """
         invalid_args = [k for k in self.required_params if args.get(k) is None]
@@ -630,9 +780,9 @@ Optional:
 
 class ReadyCCI(CLIRunnable):
     """
-usage: sl cci ready <identifier> [options]
+usage: sl cci ready <identifier>... [options]
 
-Check if a CCI is ready.
+Check if one or more CCIs are ready.
 
 Optional:
   --wait=SECONDS  Block until CCI is finished provisioning for up to X seconds
@@ -642,14 +792,27 @@ Optional:
 
     def execute(self, args):
         cci = CCIManager(self.client)
+        identifiers = args.get('<identifier>')
+        limit = int(args.get('--wait') or 0)
 
-        cci_id = resolve_id(cci.resolve_ids, args.get('<identifier>'), 'CCI')
-        ready = cci.wait_for_ready(cci_id, int(args.get('--wait') or 0))
+        if len(identifiers) == 1:
+            cci_id = resolve_id(cci.resolve_ids, identifiers[0], 'CCI')
+            ready = cci.wait_for_ready(cci_id, limit)
 
-        if ready:
-            return "READY"
-        else:
-            raise CLIAbort("Instance %s not ready" % cci_id)
+            if ready:
+                return "READY"
+            else:
+                raise CLIAbort("Instance %s not ready" % cci_id)
+
+        # Checked together, with one API call per check
+        cci_ids = resolve_many(cci.resolve_many, identifiers, 'CCI')
+        try:
+            for _ in cci.wait_for_ready_many(cci_ids, limit):
+                pass
+        except WaitTimeout as ex:
+            raise CLIAbort("Instances %s not ready"
+                           % ', '.join(str(_id) for _id in ex.pending))
+        return "READY"
 
 
 class ReloadCCI(CLIRunnable):
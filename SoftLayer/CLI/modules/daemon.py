@@ -0,0 +1,115 @@
+"""
+usage: sl daemon [<command>] [<args>...] [options]
+
+Run commands in a background process which keeps API clients warm
+
+While the daemon is running and SL_DAEMON is set, sl sends each command to it
+instead of starting up and connecting to the API itself. Prompts are still
+answered in the terminal the command was typed in. The daemon's clients keep
+their connections and cached responses between commands. It listens on
+~/.softlayer_cache/daemon.sock, or on $SL_DAEMON_SOCKET when that's set, and
+exits after an hour without commands.
+
+The available commands are:
+  start   Start the daemon in the background
+  run     Run the daemon in the foreground
+  status  Show whether the daemon is running
+  stop    Stop the daemon
+"""
+# :license: MIT, see LICENSE for more details.
+
+import socket
+
+from SoftLayer.CLI import CLIRunnable, CLIAbort, KeyValueTable
+from SoftLayer.CLI import daemon
+
+
+def _check_supported():
+    """ The daemon listens on a unix socket """
+    if not hasattr(socket, 'AF_UNIX'):
+        raise CLIAbort('sl daemon is not supported on this platform')
+
+
+def status_table(status):
+    """ Returns a table of what the daemon reports about itself """
+    table = KeyValueTable(['Name', 'Value'])
+    table.align['Name'] = 'r'
+    table.align['Value'] = 'l'
+    table.add_row(['pid', status['pid']])
+    table.add_row(['version', status['version']])
+    table.add_row(['socket', status['socket']])
+    table.add_row(['uptime', '%ds' % status['uptime']])
+    table.add_row(['commands', status['commands']])
+    table.add_row(['clients', status['clients']])
+    return table
+
+
+class StartDaemon(CLIRunnable):
+    """
+usage: sl daemon start [options]
+
+Start the daemon in the background
+
+Options:
+  --idle=SECONDS  Exit after this long without a command [Default: 3600]
+"""
+    action = 'start'
+
+    def execute(self, args):
+        _check_supported()
+        if daemon.request({'control': 'status'}) is not None:
+            raise CLIAbort('sl daemon is already running')
+
+        status = daemon.start(idle_timeout=float(args['--idle']))
+        if status is None:
+            raise CLIAbort('sl daemon did not start; try `sl daemon run` '
+                           'to see why')
+        return status_table(status)
+
+
+class RunDaemon(CLIRunnable):
+    """
+usage: sl daemon run [options]
+
+Run the daemon in the foreground, until it's stopped or interrupted
+
+Options:
+  --idle=SECONDS  Exit after this long without a command [Default: 3600]
+"""
+    action = 'run'
+
+    def execute(self, args):
+        _check_supported()
+        server = daemon.Daemon(idle_timeout=float(args['--idle']))
+        server.bind()
+        self.env.err('Listening on %s' % server.path)
+        server.serve_forever()
+
+
+class DaemonStatus(CLIRunnable):
+    """
+usage: sl daemon status [options]
+
+Show whether the daemon is running
+"""
+    action = 'status'
+
+    def execute(self, args):
+        status = daemon.request({'control': 'status'})
+        if status is None:
+            raise CLIAbort('sl daemon is not running')
+        return status_table(status)
+
+
+class StopDaemon(CLIRunnable):
+    """
+usage: sl daemon stop [options]
+
+Stop the daemon
+"""
+    action = 'stop'
+
+    def execute(self, args):
+        if daemon.request({'control': 'stop'}) is None:
+            raise CLIAbort('sl daemon is not running')
+        self.env.err('Stopped')
@@ -52,7 +52,8 @@ List backend mac addresses
     action = 'backend_mac'
 
     def _execute(self, _):
-        return listing(MetadataManager().get('backend_mac'), separator=',')
+        return listing(MetadataManager(self.client).get('backend_mac'),
+                       separator=',')
 
 
 class Datacenter(MetaRunnable):
@@ -64,7 +65,7 @@ Get datacenter name
     action = 'datacenter'
 
     def _execute(self, _):
-        return MetadataManager().get('datacenter')
+        return MetadataManager(self.client).get('datacenter')
 
 
 class DatacenterId(MetaRunnable):
@@ -76,7 +77,7 @@ Get datacenter id
     action = 'datacenter_id'
 
     def _execute(self, _):
-        return MetadataManager().get('datacenter_id')
+        return MetadataManager(self.client).get('datacenter_id')
 
 
 class FrontendMacAddresses(MetaRunnable):
@@ -88,7 +89,8 @@ List frontend mac addresses
     action = 'frontend_mac'
 
     def _execute(self, _):
-        return listing(MetadataManager().get('frontend_mac'), separator=',')
+        return listing(MetadataManager(self.client).get('frontend_mac'),
+                       separator=',')
 
 
 class FullyQualifiedDomainName(MetaRunnable):
@@ -100,7 +102,7 @@ Get fully qualified domain name
     action = 'fqdn'
 
     def _execute(self, _):
-        return MetadataManager().get('fqdn')
+        return MetadataManager(self.client).get('fqdn')
 
 
 class Hostname(MetaRunnable):
@@ -112,7 +114,7 @@ Get hostname
     action = 'hostname'
 
     def _execute(self, _):
-        return MetadataManager().get('hostname')
+        return MetadataManager(self.client).get('hostname')
 
 
 class Id(MetaRunnable):
@@ -124,7 +126,7 @@ Get id
     action = 'id'
 
     def _execute(self, _):
-        return MetadataManager().get('id')
+        return MetadataManager(self.client).get('id')
 
 
 class PrimaryBackendIpAddress(MetaRunnable):
@@ -136,7 +138,7 @@ Get primary backend ip address
     action = 'backend_ip'
 
     def _execute(self, _):
-        return MetadataManager().get('primary_backend_ip')
+        return MetadataManager(self.client).get('primary_backend_ip')
 
 
 class PrimaryIpAddress(MetaRunnable):
@@ -148,7 +150,7 @@ Get primary ip address
     action = 'ip'
 
     def _execute(self, _):
-        return MetadataManager().get('primary_ip')
+        return MetadataManager(self.client).get('primary_ip')
 
 
 class ProvisionState(MetaRunnable):
@@ -160,7 +162,7 @@ Get provision state
     action = 'provision_state'
 
     def _execute(self, _):
-        return MetadataManager().get('provision_state')
+        return MetadataManager(self.client).get('provision_state')
 
 
 class Tags(MetaRunnable):
@@ -172,7 +174,7 @@ List tags
     action = 'tags'
 
     def _execute(self, _):
-        return listing(MetadataManager().get('tags'), separator=',')
+        return listing(MetadataManager(self.client).get('tags'), separator=',')
 
 
 class UserMetadata(CLIRunnable):
@@ -185,7 +187,7 @@ Get user-defined data
 
     def _execute(self, _):
         """ Returns user metadata """
-        userdata = MetadataManager().get('user_data')
+        userdata = MetadataManager(self.client).get('user_data')
         if userdata:
             return userdata
         else:
@@ -201,7 +203,7 @@ Get details about the public or private network
     action = 'network'
 
     def _execute(self, args):
-        meta = MetadataManager()
+        meta = MetadataManager(self.client)
         if args['<public>']:
             table = KeyValueTable(['Name', 'Value'])
             table.align['Name'] = 'r'
@@ -27,9 +27,10 @@ import re
 import os
 from os import linesep
 from SoftLayer.CLI.helpers import (
-    CLIRunnable, Table, KeyValueTable, FormattedItem, NestedDict, CLIAbort,
-    blank, listing, gb, active_txn, no_going_back, resolve_id, confirm,
-    ArgumentError, update_with_template_args, export_to_template)
+    CLIRunnable, Table, KeyValueTable, StreamingTable, FormattedItem,
+    NestedDict, CLIAbort, blank, listing, gb, active_txn, no_going_back,
+    resolve_id, confirm, ArgumentError, update_with_template_args,
+    export_to_template, stream_args)
 from SoftLayer import HardwareManager, SshKeyManager
 
 
@@ -47,6 +48,7 @@ Examples:
 Options:
   --sortby=ARG  Column to sort by. options: id, datacenter, host, cores,
                   memory, primary_ip, backend_ip
+  --stream      Print servers as they're received, unsorted
 
 Filters:
   -c, --cpu=CPU        Number of CPU cores
@@ -69,6 +71,7 @@ For more on filters see 'sl help filters'
         if args.get('--tags'):
             tags = [tag.strip() for tag in args.get('--tags').split(',')]
 
+        stream = stream_args(args)
         servers = manager.list_hardware(
             hostname=args.get('--hostname'),
             domain=args.get('--domain'),
@@ -76,9 +79,10 @@ For more on filters see 'sl help filters'
             memory=args.get('--memory'),
             datacenter=args.get('--datacenter'),
             nic_speed=args.get('--network'),
-            tags=tags)
+            tags=tags,
+            **stream)
 
-        table = Table([
+        columns = [
             'id',
             'datacenter',
             'host',
@@ -87,24 +91,31 @@ For more on filters see 'sl help filters'
             'primary_ip',
             'backend_ip',
             'active_transaction'
-        ])
-        table.sortby = args.get('--sortby') or 'host'
-
-        for server in servers:
-            server = NestedDict(server)
-            table.add_row([
-                server['id'],
-                server['datacenter']['name'] or blank(),
-                server['fullyQualifiedDomainName'],
-                server['processorPhysicalCoreAmount'],
-                gb(server['memoryCapacity'] or 0),
-                server['primaryIpAddress'] or blank(),
-                server['primaryBackendIpAddress'] or blank(),
-                active_txn(server),
-            ])
+        ]
+        rows = (self._row(NestedDict(server)) for server in servers)
+        if stream:
+            return StreamingTable(columns, rows)
 
+        table = Table(columns)
+        table.sortby = args.get('--sortby') or 'host'
+        for row in rows:
+            table.add_row(row)
         return table
 
+    @staticmethod
+    def _row(server):
+        """ Returns the table row for a server """
+        return [
+            server['id'],
+            server['datacenter']['name'] or blank(),
+            server['fullyQualifiedDomainName'],
+            server['processorPhysicalCoreAmount'],
+            gb(server['memoryCapacity'] or 0),
+            server['primaryIpAddress'] or blank(),
+            server['primaryBackendIpAddress'] or blank(),
+            active_txn(server),
+        ]
+
 
 class ServerDetails(CLIRunnable):
     """
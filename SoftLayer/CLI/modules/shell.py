@@ -0,0 +1,61 @@
+"""
+usage: sl shell [options]
+
+Run sl commands in an interactive shell
+
+Commands are typed without the leading 'sl', E.G.: 'cci list'. The API
+client is kept between commands, so its connections and cached responses are
+reused and each command only waits for the API calls it makes. Type 'exit' or
+press Ctrl-D to leave the shell.
+"""
+# :license: MIT, see LICENSE for more details.
+# Missing docstrings ignored due to __doc__ = __doc__ magic
+# pylint: disable=C0111
+
+import shlex
+
+from SoftLayer.CLI import CLIRunnable
+
+PROMPT = 'sl> '
+
+
+class Shell(CLIRunnable):
+    # Use the same documentation as the module
+    __doc__ = __doc__
+    action = None
+
+    def execute(self, args):
+        try:
+            # Gives the prompt line editing and history where available
+            import readline  # NOQA pylint: disable=W0612
+        except ImportError:
+            pass
+        from SoftLayer.CLI.core import run
+
+        clients = {}
+        while True:
+            try:
+                line = self.env.input(PROMPT)
+            except EOFError:
+                self.env.out('')
+                break
+            except KeyboardInterrupt:
+                self.env.out('')
+                continue
+
+            try:
+                words = shlex.split(line)
+            except ValueError as ex:
+                self.env.err(str(ex))
+                continue
+
+            if words and words[0] == 'sl':
+                words = words[1:]
+            if not words:
+                continue
+            if words[0] in ['exit', 'quit']:
+                break
+            if words[0] == 'shell':
+                self.env.err('Already in sl shell')
+                continue
+            run(words, self.env, clients=clients)
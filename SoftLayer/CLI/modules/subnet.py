@@ -15,7 +15,8 @@ The available commands are:
 from SoftLayer import NetworkManager
 from SoftLayer.utils import lookup
 from SoftLayer.CLI import (
-    CLIRunnable, Table, KeyValueTable, confirm, no_going_back, resolve_id)
+    CLIRunnable, Table, KeyValueTable, StreamingTable, confirm,
+    no_going_back, resolve_id, stream_args)
 from SoftLayer.CLI.helpers import CLIAbort, blank
 
 
@@ -175,6 +176,7 @@ Displays a list of subnets
 Options:
   --sortby=ARG  Column to sort by. options: id, number, datacenter, IPs,
     hardware, ccis, networking
+  --stream      Print subnets as they're received, unsorted
 
 Filters:
   -d DC, --datacenter=DC   datacenter shortname (sng01, dal05, ...)
@@ -188,39 +190,49 @@ Filters:
     def execute(self, args):
         mgr = NetworkManager(self.client)
 
-        table = Table([
-            'id', 'identifier', 'type', 'datacenter', 'vlan id', 'IPs',
-            'hardware', 'ccis',
-        ])
-        table.sortby = args.get('--sortby') or 'id'
-
         version = 0
         if args.get('--v4'):
             version = 4
         elif args.get('--v6'):
             version = 6
 
+        stream = stream_args(args)
         subnets = mgr.list_subnets(
             datacenter=args.get('--datacenter'),
             version=version,
             identifier=args.get('--identifier'),
             subnet_type=args.get('--type'),
+            **stream
         )
 
-        for subnet in subnets:
-            table.add_row([
-                subnet['id'],
-                '%s/%s' % (subnet['networkIdentifier'], str(subnet['cidr'])),
-                subnet.get('subnetType', blank()),
-                lookup(subnet, 'datacenter', 'name',) or blank(),
-                subnet['networkVlanId'],
-                subnet['ipAddressCount'],
-                len(subnet['hardware']),
-                len(subnet['virtualGuests']),
-            ])
+        columns = [
+            'id', 'identifier', 'type', 'datacenter', 'vlan id', 'IPs',
+            'hardware', 'ccis',
+        ]
+        rows = (self._row(subnet) for subnet in subnets)
+        if stream:
+            return StreamingTable(columns, rows)
 
+        table = Table(columns)
+        table.sortby = args.get('--sortby') or 'id'
+        for row in rows:
+            table.add_row(row)
         return table
 
+    @staticmethod
+    def _row(subnet):
+        """ Returns the table row for a subnet """
+        return [
+            subnet['id'],
+            '%s/%s' % (subnet['networkIdentifier'], str(subnet['cidr'])),
+            subnet.get('subnetType', blank()),
+            lookup(subnet, 'datacenter', 'name',) or blank(),
+            subnet['networkVlanId'],
+            subnet['ipAddressCount'],
+            len(subnet['hardware']),
+            len(subnet['virtualGuests']),
+        ]
+
 
 class SubnetLookup(CLIRunnable):
     """
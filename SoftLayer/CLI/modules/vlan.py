@@ -10,7 +10,9 @@ The available commands are:
 # :license: MIT, see LICENSE for more details.
 
 from SoftLayer import NetworkManager
-from SoftLayer.CLI import CLIRunnable, Table, KeyValueTable, blank, resolve_id
+from SoftLayer.CLI import (
+    CLIRunnable, Table, KeyValueTable, StreamingTable, blank, resolve_id,
+    stream_args)
 
 
 class VlanDetail(CLIRunnable):
@@ -99,6 +101,7 @@ Displays a list of VLANs
 Options:
   --sortby=ARG  Column to sort by. options: id, number, datacenter, IPs,
     hardware, ccis, networking
+  --stream      Print VLANs as they're received, unsorted
 
 Filters:
   -d DC, --datacenter=DC  datacenter shortname (sng01, dal05, ...)
@@ -110,28 +113,39 @@ Filters:
     def execute(self, args):
         mgr = NetworkManager(self.client)
 
-        table = Table([
-            'id', 'number', 'datacenter', 'name', 'IPs', 'hardware', 'ccis',
-            'networking', 'firewall'
-        ])
-        table.sortby = args.get('--sortby') or 'id'
-
+        stream = stream_args(args)
         vlans = mgr.list_vlans(
             datacenter=args.get('--datacenter'),
             vlan_number=args.get('--number'),
             name=args.get('--name'),
+            **stream
         )
-        for vlan in vlans:
-            table.add_row([
-                vlan['id'],
-                vlan['vlanNumber'],
-                vlan['primaryRouter']['datacenter']['name'],
-                vlan.get('name') or blank(),
-                vlan['totalPrimaryIpAddressCount'],
-                len(vlan['hardware']),
-                len(vlan['virtualGuests']),
-                len(vlan['networkComponents']),
-                'Yes' if vlan['firewallInterfaces'] else 'No',
-            ])
 
+        columns = [
+            'id', 'number', 'datacenter', 'name', 'IPs', 'hardware', 'ccis',
+            'networking', 'firewall'
+        ]
+        rows = (self._row(vlan) for vlan in vlans)
+        if stream:
+            return StreamingTable(columns, rows)
+
+        table = Table(columns)
+        table.sortby = args.get('--sortby') or 'id'
+        for row in rows:
+            table.add_row(row)
         return table
+
+    @staticmethod
+    def _row(vlan):
+        """ Returns the table row for a VLAN """
+        return [
+            vlan['id'],
+            vlan['vlanNumber'],
+            vlan['primaryRouter']['datacenter']['name'],
+            vlan.get('name') or blank(),
+            vlan['totalPrimaryIpAddressCount'],
+            len(vlan['hardware']),
+            len(vlan['virtualGuests']),
+            len(vlan['networkComponents']),
+            'Yes' if vlan['firewallInterfaces'] else 'No',
+        ]
@@ -59,3 +59,26 @@ def export_to_template(filename, args, exclude=None):
                 if isinstance(val, list):
                     val = ','.join(val)
                 template_file.write('%s=%s\n' % (k, val))
+
+
+def read_template_sections(filename):
+    """ Reads a file with several sets of options in INI format, one set
+        per section. Returns (section name, options) pairs in the order they
+        appear in the file, with options keyed by their long name
+        (E.G. '--cpu').
+
+    :param filename: Filename to read options from
+    """
+    path = os.path.expanduser(filename)
+    if not os.path.exists(path):
+        raise ArgumentError('File does not exist: %s' % filename)
+
+    config = configparser.ConfigParser()
+    try:
+        config.read(path)
+    except configparser.Error as ex:
+        raise ArgumentError('Unable to read %s: %s' % (filename, ex))
+
+    return [(section, dict(('--%s' % key, value)
+                           for key, value in config.items(section)))
+            for section in config.sections()]
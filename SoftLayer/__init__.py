@@ -14,12 +14,27 @@
     :license: MIT, see LICENSE for more details.
 """
 # pylint: disable=w0401
+import sys
+
 from SoftLayer.consts import VERSION
 
 from .API import *  # NOQA
-from .managers import *  # NOQA
 from .exceptions import *  # NOQA
 from .auth import *  # NOQA
+from . import managers as _managers
+
+
+def __getattr__(name):
+    """ Imports managers (and the modules they need) on first use """
+    if name in _managers.MANAGERS:
+        manager = _managers.load_manager(name)
+        globals()[name] = manager
+        return manager
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+if sys.version_info < (3, 7):
+    from .managers import *  # NOQA
 
 __title__ = 'SoftLayer'
 __version__ = VERSION
@@ -0,0 +1,302 @@
+"""
+    SoftLayer.aio
+    ~~~~~~~~~~~~~
+    asyncio bindings for the SoftLayer API. Requires Python 3.6+ and aiohttp.
+    This is a package of its own so that setup.py can leave it out on older
+    versions of Python, which can't compile it.
+
+    :license: MIT, see LICENSE for more details.
+"""
+import asyncio
+from collections import deque
+from itertools import islice
+import logging
+import time
+
+import aiohttp
+
+from SoftLayer.API import Client, _page_plan
+from SoftLayer.auth import TokenAuthentication
+from SoftLayer.exceptions import TransportError
+from SoftLayer.metrics import CallRecord
+from SoftLayer.transports import encode_xml_rpc_call, decode_xml_rpc_response
+
+__all__ = ['AsyncClient', 'make_async_xml_rpc_api_call']
+
+LOGGER = logging.getLogger(__name__)
+
+
+async def make_async_xml_rpc_api_call(session, uri, method, args=None,
+                                      headers=None, http_headers=None,
+                                      timeout=None, proxy=None, stats=None):
+    """ Makes a SoftLayer API call against the XML-RPC endpoint using aiohttp
+
+    :param session: the aiohttp.ClientSession to send the request with
+    :param string uri: endpoint URL
+    :param string method: method to call E.G.: 'getObject'
+    :param dict headers: XML-RPC headers to use for the request
+    :param dict http_headers: HTTP headers to use for the request
+    :param int timeout: number of seconds to use as a timeout
+    :param string proxy: HTTP proxy to send the request through
+    :param dict stats: if given, filled with the same measurements as
+                       :func:`SoftLayer.transports.make_xml_rpc_api_call`
+    """
+    if stats is None:
+        stats = {}
+    start = time.time()
+    payload = encode_xml_rpc_call(method, args, headers).encode('utf-8')
+    stats['serialize_time'] = time.time() - start
+    stats['request_bytes'] = len(payload)
+    LOGGER.debug("=== REQUEST ===")
+    LOGGER.info('POST %s', uri)
+    LOGGER.debug(http_headers)
+    LOGGER.debug(payload)
+
+    start = time.time()
+    try:
+        async with session.post(uri,
+                                data=payload,
+                                headers=http_headers,
+                                proxy=proxy,
+                                timeout=aiohttp.ClientTimeout(
+                                    total=timeout)) as response:
+            content = await response.read()
+            stats['network_time'] = time.time() - start
+            stats['status'] = response.status
+            stats['response_bytes'] = len(content)
+            LOGGER.debug("=== RESPONSE ===")
+            LOGGER.debug(response.headers)
+            LOGGER.debug(content)
+            response.raise_for_status()
+    except aiohttp.ClientResponseError as ex:
+        raise TransportError(ex.status, str(ex))
+    except aiohttp.ClientError as ex:
+        raise TransportError(0, str(ex))
+    except asyncio.TimeoutError:
+        raise TransportError(0, 'Timed out calling %s' % uri)
+
+    start = time.time()
+    try:
+        return decode_xml_rpc_response(content)
+    finally:
+        stats['decode_time'] = time.time() - start
+
+
+class AsyncClient(Client):
+    """ A SoftLayer API client for asyncio applications.
+
+    Takes the same arguments as :class:`SoftLayer.Client`, except for retry,
+    rate_limiter, single_flight and cassette which aren't supported yet.
+    Calls return awaitables and ``iter=True`` returns an async generator.
+    Connections are pooled by an aiohttp session which is created on first
+    use; close it with :meth:`close` or by using the client as an async
+    context manager.
+
+    Usage:
+
+        >>> import SoftLayer
+        >>> from SoftLayer.aio import AsyncClient
+        >>> async def main():
+        ...     async with AsyncClient() as client:
+        ...         account = await client['Account'].getObject()
+        ...         async for guest in client['Account'].getVirtualGuests(
+        ...                 iter=True, prefetch=4):
+        ...             print(guest['id'])
+
+    """
+    def __init__(self, *args, **kwargs):
+        for name in ['retry', 'rate_limiter', 'single_flight', 'cassette']:
+            if kwargs.get(name):
+                raise TypeError('AsyncClient does not support %s' % name)
+        super(AsyncClient, self).__init__(*args, **kwargs)
+        self._session = None
+
+    def get_session(self):
+        """ Returns the aiohttp session used to make calls, creating it
+            (and its connection pool) if needed. """
+        if self._session is None or self._session.closed:
+            pool = self.connection_pool
+            connector = aiohttp.TCPConnector(
+                limit=pool.pool_connections * pool.pool_maxsize,
+                limit_per_host=pool.pool_maxsize,
+                keepalive_timeout=pool.idle_timeout or 15)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def authenticate_with_password(self, username, password,
+                                         security_question_id=None,
+                                         security_question_answer=None):
+        """ See Client.authenticate_with_password for documentation. """
+        self.auth = None
+        res = await self['User_Customer'].getPortalLoginToken(
+            username,
+            password,
+            security_question_id,
+            security_question_answer)
+        self.auth = TokenAuthentication(res['userId'], res['hash'])
+        return res['userId'], res['hash']
+
+    def call(self, service, method, *args, **kwargs):
+        """ Make a SoftLayer API call. Returns an awaitable for the result, or
+            an async generator when called with ``iter=True``.
+
+        See Client.call for the arguments.
+        """
+        if kwargs.pop('iter', False):
+            return self.iter_call(service, method, *args, **kwargs)
+
+        service = self._check_call(service, kwargs)
+        if not self.observers:
+            return self._async_call(service, method, args, kwargs)
+        return self._observed_call(service, method, args, kwargs)
+
+    __call__ = call
+
+    async def _observed_call(self, service, method, args, kwargs):
+        """ Makes a call and passes its record to the observers """
+        record = CallRecord(service, method)
+        try:
+            return await self._async_call(service, method, args, kwargs,
+                                          record=record)
+        except Exception as ex:
+            record.error = ex.__class__.__name__
+            raise
+        finally:
+            record.finish()
+            self._notify(record)
+
+    async def _async_call(self, service, method, args, kwargs, record=None):
+        """ Makes a call, going through the response cache if there is
+            one """
+        if self.cache is None:
+            return await self._send(service, method, args, kwargs, record)
+
+        key = self.cache.make_key(service, method, args, kwargs)
+        if key is not None:
+            found, result = self.cache.get(key)
+            if found:
+                if record is not None:
+                    record.cache_hit = True
+                return result
+
+        try:
+            result = await self._send(service, method, args, kwargs, record)
+        finally:
+            if self.cache.is_mutating(method):
+                self.cache.invalidate(service)
+
+        if key is not None:
+            self.cache.set(key, service, method, result)
+        return result
+
+    async def _send(self, service, method, args, kwargs, record=None):
+        """ Builds the headers for a call and sends it to the API """
+        uri, headers, http_headers = self._build_request(service, kwargs)
+        stats = {}
+        try:
+            return await make_async_xml_rpc_api_call(
+                self.get_session(), uri, method, args,
+                headers=headers,
+                http_headers=http_headers,
+                timeout=self.timeout,
+                proxy=self.proxy,
+                stats=stats)
+        finally:
+            if record is not None:
+                record.update(stats)
+
+    async def iter_call(self, service, method,
+                        chunk=100, limit=None, offset=0, *args, **kwargs):
+        """ An async generator that deals with paginating through results.
+
+        :param service: the name of the SoftLayer API service
+        :param method: the method to call on the service
+        :param integer chunk: result size for each API call
+        :param integer prefetch: number of pages to keep requesting
+                                 concurrently while earlier pages are being
+                                 consumed. Results are still yielded in
+                                 order. Defaults to 0, which fetches one page
+                                 at a time.
+        :param \\*args: same optional arguments that ``Service.call`` takes
+        :param \\*\\*kwargs: same optional keyword arguments that
+                           ``Service.call`` takes
+
+        """
+        prefetch = kwargs.pop('prefetch', 0)
+        if chunk <= 0:
+            raise AttributeError("Chunk size should be greater than zero.")
+
+        if limit:
+            chunk = min(chunk, limit)
+
+        pages = _page_plan(chunk, limit, offset)
+        in_flight = deque()
+
+        def submit(page):
+            """ Starts fetching a page """
+            page_offset, page_limit = page
+            task = asyncio.ensure_future(self.call(
+                service, method, offset=page_offset, limit=page_limit,
+                *args, **kwargs))
+            in_flight.append((page_limit, task))
+
+        try:
+            for page in islice(pages, max(prefetch, 1)):
+                submit(page)
+
+            while in_flight:
+                page_limit, task = in_flight.popleft()
+                results = await task
+
+                # It looks like we ran out results
+                if not results:
+                    break
+
+                # Apparently this method doesn't return a list.
+                if not isinstance(results, list):
+                    yield results
+                    break
+
+                more = len(results) >= page_limit
+                # Keep the pipeline full before handing results out
+                if more and prefetch:
+                    for page in islice(pages, 1):
+                        submit(page)
+
+                for item in results:
+                    yield item
+
+                if not more:
+                    break
+                if not prefetch:
+                    for page in islice(pages, 1):
+                        submit(page)
+        finally:
+            # Pages past the end of the results (or past the point where the
+            # consumer stopped) are thrown away.
+            for _, task in in_flight:
+                task.cancel()
+
+    def batch(self, max_workers=None):
+        """ Not supported; use asyncio.gather() to make calls concurrently """
+        raise TypeError('AsyncClient does not support batch(); use '
+                        'asyncio.gather() instead')
+
+    async def close(self):
+        """ Closes the pooled connections used by this client. The client can
+            still be used afterwards; new connections will be opened. """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        await self.close()
+
+    def __repr__(self):
+        return "<AsyncClient: endpoint=%s, user=%r>" \
+            % (self.endpoint_url, self.auth)
+
+    __str__ = __repr__
@@ -0,0 +1,760 @@
+"""
+    SoftLayer.cache
+    ~~~~~~~~~~~~~~~
+    Read-through cache for API responses which rarely change
+
+    :license: MIT, see LICENSE for more details.
+"""
+from collections import OrderedDict
+import copy
+import gzip
+import hashlib
+import json
+import logging
+import os
+import os.path
+import tempfile
+import threading
+import time
+
+from SoftLayer.consts import VERSION
+from SoftLayer.utils import KNOWN_OPERATIONS, has_method_prefix, \
+    short_service_name
+
+__all__ = ['ResponseCache', 'CatalogCache', 'SingleFlight', 'IdentifierIndex',
+           'PackageItemIndex', 'DEFAULT_TTLS', 'catalog_key']
+
+LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = '~/.softlayer_cache/catalog'
+
+# Seconds to keep responses for, keyed by 'Service.method'
+DEFAULT_TTLS = {
+    'Account.getDomains': 300,
+    'Product_Package.getCategories': 3600,
+    'Product_Package.getConfiguration': 3600,
+    'Product_Package.getItems': 3600,
+    'Product_Package.getRegions': 3600,
+    'Ticket_Subject.getAllObjects': 86400,
+    'Virtual_Guest.getCreateObjectOptions': 3600,
+}
+
+# Calls to methods starting with one of these words (see
+# SoftLayer.utils.has_method_prefix) drop every cached response for the same
+# service
+MUTATING_PREFIXES = (
+    'add', 'assign', 'cancel', 'create', 'delete', 'edit', 'place', 'power',
+    'reboot', 'reload', 'remove', 'route', 'set', 'unassign', 'unroute',
+    'update',
+)
+
+KEY_ARGS = ['id', 'mask', 'filter', 'limit', 'offset']
+
+# (index field, property) pairs kept by IdentifierIndex, in the order
+# identifiers are matched against them
+INDEX_FIELDS = [
+    ('public_ip', 'primaryIpAddress'),
+    ('private_ip', 'primaryBackendIpAddress'),
+    ('hostname', 'hostname'),
+    ('fqdn', 'fullyQualifiedDomainName'),
+]
+
+# Object mask which fetches only the properties IdentifierIndex needs
+INDEX_MASK = 'id,%s' % ','.join(prop for _, prop in INDEX_FIELDS)
+
+# Words in item descriptions which tell apart items of a package with the
+# same category and capacity, E.G.: private and public CPUs
+ITEM_QUALIFIERS = ('Private', 'Public', 'Portable', 'Global')
+
+
+class ResponseCache(object):
+    """ A size-bounded, thread-safe LRU cache of API responses.
+
+    Only methods with a TTL are cached. Calling a mutating method (editObject,
+    createObject, deleteObject, placeOrder, ...) drops every cached response
+    for that service.
+
+    :param dict ttls: seconds to cache each method for, keyed by
+                      'Service.method'. Defaults to :data:`DEFAULT_TTLS`.
+    :param int max_size: maximum number of responses to keep
+    :param int default_ttl: if set, seconds to cache methods that aren't in
+                            ttls for. Only use this when every call made
+                            through the client is idempotent.
+
+    Usage:
+
+        >>> import SoftLayer
+        >>> from SoftLayer.cache import ResponseCache
+        >>> client = SoftLayer.Client(cache=ResponseCache(max_size=500))
+        >>> client['Product_Package'].getItems(id=46)
+        [...]
+        >>> client.cache.stats()
+        {'hits': 0, 'misses': 1, 'size': 1}
+
+    """
+    def __init__(self, ttls=None, max_size=1000, default_ttl=None):
+        if ttls is None:
+            ttls = DEFAULT_TTLS
+        self.ttls = dict(ttls)
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get_ttl(self, service, method):
+        """ Returns the number of seconds responses for the given method are
+            cached for, or None if they aren't cached. """
+        name = '%s.%s' % (short_service_name(service), method)
+        return self.ttls.get(name, self.default_ttl)
+
+    def make_key(self, service, method, args, kwargs):
+        """ Returns the cache key for a call or None if the call shouldn't be
+            cached.
+
+        :param service: the name of the SoftLayer API service
+        :param method: the method to call on the service
+        :param tuple args: the positional arguments of the call
+        :param dict kwargs: the keyword arguments of the call
+        """
+        if not self.get_ttl(service, method):
+            return None
+
+        options = dict((name, kwargs.get(name)) for name in KEY_ARGS)
+        return json.dumps([short_service_name(service), method, args, options],
+                          sort_keys=True, default=repr)
+
+    def get(self, key):
+        """ Looks up a response. Returns a tuple of (found, response) """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[0] < time.time():
+                self.misses += 1
+                return False, None
+
+            # Re-insert to mark the entry as most recently used
+            self._entries[key] = entry
+            self.hits += 1
+        return True, copy.deepcopy(entry[2])
+
+    def set(self, key, service, method, response):
+        """ Stores a response, evicting the least recently used entries if the
+            cache is full. """
+        expires = time.time() + self.get_ttl(service, method)
+        entry = (expires, short_service_name(service), copy.deepcopy(response))
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def is_mutating(self, method):
+        """ Returns True if calling the method is expected to change data """
+        return has_method_prefix(method, MUTATING_PREFIXES)
+
+    def invalidate(self, service=None):
+        """ Drops cached responses.
+
+        :param service: only drop responses from this service. Drops every
+                        response if not given.
+        """
+        with self._lock:
+            if service is None:
+                self._entries.clear()
+                return
+
+            service = short_service_name(service)
+            for key, entry in list(self._entries.items()):
+                if entry[1] == service:
+                    del self._entries[key]
+
+    def stats(self):
+        """ Returns a dictionary of hit/miss counters and the current size """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SingleFlight(object):
+    """ Coalesces identical API calls which are in flight at the same time.
+
+    When several threads make the same call (same service, method,
+    arguments, headers, mask, filter, ...) at once, only the first one is
+    sent. The others wait for it and get a copy of its result, or its
+    exception. Nothing is kept once the call finishes, so unlike
+    :class:`ResponseCache` results are never stale. Calls to mutating
+    methods are never coalesced.
+
+    Usage:
+
+        >>> import SoftLayer
+        >>> from SoftLayer.cache import SingleFlight
+        >>> client = SoftLayer.Client(single_flight=SingleFlight())
+        >>> client.single_flight.stats()
+        {'calls': 0, 'shared': 0, 'in_flight': 0}
+
+    """
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    @staticmethod
+    def make_key(service, method, args, kwargs):
+        """ Returns the key identifying a call, or None if the call must not
+            be coalesced.
+
+        :param service: the name of the SoftLayer API service
+        :param method: the method to call on the service
+        :param tuple args: the positional arguments of the call
+        :param dict kwargs: the keyword arguments of the call
+        """
+        if has_method_prefix(method, MUTATING_PREFIXES):
+            return None
+        return json.dumps([short_service_name(service), method, args, kwargs],
+                          sort_keys=True, default=repr)
+
+    def do(self, key, func):
+        """ Returns func(), or the result of the identical call already in
+            flight.
+
+        :param key: the key returned by :meth:`make_key`
+        :param func: a callable which makes the call
+        """
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.shared += 1
+                flight.waiters += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return copy.deepcopy(flight.result)
+
+        try:
+            flight.result = func()
+            return flight.result
+        except Exception as ex:
+            flight.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.waiters and flight.error is None:
+                    # Waiters copy from their own snapshot so the caller can
+                    # safely modify the result it gets back
+                    flight.result = copy.deepcopy(flight.result)
+            flight.done.set()
+
+    def stats(self):
+        """ Returns the number of calls made, how many of them shared
+            another call's result and the number of calls in flight """
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'shared': self.shared,
+                'in_flight': len(self._flights),
+            }
+
+
+class _Flight(object):
+    """ A call in flight and the threads waiting on it """
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.result = None
+        self.error = None
+
+
+def catalog_key(client, key):
+    """ Returns a catalog cache key scoped to a client's endpoint and user.
+        Catalogs differ between accounts and endpoints, so clients of
+        different ones mustn't share entries.
+
+    :param client: the client the entry is fetched with
+    :param string key: the entry, E.G.: 'package_50'
+    """
+    auth = getattr(client, 'auth', None)
+    user = getattr(auth, 'username', None) or getattr(auth, 'user_id', None)
+    scope = '%s|%s' % (getattr(client, 'endpoint_url', None) or '',
+                       user or '')
+    digest = hashlib.sha1(scope.encode('utf-8')).hexdigest()[:16]
+    return '%s_%s' % (digest, key)
+
+
+class CatalogCache(object):
+    """ Stores product catalog data on disk so that it can be shared between
+    processes and CLI runs.
+
+    Entries are gzip-compressed JSON files tagged with a format version and
+    the library version; entries written by other versions are ignored.
+    Managers scope their keys to the client's endpoint and user with
+    :func:`catalog_key`.
+    Entries older than refresh_age are returned as-is while a fresh copy is
+    fetched on a background thread. Entries older than max_age are fetched
+    again before returning.
+
+    :param string path: directory to store entries in
+    :param int max_age: seconds before an entry is no longer used
+    :param int refresh_age: seconds before an entry is refreshed in the
+                            background. Defaults to half of max_age.
+
+    Usage:
+
+        >>> import SoftLayer
+        >>> from SoftLayer.cache import CatalogCache
+        >>> client = SoftLayer.Client(catalog_cache=CatalogCache())
+        >>> mgr = SoftLayer.HardwareManager(client)
+        >>> mgr.get_bare_metal_create_options()  # From disk after the first
+        {...}
+
+    """
+    format_version = 1
+
+    def __init__(self, path=DEFAULT_CATALOG_PATH, max_age=86400,
+                 refresh_age=None):
+        self.path = os.path.expanduser(path)
+        self.max_age = max_age
+        self.refresh_age = refresh_age
+        if refresh_age is None:
+            self.refresh_age = max_age / 2
+        self._lock = threading.Lock()
+        self._refreshing = set()
+
+    def _filename(self, key):
+        """ Returns the path of the file an entry is stored in """
+        return os.path.join(self.path, '%s.json.gz' % key)
+
+    def load(self, key):
+        """ Reads an entry from disk.
+
+        :param string key: the entry to read
+        :returns: a tuple of (age in seconds, data) or None if there's no
+                  usable entry
+        """
+        try:
+            with gzip.open(self._filename(key), 'rb') as entry_file:
+                entry = json.loads(entry_file.read().decode('utf-8'))
+        except (IOError, OSError, ValueError):
+            return None
+
+        if not isinstance(entry, dict) or any([
+                entry.get('format') != self.format_version,
+                entry.get('library') != VERSION]):
+            return None
+
+        return time.time() - entry['created'], entry['data']
+
+    def save(self, key, data):
+        """ Writes an entry to disk. Errors are logged and otherwise ignored
+            since the cache is only an optimization.
+
+        :param string key: the entry to write
+        :param data: JSON-serializable data to store
+        """
+        entry = json.dumps({
+            'format': self.format_version,
+            'library': VERSION,
+            'created': time.time(),
+            'data': data,
+        })
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path)
+
+            # Write to a temporary file first so that readers never see a
+            # partially written entry
+            handle, tmp_name = tempfile.mkstemp(dir=self.path)
+            with os.fdopen(handle, 'wb') as tmp_file:
+                with gzip.GzipFile(fileobj=tmp_file, mode='wb') as entry_file:
+                    entry_file.write(entry.encode('utf-8'))
+            os.rename(tmp_name, self._filename(key))
+        except (IOError, OSError) as ex:
+            LOGGER.warning('Unable to write catalog cache entry %s: %s',
+                           key, ex)
+
+    def fetch(self, key, loader, max_age=None):
+        """ Returns an entry, using loader() to fetch (and store) it when
+            there's no fresh copy on disk.
+
+        :param string key: the entry to return
+        :param loader: a callable which fetches the data for the entry
+        :param int max_age: seconds before this entry is no longer used, if
+                            it's shorter-lived than the others. It's
+                            refreshed in the background after half of that.
+        """
+        refresh_age = self.refresh_age
+        if max_age is None:
+            max_age = self.max_age
+        else:
+            refresh_age = min(refresh_age, max_age / 2)
+
+        cached = self.load(key)
+        if cached is not None:
+            age, data = cached
+            if age < max_age:
+                if age >= refresh_age:
+                    self._refresh(key, loader)
+                return data
+
+        data = loader()
+        self.save(key, data)
+        return data
+
+    def _refresh(self, key, loader):
+        """ Fetches and stores a new copy of an entry on a background
+            thread, unless that's already happening """
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            """ Thread target """
+            try:
+                self.save(key, loader())
+            except Exception as ex:  # pylint: disable=W0703
+                LOGGER.warning('Unable to refresh catalog cache entry %s: %s',
+                               key, ex)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        thread = threading.Thread(target=refresh)
+        # The refreshed copy is for later runs; exiting needn't wait for it
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def clear(self):
+        """ Removes every entry """
+        if not os.path.isdir(self.path):
+            return
+        for name in os.listdir(self.path):
+            if name.endswith('.json.gz'):
+                os.remove(os.path.join(self.path, name))
+
+
+class IdentifierIndex(object):
+    """ Resolves the hostnames, fully qualified domain names and IP addresses
+    of an account's CCIs and hardware to ids, without a query per identifier.
+
+    The first lookup of a kind of object ('guest', 'hardware') sweeps every
+    object of that kind, a page at a time with :data:`INDEX_MASK` as the
+    mask, and indexes them. The index is reused until it's older than ttl.
+    Identifiers which aren't in it are remembered as missing for
+    negative_ttl. Looking one up again after that sweeps again if the index
+    is older than negative_ttl, so that new objects are found without a
+    sweep for every unknown identifier.
+
+    A client given the index drops it whenever a mutating method (see
+    :data:`MUTATING_PREFIXES`) is called through it.
+
+    :param int ttl: seconds before the index is swept again
+    :param int negative_ttl: seconds a missing identifier is remembered for
+
+    Usage:
+
+        >>> import SoftLayer
+        >>> from SoftLayer.cache import IdentifierIndex
+        >>> client = SoftLayer.Client(identifier_index=IdentifierIndex())
+        >>> mgr = SoftLayer.CCIManager(client)
+        >>> mgr.resolve_many(['web01', 'db01.example.com', '10.0.0.5'])
+        {'web01': [1234], 'db01.example.com': [1235], '10.0.0.5': [1236]}
+
+    """
+    def __init__(self, ttl=300, negative_ttl=60):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.sweeps = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._sweep_locks = {}
+        self._generation = 0
+        # kind: (time swept, {index field: {lowercase value: [ids]}})
+        self._indexes = {}
+        # (kind, lowercase identifier, fields): time the entry expires
+        self._missing = {}
+
+    @staticmethod
+    def indexable(identifier):
+        """ Returns True if identifier can be looked up in the index. Query
+            operators and wildcards (see SoftLayer.utils.query_filter) need
+            the API. """
+        identifier = identifier.strip()
+        return bool(identifier) and '*' not in identifier \
+            and not identifier.startswith(tuple(KNOWN_OPERATIONS))
+
+    def lookup(self, kind, identifier, loader, fields=None):
+        """ Returns the ids of the objects of a kind matching identifier.
+
+        :param string kind: the kind of object, E.G.: 'guest'
+        :param string identifier: hostname, FQDN or IP address
+        :param loader: a callable which returns every object of the kind,
+                       with at least the properties in :data:`INDEX_MASK`
+        :param list fields: index fields to match, in order; the first one
+                            which matches wins. Defaults to all of them.
+        """
+        return self.lookup_many(kind, [identifier], loader, fields)[identifier]
+
+    def lookup_many(self, kind, identifiers, loader, fields=None):
+        """ Looks up several identifiers, sweeping at most once. Returns a
+            dict of the ids matching each identifier. See :meth:`lookup`
+            for the arguments. """
+        fields = tuple(fields or [name for name, _ in INDEX_FIELDS])
+        now = time.time()
+        swept, index = self._get_index(kind, loader, now)
+
+        found = {}
+        unknown = []
+        for identifier in identifiers:
+            ids = _match(index, identifier, fields)
+            if ids:
+                found[identifier] = ids
+            else:
+                unknown.append(identifier)
+
+        if unknown and now - swept >= self.negative_ttl:
+            with self._lock:
+                expired = [identifier for identifier in unknown
+                           if self._missing.get(
+                               (kind, identifier.lower(), fields), 0) <= now]
+            if expired:
+                swept, index = self._sweep(kind, loader, seen=swept)
+                for identifier in expired:
+                    ids = _match(index, identifier, fields)
+                    if ids:
+                        found[identifier] = ids
+
+        with self._lock:
+            for identifier in identifiers:
+                if identifier in found:
+                    self.hits += 1
+                    continue
+                self.misses += 1
+                found[identifier] = []
+                self._missing.setdefault(
+                    (kind, identifier.lower(), fields),
+                    now + self.negative_ttl)
+            # Drop expired entries so the negative cache can't grow forever
+            if len(self._missing) > 1000:
+                for key, expires in list(self._missing.items()):
+                    if expires <= now:
+                        del self._missing[key]
+        return found
+
+    def _get_index(self, kind, loader, now):
+        """ Returns the index of a kind, sweeping if there's no fresh one """
+        with self._lock:
+            entry = self._indexes.get(kind)
+        if entry is not None and now - entry[0] < self.ttl:
+            return entry
+        return self._sweep(kind, loader, seen=entry and entry[0])
+
+    def _sweep(self, kind, loader, seen=None):
+        """ Sweeps the objects of a kind and indexes them. If another thread
+            swept while this one waited, its index is used instead.
+
+        :param seen: the time of the sweep of the index the caller found
+                     stale
+        """
+        with self._lock:
+            sweep_lock = self._sweep_locks.setdefault(kind, threading.Lock())
+
+        with sweep_lock:
+            with self._lock:
+                entry = self._indexes.get(kind)
+                generation = self._generation
+            if entry is not None and entry[0] != seen:
+                return entry
+
+            swept = time.time()
+            index = dict((name, {}) for name, _ in INDEX_FIELDS)
+            for obj in loader():
+                for name, prop in INDEX_FIELDS:
+                    value = obj.get(prop)
+                    if value:
+                        index[name].setdefault(value.lower(), []).append(
+                            obj['id'])
+            entry = (swept, index)
+
+            with self._lock:
+                self.sweeps += 1
+                # Objects may have changed during the sweep if the index was
+                # invalidated meanwhile, so it's only used for this lookup
+                if generation == self._generation:
+                    self._indexes[kind] = entry
+                    for key in list(self._missing):
+                        if key[0] == kind:
+                            del self._missing[key]
+            return entry
+
+    def invalidate(self, kind=None):
+        """ Drops the index.
+
+        :param kind: only drop the index of this kind of object
+        """
+        with self._lock:
+            self._generation += 1
+            for key in list(self._indexes):
+                if kind is None or key == kind:
+                    del self._indexes[key]
+
+    def __call__(self, record):
+        """ Observes a client's calls (see SoftLayer.metrics.CallRecord) and
+            drops the index after any mutating call """
+        method = record.name.split('.', 1)[-1]
+        if has_method_prefix(method, MUTATING_PREFIXES):
+            self.invalidate()
+
+    def stats(self):
+        """ Returns the number of sweeps, identifiers found and identifiers
+            missing, and the number of objects indexed """
+        with self._lock:
+            return {
+                'sweeps': self.sweeps,
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': sum(len(ids)
+                            for _, index in self._indexes.values()
+                            for ids in index['hostname'].values()),
+            }
+
+
+def _match(index, identifier, fields):
+    """ Returns the ids an index has for identifier in the first of fields
+        which has any """
+    key = identifier.strip().lower()
+    for field in fields:
+        ids = index[field].get(key)
+        if ids:
+            return list(ids)
+    return []
+
+
+class PackageItemIndex(object):
+    """ Finds the items of a product package by category and capacity,
+    without fetching and scanning the whole package for every lookup.
+
+    The first lookup in a package fetches its items and indexes them by the
+    id and code of each of their categories and by their capacity. Items
+    with the same category and capacity are told apart by the qualifiers
+    (see :data:`ITEM_QUALIFIERS`) in their descriptions. The index is reused
+    until it's older than ttl.
+
+    :param int ttl: seconds before a package's items are fetched again
+
+    Usage:
+
+        >>> import SoftLayer
+        >>> from SoftLayer.cache import PackageItemIndex
+        >>> client = SoftLayer.Client(item_index=PackageItemIndex())
+        >>> mgr = SoftLayer.CCIManager(client)
+        >>> mgr.upgrade(1234, cpus=4)  # Fetches package 46
+        True
+        >>> mgr.upgrade(1235, memory=8)  # Uses the index
+        True
+
+    """
+    def __init__(self, ttl=3600):
+        self.ttl = ttl
+        self.loads = 0
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        # package id: (time loaded, {(category, capacity): [(qualifiers,
+        # item)]})
+        self._indexes = {}
+
+    def find(self, package_id, category, capacity, loader, include=(),
+             exclude=()):
+        """ Returns the first item of a package in a category with a
+            capacity, or None if there isn't one.
+
+        :param int package_id: the package to look in
+        :param category: a category id (E.G. 80) or code (E.G. 'global_ipv4')
+        :param capacity: the item's capacity, E.G. 4 or '4'
+        :param loader: a callable which returns every item of the package,
+                       with their capacity, description, categories and/or
+                       itemCategory
+        :param include: qualifiers the item's description must have
+        :param exclude: qualifiers the item's description must not have
+        """
+        include = frozenset(include)
+        exclude = frozenset(exclude)
+        index = self._get_index(package_id, loader)
+        for qualifiers, item in index.get((category, str(capacity)), []):
+            if include <= qualifiers and not exclude & qualifiers:
+                return item
+        return None
+
+    def _get_index(self, package_id, loader):
+        """ Returns the index of a package, loading it if there's no fresh
+            one. Threads wanting the same package wait for one load. """
+        with self._lock:
+            load_lock = self._load_locks.setdefault(package_id,
+                                                    threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                entry = self._indexes.get(package_id)
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                return entry[1]
+
+            loaded = time.time()
+            index = {}
+            for item in loader():
+                capacity = str(item.get('capacity'))
+                description = item.get('description') or ''
+                qualifiers = frozenset(qualifier
+                                       for qualifier in ITEM_QUALIFIERS
+                                       if qualifier in description)
+                categories = list(item.get('categories') or [])
+                if item.get('itemCategory'):
+                    categories.append(item['itemCategory'])
+
+                keys = []
+                for category in categories:
+                    for name in ['id', 'categoryCode']:
+                        key = (category.get(name), capacity)
+                        if key[0] is not None and key not in keys:
+                            keys.append(key)
+                for key in keys:
+                    index.setdefault(key, []).append((qualifiers, item))
+
+            with self._lock:
+                self.loads += 1
+                self._indexes[package_id] = (loaded, index)
+            return index
+
+    def invalidate(self, package_id=None):
+        """ Drops the index.
+
+        :param package_id: only drop the index of this package
+        """
+        with self._lock:
+            for key in list(self._indexes):
+                if package_id is None or key == package_id:
+                    del self._indexes[key]
+
+    def stats(self):
+        """ Returns the number of loads and of packages indexed """
+        with self._lock:
+            return {
+                'loads': self.loads,
+                'packages': len(self._indexes),
+            }
@@ -0,0 +1,292 @@
+"""
+    SoftLayer.cassette
+    ~~~~~~~~~~~~~~~~~~
+    Records HTTP exchanges with the API and replays them without a network
+
+    :license: MIT, see LICENSE for more details.
+"""
+import base64
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import logging
+import threading
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from six.moves.urllib.parse import urlparse
+
+from SoftLayer.exceptions import CassetteMiss
+from SoftLayer.utils import xmlrpc_client
+
+__all__ = ['Cassette', 'CassetteAdapter', 'request_key']
+
+LOGGER = logging.getLogger(__name__)
+
+# Headers which are never written to a cassette
+PRIVATE_HEADERS = ['authorization', 'cookie', 'proxy-authorization',
+                   'set-cookie']
+
+# Response headers which describe the body as it was sent over the wire. The
+# body is stored decoded, so these don't apply when it's replayed.
+ENCODING_HEADERS = ['content-encoding', 'content-length', 'transfer-encoding']
+
+
+def request_key(method, url, body=None):
+    """ Returns the key used to match a request to a recorded exchange.
+
+    The key is a hash of the HTTP method, the path of the URL and the body.
+    XML-RPC bodies are compared by method name and parameters, leaving out
+    the credentials, so exchanges recorded by one user can be replayed by
+    another (or with made up credentials) and against any endpoint.
+
+    :param string method: HTTP method: GET, POST, ...
+    :param string url: request URL
+    :param body: request body
+    """
+    parsed = urlparse(url)
+    path = parsed.path
+    if parsed.query:
+        path += '?' + parsed.query
+
+    content = body or b''
+    if content:
+        try:
+            params, name = xmlrpc_client.loads(content)
+            params = list(params)
+            if params and isinstance(params[0], dict) \
+                    and isinstance(params[0].get('headers'), dict):
+                headers = dict(params[0]['headers'])
+                headers.pop('authenticate', None)
+                params[0] = dict(params[0], headers=headers)
+            content = json.dumps([name, params], sort_keys=True, default=str)
+        except Exception:  # pylint: disable=W0703
+            pass
+
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+    digest = hashlib.sha1(method.upper().encode('utf-8'))
+    digest.update(path.encode('utf-8'))
+    digest.update(content)
+    return digest.hexdigest()
+
+
+class Cassette(object):
+    """ Records every HTTP exchange a client makes to a file, or replays
+        exchanges from that file without touching the network.
+
+    A cassette is a file with one JSON object per line, holding a hash of the
+    request (see :func:`request_key`), its HTTP headers, the response status,
+    headers and body and the time the exchange took. Credentials aren't
+    written. Paths ending in ``.gz`` are gzip compressed.
+
+    When replaying, identical requests get the recorded responses in the
+    order they were recorded in; once those run out the last one is repeated.
+    A request which wasn't recorded raises :class:`SoftLayer.CassetteMiss`.
+
+    :param string path: the cassette file
+    :param string mode: 'record' to (over)write the cassette or 'replay'
+    :param bool keep_latency: when replaying, wait as long as each exchange
+                              originally took before returning it
+
+    Usage:
+
+        >>> import SoftLayer
+        >>> from SoftLayer.cassette import Cassette
+        >>> with Cassette('guests.jsonl.gz', mode='record') as cassette:
+        ...     client = SoftLayer.Client(cassette=cassette)
+        ...     guests = list(client['Account'].getVirtualGuests(iter=True))
+        >>> client = SoftLayer.Client(
+        ...     cassette=Cassette('guests.jsonl.gz', keep_latency=True))
+        >>> guests == list(client['Account'].getVirtualGuests(iter=True))
+        True
+
+    """
+    def __init__(self, path, mode='replay', keep_latency=False):
+        if mode not in ('record', 'replay'):
+            raise ValueError("mode must be 'record' or 'replay'")
+        self.path = path
+        self.mode = mode
+        self.keep_latency = keep_latency
+        self._lock = threading.Lock()
+        self._file = None
+        self._exchanges = {}
+        self._played = {}
+        self._stats = {'recorded': 0, 'replayed': 0, 'missed': 0}
+        if mode == 'replay':
+            self.load()
+
+    def _open(self, file_mode):
+        """ Opens the cassette file """
+        if self.path.endswith('.gz'):
+            return gzip.open(self.path, file_mode)
+        return open(self.path, file_mode)
+
+    def load(self):
+        """ Reads the exchanges recorded in the cassette """
+        exchanges = {}
+        with self._open('rb') as cassette:
+            for line in cassette:
+                line = line.strip()
+                if not line:
+                    continue
+                exchange = json.loads(line.decode('utf-8'))
+                exchanges.setdefault(exchange['key'], []).append(exchange)
+
+        with self._lock:
+            self._exchanges = exchanges
+            self._played = {}
+        LOGGER.debug('Loaded %d exchanges from %s',
+                     sum(len(found) for found in exchanges.values()),
+                     self.path)
+
+    def adapter(self, adapter=None):
+        """ Returns a transport adapter which sends requests through this
+            cassette.
+
+        :param adapter: the requests adapter used to actually send requests
+                        while recording
+        """
+        return CassetteAdapter(self, adapter)
+
+    def record(self, request, response, elapsed):
+        """ Writes an exchange to the cassette and returns it.
+
+        :param request: the requests.PreparedRequest that was sent
+        :param response: the requests.Response, with its content read
+        :param float elapsed: seconds the exchange took
+        """
+        body = response.content or b''
+        exchange = {
+            'key': request_key(request.method, request.url, request.body),
+            'method': request.method,
+            'url': request.url,
+            'request_headers': _public_headers(request.headers),
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': _public_headers(response.headers,
+                                       exclude=ENCODING_HEADERS),
+            'elapsed': elapsed,
+        }
+        try:
+            exchange['body'] = body.decode('utf-8')
+        except UnicodeDecodeError:
+            exchange['body_base64'] = base64.b64encode(body).decode('ascii')
+
+        line = json.dumps(exchange, sort_keys=True) + '\n'
+        with self._lock:
+            if self._file is None:
+                self._file = self._open('wb')
+            self._file.write(line.encode('utf-8'))
+            self._file.flush()
+            self._stats['recorded'] += 1
+        return exchange
+
+    def play(self, request):
+        """ Returns the recorded exchange for a request.
+
+        :param request: the requests.PreparedRequest being sent
+        """
+        key = request_key(request.method, request.url, request.body)
+        with self._lock:
+            found = self._exchanges.get(key)
+            if not found:
+                self._stats['missed'] += 1
+                raise CassetteMiss('No recorded response for %s %s in %s'
+                                   % (request.method, request.url,
+                                      self.path))
+            index = self._played.get(key, 0)
+            self._played[key] = index + 1
+            self._stats['replayed'] += 1
+        return found[min(index, len(found) - 1)]
+
+    def stats(self):
+        """ Returns the number of exchanges recorded and replayed, and the
+            number of requests which weren't found when replaying """
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self):
+        """ Finishes writing the cassette """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __repr__(self):
+        return "<Cassette: %s (%s)>" % (self.path, self.mode)
+
+
+class CassetteAdapter(requests.adapters.BaseAdapter):
+    """ A requests transport adapter which records exchanges to (or replays
+        them from) a :class:`Cassette`.
+
+    :param cassette: the cassette
+    :param adapter: the adapter used to send requests while recording.
+                    Defaults to a new requests.adapters.HTTPAdapter.
+    """
+    def __init__(self, cassette, adapter=None):
+        super(CassetteAdapter, self).__init__()
+        self.cassette = cassette
+        self.adapter = adapter or requests.adapters.HTTPAdapter()
+
+    def send(self, request, stream=False, timeout=None, verify=True,
+             cert=None, proxies=None):
+        """ Sends (or replays) a request. Takes the same arguments as
+            requests.adapters.HTTPAdapter.send """
+        if self.cassette.mode == 'replay':
+            exchange = self.cassette.play(request)
+            if self.cassette.keep_latency:
+                time.sleep(exchange['elapsed'])
+            return self.build_response(request, exchange)
+
+        start = time.time()
+        response = self.adapter.send(request, stream=False, timeout=timeout,
+                                     verify=verify, cert=cert,
+                                     proxies=proxies)
+        # Reading the whole body makes the timing include the transfer
+        response.content  # pylint: disable=W0104
+        exchange = self.cassette.record(request, response,
+                                        time.time() - start)
+        return self.build_response(request, exchange)
+
+    def build_response(self, request, exchange):
+        """ Builds a requests.Response from a recorded exchange """
+        if 'body_base64' in exchange:
+            body = base64.b64decode(exchange['body_base64'])
+        else:
+            body = exchange['body'].encode('utf-8')
+
+        response = requests.Response()
+        response.status_code = exchange['status']
+        response.reason = exchange.get('reason')
+        response.headers = CaseInsensitiveDict(exchange['headers'])
+        response.headers['Content-Length'] = str(len(body))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = datetime.timedelta(seconds=exchange['elapsed'])
+        return response
+
+    def close(self):
+        """ Closes the connections of the recording adapter """
+        self.adapter.close()
+
+
+def _public_headers(headers, exclude=()):
+    """ Returns the headers which are safe to write to a cassette """
+    return dict((name, value) for name, value in headers.items()
+                if name.lower() not in PRIVATE_HEADERS
+                and name.lower() not in exclude)
@@ -22,6 +22,9 @@ def get_client_settings_args(**kwargs):
         'timeout': kwargs.get('timeout'),
         'auth': kwargs.get('auth'),
         'proxy': kwargs.get('proxy'),
+        'pool_connections': kwargs.get('pool_connections'),
+        'pool_maxsize': kwargs.get('pool_maxsize'),
+        'pool_idle_timeout': kwargs.get('pool_idle_timeout'),
     }
     username = kwargs.get('username')
     api_key = kwargs.get('api_key')
@@ -60,6 +63,9 @@ def get_client_settings_config_file(**kwargs):
         'endpoint_url': '',
         'timeout': '',
         'proxy': '',
+        'pool_connections': '',
+        'pool_maxsize': '',
+        'pool_idle_timeout': '',
     })
     config.read(config_files)
 
@@ -70,6 +76,9 @@ def get_client_settings_config_file(**kwargs):
         'endpoint_url': config.get('softlayer', 'endpoint_url'),
         'timeout': config.get('softlayer', 'timeout'),
         'proxy': config.get('softlayer', 'proxy'),
+        'pool_connections': config.get('softlayer', 'pool_connections'),
+        'pool_maxsize': config.get('softlayer', 'pool_maxsize'),
+        'pool_idle_timeout': config.get('softlayer', 'pool_idle_timeout'),
     }
     username = config.get('softlayer', 'username')
     api_key = config.get('softlayer', 'api_key')
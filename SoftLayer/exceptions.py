@@ -94,3 +94,23 @@ class InternalError(ServerError):
 class DNSZoneNotFound(SoftLayerError):
     """ DNS Zone was not found """
     pass
+
+
+class CircuitBreakerOpen(TransportError):
+    """ Calls to an endpoint are failing fast after repeated failures """
+    pass
+
+
+class CassetteMiss(SoftLayerError):
+    """ A request being replayed from a cassette was never recorded """
+    pass
+
+
+class WaitTimeout(SoftLayerError):
+    """ Objects being waited on weren't ready in time. Their ids are in
+        ``pending``. """
+    def __init__(self, pending, *args):
+        self.pending = list(pending)
+        SoftLayerError.__init__(
+            self, 'Not ready in time: %s'
+            % ', '.join(str(_id) for _id in self.pending), *args)
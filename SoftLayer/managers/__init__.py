@@ -5,20 +5,51 @@
     that provide a simpler interface to various services. These are
     higher-level interfaces to the SoftLayer API.
 
+    Each manager's module is only imported when the manager is first used.
+
     :license: MIT, see LICENSE for more details.
 """
-from SoftLayer.managers.cci import CCIManager
-from SoftLayer.managers.dns import DNSManager
-from SoftLayer.managers.firewall import FirewallManager
-from SoftLayer.managers.hardware import HardwareManager
-from SoftLayer.managers.image import ImageManager
-from SoftLayer.managers.messaging import MessagingManager
-from SoftLayer.managers.metadata import MetadataManager
-from SoftLayer.managers.network import NetworkManager
-from SoftLayer.managers.sshkey import SshKeyManager
-from SoftLayer.managers.ssl import SSLManager
-from SoftLayer.managers.ticket import TicketManager
+from importlib import import_module
+import sys
+
+# Module of each manager
+MANAGERS = {
+    'CCIManager': 'cci',
+    'DNSManager': 'dns',
+    'FirewallManager': 'firewall',
+    'HardwareManager': 'hardware',
+    'ImageManager': 'image',
+    'MessagingManager': 'messaging',
+    'MetadataManager': 'metadata',
+    'NetworkManager': 'network',
+    'SshKeyManager': 'sshkey',
+    'SSLManager': 'ssl',
+    'TicketManager': 'ticket',
+}
 
 __all__ = ['CCIManager', 'DNSManager', 'FirewallManager', 'HardwareManager',
            'ImageManager', 'MessagingManager', 'MetadataManager',
            'NetworkManager', 'SshKeyManager', 'SSLManager', 'TicketManager']
+
+
+def load_manager(name):
+    """ Imports a manager by its class name, E.G.: 'CCIManager' """
+    if name not in MANAGERS:
+        raise AttributeError("module %r has no attribute %r"
+                             % (__name__, name))
+    module = import_module('SoftLayer.managers.%s' % MANAGERS[name])
+    manager = getattr(module, name)
+    globals()[name] = manager
+    return manager
+
+
+# Python 3.7+ looks up missing module attributes with __getattr__; older
+# versions import every manager up front.
+__getattr__ = load_manager
+if sys.version_info < (3, 7):
+    for _name in __all__:
+        load_manager(_name)
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
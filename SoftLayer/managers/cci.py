@@ -6,17 +6,37 @@
     :license: MIT, see LICENSE for more details.
 """
 import socket
-from time import sleep
+from time import sleep, time
 import datetime
 from itertools import repeat
 
-from SoftLayer.utils import NestedDict, query_filter, IdentifierMixin, lookup
+from SoftLayer.cache import IdentifierIndex, PackageItemIndex, INDEX_MASK
+from SoftLayer.exceptions import SoftLayerError, WaitTimeout
+from SoftLayer.utils import (
+    NestedDict, query_filter, in_filter, IdentifierMixin, lookup)
 
 
 class CCIManager(IdentifierMixin, object):
-    """ Manage CCIs """
-    def __init__(self, client):
+    """
+    Manage CCIs
+
+    :param SoftLayer.API.Client client: an API client instance
+    :param SoftLayer.cache.IdentifierIndex identifier_index: an optional
+        index used to resolve hostnames and IP addresses. Defaults to the
+        client's ``identifier_index``.
+    :param SoftLayer.cache.PackageItemIndex item_index: an index of the
+        items upgrades are priced with. Defaults to the client's
+        ``item_index``, or one kept by this manager.
+    """
+    def __init__(self, client, identifier_index=None, item_index=None):
         self.client = client
+        if identifier_index is None:
+            identifier_index = getattr(client, 'identifier_index', None)
+        self.identifier_index = identifier_index
+        if item_index is None:
+            item_index = getattr(client, 'item_index', None) \
+                or PackageItemIndex()
+        self.item_index = item_index
         self.account = client['Account']
         self.guest = client['Virtual_Guest']
         self.resolvers = [self._get_ids_from_ip, self._get_ids_from_hostname]
@@ -84,10 +104,8 @@ class CCIManager(IdentifierMixin, object):
 
         _filter = NestedDict(kwargs.get('filter') or {})
         if tags:
-            _filter['virtualGuests']['tagReferences']['tag']['name'] = {
-                'operation': 'in',
-                'options': [{'name': 'data', 'value': tags}],
-            }
+            _filter['virtualGuests']['tagReferences']['tag']['name'] = \
+                in_filter(tags)
 
         if cpus:
             _filter['virtualGuests']['maxCpu'] = query_filter(cpus)
@@ -327,24 +345,7 @@ class CCIManager(IdentifierMixin, object):
         """
         for count, new_instance in enumerate(repeat(instance_id), start=1):
             instance = self.get_instance(new_instance)
-            last_reload = lookup(instance, 'lastOperatingSystemReload', 'id')
-            active_transaction = lookup(instance, 'activeTransaction', 'id')
-
-            reloading = all((
-                active_transaction,
-                last_reload,
-                last_reload == active_transaction
-            ))
-
-            # only check for outstanding transactions if requested
-            outstanding = False
-            if pending:
-                outstanding = active_transaction
-
-            # return True if the instance has only if the instance has
-            # finished provisioning and isn't currently reloading the OS.
-            if instance.get('provisionDate') \
-                    and not reloading and not outstanding:
+            if self._is_ready(instance, pending):
                 return True
 
             if count >= limit:
@@ -352,6 +353,88 @@ class CCIManager(IdentifierMixin, object):
 
             sleep(delay)
 
+    def wait_for_ready_many(self, instance_ids, limit, delay=1,
+                            pending=False, max_delay=30):
+        """ Waits for several CCIs to be ready (see :func:`wait_for_ready`)
+        and yields each id as soon as that CCI is ready.
+
+        Each check is a single Account.getVirtualGuests call, filtered to the
+        CCIs which aren't ready yet and fetching only what readiness depends
+        on. The time between checks starts at delay and grows by half after
+        each check where nothing became ready, up to max_delay. It's reset
+        to delay once something does.
+
+        :param list instance_ids: The IDs of the CCIs to wait for
+        :param int limit: The maximum number of seconds to wait.
+        :param int delay: The number of seconds to sleep before checks.
+                          Defaults to 1.
+        :param bool pending: Wait for pending transactions not related to
+                             provisioning or reloads such as monitoring.
+        :param int max_delay: The longest to sleep between checks.
+        :raises SoftLayer.WaitTimeout: if limit seconds pass with CCIs still
+                                       not ready. Their ids are in its
+                                       ``pending`` attribute.
+
+        Usage:
+
+            >>> for instance_id in mgr.wait_for_ready_many([1, 2, 3], 600):
+            ...     print('%s is ready' % instance_id)
+
+        """
+        remaining = []
+        for instance_id in instance_ids:
+            if instance_id not in remaining:
+                remaining.append(instance_id)
+
+        deadline = time() + limit
+        wait = delay
+        while remaining:
+            _filter = {'virtualGuests': {'id': in_filter(remaining)}}
+            instances = self.account.getVirtualGuests(
+                mask='id,provisionDate,activeTransaction.id,'
+                     'lastOperatingSystemReload.id',
+                filter=_filter)
+
+            ready = [instance['id'] for instance in instances
+                     if instance['id'] in remaining
+                     and self._is_ready(instance, pending)]
+            for instance_id in ready:
+                remaining.remove(instance_id)
+                yield instance_id
+            if not remaining:
+                return
+
+            time_left = deadline - time()
+            if time_left <= 0:
+                raise WaitTimeout(remaining)
+
+            if ready:
+                wait = delay
+            sleep(min(wait, time_left))
+            if not ready:
+                wait = min(wait * 1.5, max_delay)
+
+    @staticmethod
+    def _is_ready(instance, pending):
+        """ Returns True if a CCI has finished provisioning and isn't
+            reloading its OS (or, with pending, running any transaction) """
+        last_reload = lookup(instance, 'lastOperatingSystemReload', 'id')
+        active_transaction = lookup(instance, 'activeTransaction', 'id')
+
+        reloading = all((
+            active_transaction,
+            last_reload,
+            last_reload == active_transaction
+        ))
+
+        # only check for outstanding transactions if requested
+        outstanding = False
+        if pending:
+            outstanding = active_transaction
+
+        return bool(instance.get('provisionDate')) \
+            and not reloading and not outstanding
+
     def verify_create_instance(self, **kwargs):
         """ Verifies an instance creation command without actually placing an
         order. See :func:`create_instance` for a list of available
@@ -396,6 +479,94 @@ class CCIManager(IdentifierMixin, object):
         create_options = self._generate_create_dict(**kwargs)
         return self.guest.createObject(create_options)
 
+    def verify_create_instances(self, specs, max_workers=10):
+        """ Verifies several instance creation commands without placing an
+        order. The templates are verified concurrently, with one
+        generateOrderTemplate call each.
+
+        :param list specs: dicts of the options :func:`create_instance` takes
+        :param int max_workers: the most templates to verify at once
+
+        :returns: a list with, for each spec in order, the order template or
+                  the exception raised while building or verifying it
+        """
+        templates = self._generate_create_dicts(specs)
+        with self.client.batch(max_workers=max_workers) as batch:
+            verified = dict(
+                (index, batch['Virtual_Guest'].generateOrderTemplate(template))
+                for index, template in enumerate(templates)
+                if not isinstance(template, Exception))
+
+        results = []
+        for index, template in enumerate(templates):
+            if index in verified:
+                future = verified[index]
+                template = future.exception() or future.result()
+            results.append(template)
+        return results
+
+    def create_instances(self, specs, batch_size=10, verify=False,
+                         max_workers=10):
+        """ Creates several CCIs. Specs are grouped into createObjects calls
+        of up to batch_size CCIs, rather than one createObject call each.
+        A failed call fails every CCI in its group, but not the other
+        groups.
+
+        :param list specs: dicts of the options :func:`create_instance` takes
+        :param int batch_size: the most CCIs to create with one call
+        :param bool verify: verify each spec first (see
+                            :func:`verify_create_instances`). Specs which
+                            fail verification aren't created.
+        :param int max_workers: the most templates to verify at once
+
+        :returns: a list with, for each spec in order, the new CCI or the
+                  exception raised while building, verifying or creating it
+
+        Usage:
+
+            >>> specs = [dict(cpus=1, memory=1024, hourly=True,
+            ...               hostname='web%02d' % i, domain='example.com',
+            ...               os_code='UBUNTU_LATEST') for i in range(20)]
+            >>> for result in mgr.create_instances(specs, verify=True):
+            ...     if isinstance(result, Exception):
+            ...         print('failed: %s' % result)
+            ...     else:
+            ...         print('created %s' % result['id'])
+
+        """
+        templates = self._generate_create_dicts(specs)
+        results = list(templates)
+        if verify:
+            for index, verified in enumerate(
+                    self.verify_create_instances(specs, max_workers)):
+                if isinstance(verified, Exception):
+                    results[index] = verified
+
+        pending = [index for index, result in enumerate(results)
+                   if not isinstance(result, Exception)]
+        for start in range(0, len(pending), batch_size):
+            group = pending[start:start + batch_size]
+            try:
+                created = self.guest.createObjects(
+                    [templates[index] for index in group])
+            except SoftLayerError as ex:
+                created = repeat(ex)
+            for index, result in zip(group, created):
+                results[index] = result
+        return results
+
+    def _generate_create_dicts(self, specs):
+        """ Returns the createObject template for each spec, or the
+            ValueError (or TypeError, for unknown options) raised while
+            building it """
+        templates = []
+        for spec in specs:
+            try:
+                templates.append(self._generate_create_dict(**spec))
+            except (ValueError, TypeError) as ex:
+                templates.append(ex)
+        return templates
+
     def change_port_speed(self, instance_id, public, speed):
         """ Allows you to change the port speed of a CCI's NICs.
 
@@ -412,8 +583,36 @@ class CCIManager(IdentifierMixin, object):
 
         return func(speed, id=instance_id)
 
+    def resolve_many(self, identifiers):
+        """ Resolves several CCI identifiers: ids, hostnames, fully qualified
+            domain names or IP addresses. The identifier index answers all of
+            them with a single sweep of the account's CCIs; if there's no
+            index, one is made for this call.
+
+        :param list identifiers: identifying strings
+
+        :returns dict: the list of matching ids for each identifier
+        """
+        if self.identifier_index is None:
+            manager = CCIManager(self.client,
+                                 identifier_index=IdentifierIndex())
+            return manager.resolve_many(identifiers)
+        return super(CCIManager, self).resolve_many(identifiers)
+
+    def _list_identifiers(self):
+        """ Iterates over every CCI, with only the properties the identifier
+            index needs """
+        return self.account.getVirtualGuests(mask=INDEX_MASK, iter=True,
+                                             chunk=500)
+
     def _get_ids_from_hostname(self, hostname):
         """ List CCI ids which match the given hostname """
+        if self.identifier_index is not None \
+                and self.identifier_index.indexable(hostname):
+            return self.identifier_index.lookup(
+                'guest', hostname, self._list_identifiers,
+                fields=['hostname', 'fqdn'])
+
         results = self.list_instances(hostname=hostname, mask="id")
         return [result['id'] for result in results]
 
@@ -425,6 +624,11 @@ class CCIManager(IdentifierMixin, object):
         except socket.error:
             return []
 
+        if self.identifier_index is not None:
+            return self.identifier_index.lookup(
+                'guest', ip_address, self._list_identifiers,
+                fields=['public_ip', 'private_ip'])
+
         # Find the CCI via ip address. First try public ip, then private
         results = self.list_instances(public_ip=ip_address, mask="id")
         if results:
@@ -503,18 +707,16 @@ class CCIManager(IdentifierMixin, object):
         :param int memory: RAM of the CCI to be upgraded to.
         :param int nic_speed: The port speed to set
         """
-        package_items = self._get_package_items()
         item_id = []
         if cpus:
             item_id.append({'id': self._get_item_id_for_upgrade(
-                            package_items, 'cpus', cpus, public)})
+                            'cpus', cpus, public)})
         if memory:
             item_id.append({'id': self._get_item_id_for_upgrade(
-                            package_items, 'memory', memory)})
+                            'memory', memory)})
         if nic_speed:
             item_id.append({'id': self._get_item_id_for_upgrade(
-                            package_items, 'nic_speed',
-                            nic_speed)})
+                            'nic_speed', nic_speed)})
         order = {}
         order['complexType'] = \
             'SoftLayer_Container_Product_Order_Virtual_Guest_Upgrade'
@@ -536,28 +738,25 @@ class CCIManager(IdentifierMixin, object):
         package = self.client['Product_Package']
         return package.getItems(id=46, mask=mask)
 
-    def _get_item_id_for_upgrade(self, package_items, option, value,
-                                 public=True):
+    def _get_item_id_for_upgrade(self, option, value, public=True):
         """
-        Find the item ids for the parameters you want to upgrade to.
-        :param list package_items: Contains all the items related to an CCI
+        Find the item ids for the parameters you want to upgrade to. The
+        package's items are indexed once and reused by later upgrades.
         :param string option: Describes type of parameter to be upgraded
         :param int value: The value of the parameter to be upgraded
         :param bool public: CPU will be in Private/Public Node.
         """
         cci_id = {'memory': 3, 'cpus': 80, 'nic_speed': 26}
-        for item in package_items:
-            for j in range(len(item['categories'])):
-                if not (item['categories'][j]['id'] == cci_id[option] and
-                        item['capacity'] == str(value)):
-                    continue
-                if option == 'cpus':
-                    if public and ('Private' not in item['description']):
-                        return item['prices'][0]['id']
-                    elif not public and ('Private' in item['description']):
-                        return item['prices'][0]['id']
-                elif option == 'nic_speed':
-                    if 'Public' in item['description']:
-                        return item['prices'][0]['id']
-                else:
-                    return item['prices'][0]['id']
+        qualifiers = {}
+        if option == 'cpus':
+            if public:
+                qualifiers['exclude'] = ['Private']
+            else:
+                qualifiers['include'] = ['Private']
+        elif option == 'nic_speed':
+            qualifiers['include'] = ['Public']
+
+        item = self.item_index.find(46, cci_id[option], value,
+                                    self._get_package_items, **qualifiers)
+        if item:
+            return item['prices'][0]['id']
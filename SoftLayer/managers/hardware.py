@@ -7,8 +7,23 @@
 """
 # Invalid names are ignored due to long method names and short argument names
 # pylint: disable=C0103
+import calendar
 import socket
-from SoftLayer.utils import NestedDict, query_filter, IdentifierMixin
+from datetime import datetime
+from time import sleep, time
+
+from SoftLayer.cache import IdentifierIndex, INDEX_MASK, catalog_key
+from SoftLayer.exceptions import SoftLayerAPIError, TransportError, \
+    WaitTimeout
+from SoftLayer.utils import (
+    NestedDict, query_filter, in_filter, IdentifierMixin, lookup)
+
+# Seconds the dedicated server package list is kept for
+PACKAGE_LIST_TTL = 600
+
+# Faults returned by endpoints which can't apply an object filter
+FILTER_FAULTS = ('SoftLayer_Exception_ObjectFilter',
+                 'SoftLayer_Exception_InvalidObjectFilter')
 
 
 class HardwareManager(IdentifierMixin, object):
@@ -16,10 +31,23 @@ class HardwareManager(IdentifierMixin, object):
     Manages hardware devices.
 
     :param SoftLayer.API.Client client: an API client instance
+    :param SoftLayer.cache.CatalogCache catalog_cache: an optional on-disk
+        cache for product package data. Defaults to the client's
+        ``catalog_cache``.
+    :param SoftLayer.cache.IdentifierIndex identifier_index: an optional
+        index used to resolve hostnames and IP addresses. Defaults to the
+        client's ``identifier_index``.
     """
 
-    def __init__(self, client):
+    def __init__(self, client, catalog_cache=None, identifier_index=None):
         self.client = client
+        if catalog_cache is None:
+            catalog_cache = getattr(client, 'catalog_cache', None)
+        self.catalog_cache = catalog_cache
+        if identifier_index is None:
+            identifier_index = getattr(client, 'identifier_index', None)
+        self.identifier_index = identifier_index
+        self._dedicated_packages = None
         self.hardware = self.client['Hardware_Server']
         self.account = self.client['Account']
         self.resolvers = [self._get_ids_from_ip, self._get_ids_from_hostname]
@@ -117,10 +145,8 @@ class HardwareManager(IdentifierMixin, object):
 
         _filter = NestedDict(kwargs.get('filter') or {})
         if tags:
-            _filter['hardware']['tagReferences']['tag']['name'] = {
-                'operation': 'in',
-                'options': [{'name': 'data', 'value': tags}],
-            }
+            _filter['hardware']['tagReferences']['tag']['name'] = \
+                in_filter(tags)
 
         if cpus:
             _filter['hardware']['processorPhysicalCoreAmount'] = \
@@ -166,8 +192,9 @@ class HardwareManager(IdentifierMixin, object):
            The information for ordering bare metal instances comes from
            multiple API calls. In order to make the process easier, this
            function will make those calls and reformat the results into a
-           dictionary that's easier to manage. It's recommended that you cache
-           these results with a reasonable lifetime for performance reasons.
+           dictionary that's easier to manage. Pass a
+           :class:`SoftLayer.cache.CatalogCache` to the manager to keep these
+           results on disk between runs.
         """
         hw_id = self._get_bare_metal_package_id()
 
@@ -182,27 +209,58 @@ class HardwareManager(IdentifierMixin, object):
 
         :returns: A list of tuples of available dedicated server packages in
                   the form (id, name, description)
-        """
 
-        # Note - This currently returns a hard coded list until the API is
+        The list is kept by the manager, and in its catalog cache if it has
+        one, for :data:`PACKAGE_LIST_TTL` seconds.
+        """
+        now = time()
+        if self._dedicated_packages is not None \
+                and now - self._dedicated_packages[0] < PACKAGE_LIST_TTL:
+            packages = self._dedicated_packages[1]
+        else:
+            if self.catalog_cache is None:
+                packages = self._fetch_dedicated_server_packages()
+            else:
+                packages = self.catalog_cache.fetch(
+                    catalog_key(self.client, 'dedicated_server_packages'),
+                    self._fetch_dedicated_server_packages,
+                    max_age=PACKAGE_LIST_TTL)
+            self._dedicated_packages = (now, packages)
+
+        return [(package['id'], package['name'], package.get('description'))
+                for package in packages]
+
+    def _fetch_dedicated_server_packages(self):
+        """ Fetches the dedicated server packages with one filtered call, or
+            one call per package if the filtered call fails """
+        # Note - This currently uses a hard coded list until the API is
         # updated to allow filtering on packages to just those for ordering
         # servers.
         package_ids = [13, 15, 23, 25, 26, 27, 29, 32, 41, 42, 43, 44, 49, 51,
                        52, 53, 54, 55, 56, 57, 126, 140, 141, 142, 143, 144,
                        145, 146, 147, 148, 158]
 
-        package_obj = self.client['Product_Package']
-        packages = []
-
-        for package_id in package_ids:
-            package = package_obj.getObject(id=package_id,
-                                            mask='mask[id, name, description]')
-
-            if package.get('name'):
-                packages.append((package['id'], package['name'],
-                                 package['description']))
-
-        return packages
+        mask = 'mask[id, name, description]'
+        try:
+            found = self.client['Product_Package'].getAllObjects(
+                mask=mask, filter={'id': in_filter(package_ids)})
+        except SoftLayerAPIError as ex:
+            # Endpoints which reject the filter are asked for each package,
+            # concurrently. Other errors, like a bad API key, would only
+            # happen again for every package.
+            if isinstance(ex, TransportError) \
+                    or not str(ex.faultCode).startswith(FILTER_FAULTS):
+                raise
+            with self.client.batch() as batch:
+                package_obj = batch['Product_Package']
+                results = [package_obj.getObject(id=package_id, mask=mask)
+                           for package_id in package_ids]
+            found = [result.result() for result in results]
+
+        # Kept in the order of package_ids, whatever order they came in
+        by_id = dict((package['id'], package) for package in found)
+        return [by_id[package_id] for package_id in package_ids
+                if by_id.get(package_id, {}).get('name')]
 
     def get_dedicated_server_create_options(self, package_id):
         """ Retrieves the available options for creating a dedicated server in
@@ -220,8 +278,8 @@ class HardwareManager(IdentifierMixin, object):
            The information for ordering dedicated servers comes from multiple
            API calls. In order to make the process simpler, this function will
            make those calls and reformat the results into a dictionary that's
-           easier to manage. It's recommended that you cache these results with
-           a reasonable lifetime for performance reasons.
+           easier to manage. Pass a :class:`SoftLayer.cache.CatalogCache` to
+           the manager to keep these results on disk between runs.
         """
         return self._parse_package_data(package_id)
 
@@ -291,6 +349,37 @@ class HardwareManager(IdentifierMixin, object):
         return self.hardware.reloadOperatingSystem('FORCE', config,
                                                    id=hardware_id)
 
+    def tracker(self, **kwargs):
+        """ Returns a :class:`HardwareTracker` which watches servers being
+            provisioned or reloaded. Takes the same arguments as
+            HardwareTracker, besides the manager. """
+        return HardwareTracker(self, **kwargs)
+
+    def wait_for_ready(self, hardware_id, limit, delay=10, pending=False,
+                       reload=False):
+        """ Waits for a server to finish provisioning (and reloading its
+        OS, if it's doing that).
+
+        :param int hardware_id: The ID of the server
+        :param int limit: The maximum number of seconds to wait.
+        :param int delay: The number of seconds to sleep before checks.
+                          Defaults to 10.
+        :param bool pending: Also wait for transactions unrelated to
+                             provisioning or reloads, such as monitoring.
+        :param bool reload: Only count the server as ready once an OS reload
+                            has been seen running, E.G. right after
+                            :func:`reload`.
+        :returns bool: whether the server is ready
+        """
+        tracker = self.tracker(delay=delay, pending=pending)
+        tracker.track(hardware_id, reload=reload)
+        try:
+            for _ in tracker.watch(limit):
+                pass
+        except WaitTimeout:
+            return False
+        return True
+
     def change_port_speed(self, hardware_id, public, speed):
         """ Allows you to change the port speed of a server's NICs.
 
@@ -556,6 +645,14 @@ class HardwareManager(IdentifierMixin, object):
 
     def _get_bare_metal_package_id(self):
         """ Return the bare metal package id """
+        if self.catalog_cache is None:
+            return self._fetch_bare_metal_package_id()
+        return self.catalog_cache.fetch(
+            catalog_key(self.client, 'bare_metal_package_id'),
+            self._fetch_bare_metal_package_id)
+
+    def _fetch_bare_metal_package_id(self):
+        """ Looks up the bare metal package id from the API """
         packages = self.client['Product_Package'].getAllObjects(
             mask='mask[id, name]',
             filter={'name': query_filter('Bare Metal Instance')})
@@ -568,8 +665,36 @@ class HardwareManager(IdentifierMixin, object):
 
         return hw_id
 
+    def resolve_many(self, identifiers):
+        """ Resolves several hardware identifiers: ids, hostnames, fully
+            qualified domain names or IP addresses. The identifier index
+            answers all of them with a single sweep of the account's
+            hardware; if there's no index, one is made for this call.
+
+        :param list identifiers: identifying strings
+
+        :returns dict: the list of matching ids for each identifier
+        """
+        if self.identifier_index is None:
+            manager = HardwareManager(self.client,
+                                      catalog_cache=self.catalog_cache,
+                                      identifier_index=IdentifierIndex())
+            return manager.resolve_many(identifiers)
+        return super(HardwareManager, self).resolve_many(identifiers)
+
+    def _list_identifiers(self):
+        """ Iterates over every server, with only the properties the
+            identifier index needs """
+        return self.account.getHardware(mask=INDEX_MASK, iter=True, chunk=500)
+
     def _get_ids_from_hostname(self, hostname):
         """ Returns list of matching hardware IDs for a given hostname """
+        if self.identifier_index is not None \
+                and self.identifier_index.indexable(hostname):
+            return self.identifier_index.lookup(
+                'hardware', hostname, self._list_identifiers,
+                fields=['hostname', 'fqdn'])
+
         results = self.list_hardware(hostname=hostname, mask="id")
         return [result['id'] for result in results]
 
@@ -581,6 +706,11 @@ class HardwareManager(IdentifierMixin, object):
         except socket.error:
             return []
 
+        if self.identifier_index is not None:
+            return self.identifier_index.lookup(
+                'hardware', ip, self._list_identifiers,
+                fields=['public_ip', 'private_ip'])
+
         # Find the server via ip address. First try public ip, then private
         results = self.list_hardware(public_ip=ip, mask="id")
         if results:
@@ -632,19 +762,35 @@ class HardwareManager(IdentifierMixin, object):
         Your code can rely upon each of those elements always being present.
         Each list will contain at least one entry as well, though most will
         contain more than one.
-        """
-        package = self.client['Product_Package']
 
+        When the manager has a catalog cache, results are read from it and
+        only fetched from the API when the cached copy is missing or too old.
+        """
+        if self.catalog_cache is None:
+            return self._fetch_package_data(package_id)
+        return self.catalog_cache.fetch(
+            catalog_key(self.client, 'package_%s' % package_id),
+            lambda: self._fetch_package_data(package_id))
+
+    def _fetch_package_data(self, package_id):
+        """ Makes the API calls for :func:`_parse_package_data` """
         results = {
             'categories': {},
             'locations': []
         }
 
+        # The three calls below don't depend on each other, so they're made
+        # concurrently.
+        with self.client.batch() as batch:
+            package = batch['Product_Package']
+            regions = package.getRegions(id=package_id)
+            configuration = package.getConfiguration(
+                id=package_id, mask='mask[itemCategory[group]]')
+            categories = package.getCategories(id=package_id)
+
         # First pull the list of available locations. We do it with the
         # getObject() call so that we get access to the delivery time info.
-        object_data = package.getRegions(id=package_id)
-
-        for loc in object_data:
+        for loc in regions.result():
             details = loc['location']['locationPackageDetails'][0]
 
             results['locations'].append({
@@ -653,9 +799,7 @@ class HardwareManager(IdentifierMixin, object):
                 'long_name': loc['description'],
             })
 
-        mask = 'mask[itemCategory[group]]'
-
-        for config in package.getConfiguration(id=package_id, mask=mask):
+        for config in configuration.result():
             code = config['itemCategory']['categoryCode']
             group = NestedDict(config['itemCategory']) or {}
             category = {
@@ -670,7 +814,7 @@ class HardwareManager(IdentifierMixin, object):
             results['categories'][code] = category
 
         # Now pull in the available package item
-        for category in package.getCategories(id=package_id):
+        for category in categories.result():
             code = category['categoryCode']
             items = []
 
@@ -728,6 +872,262 @@ class HardwareManager(IdentifierMixin, object):
         return self.hardware.editObject(obj, id=hardware_id)
 
 
+class TrackedServer(object):
+    """ A server followed by a :class:`HardwareTracker`.
+
+    :ivar id: the server's id. None while it's an order which hasn't been
+              fulfilled yet.
+    :ivar order_id: the id of the order which created the server, if it's
+                    tracked by order
+    :ivar state: one of HardwareTracker.STATES. None until the first check.
+    :ivar server: the server as returned by the last check
+    :ivar expect_reload: whether it still waits for an OS reload
+    :ivar reload_id: the id of its last OS reload at the first check
+    :ivar started: when it started waiting for an OS reload
+    """
+    def __init__(self, hardware_id=None, order_id=None, reload=False):
+        self.id = hardware_id  # pylint: disable=C0103
+        self.order_id = order_id
+        self.state = None
+        self.server = {}
+        self.expect_reload = reload
+        self.reload_id = None
+        self.started = None
+        self.quantity = 1
+        if hardware_id is None:
+            self.state = HardwareTracker.ORDERED
+
+    def __str__(self):
+        if self.id is None:
+            return 'order %s' % self.order_id
+        return str(self.id)
+
+    def __repr__(self):
+        return '<TrackedServer %s: %s>' % (self, self.state)
+
+
+class HardwareTracker(object):
+    """ Watches servers being ordered, provisioned or reloaded.
+
+    However many servers are tracked, each check is at most two
+    Account.getHardware calls with a minimal mask: one for the servers being
+    tracked by id, filtered to those which aren't ready, and one for orders
+    which haven't turned into servers yet. Servers go from 'ordered' to
+    'provisioning' (no provision date yet), possibly 'reloading' (an OS
+    reload is the active transaction) and then 'ready'. With pending, any
+    active transaction counts as 'busy' instead of ready.
+
+    The time between checks starts at delay and grows by half after each
+    check where nothing changed, up to max_delay. It's reset to delay once
+    something does.
+
+    :param manager: the HardwareManager whose client makes the calls
+    :param int delay: seconds to sleep between the first checks
+    :param int max_delay: the longest to sleep between checks
+    :param bool pending: wait for transactions unrelated to provisioning and
+                         reloads too, such as monitoring
+
+    Usage:
+
+        >>> tracker = HardwareManager(client).tracker()
+        >>> tracker.track_order(mgr.place_order(**options)['orderId'])
+        >>> tracker.track(1234, reload=True)
+        >>> tracker.on_change(lambda server, old: print(server, server.state))
+        >>> for server in tracker.watch(limit=7200):
+        ...     if server.state == 'ready':
+        ...         print('%s is ready' % server.server['hostname'])
+
+    """
+    ORDERED = 'ordered'
+    PROVISIONING = 'provisioning'
+    RELOADING = 'reloading'
+    BUSY = 'busy'
+    READY = 'ready'
+    STATES = [ORDERED, PROVISIONING, RELOADING, BUSY, READY]
+
+    MASK = ('id,hostname,provisionDate,activeTransaction.id,'
+            'lastOperatingSystemReload.id,'
+            'lastOperatingSystemReload.statusChangeDate,'
+            'billingItem.orderItem.order.id')
+
+    def __init__(self, manager, delay=10, max_delay=120, pending=False):
+        self.account = manager.account
+        self.delay = delay
+        self.max_delay = max_delay
+        self.pending = pending
+        self.servers = {}
+        self.orders = {}
+        self._callbacks = []
+
+    def track(self, hardware_id, reload=False):
+        """ Starts tracking a server.
+
+        :param int hardware_id: the server's id
+        :param bool reload: only count the server as ready once an OS reload
+                            has been seen running or has finished since,
+                            E.G. right after :func:`HardwareManager.reload`
+        :returns: the :class:`TrackedServer`
+        """
+        tracked = self.servers.get(hardware_id)
+        if tracked is None:
+            tracked = self.servers[hardware_id] = TrackedServer(
+                hardware_id, reload=reload)
+            if reload:
+                tracked.started = time()
+        return tracked
+
+    def track_order(self, order_id, quantity=1):
+        """ Starts tracking the servers an order creates. Until they all show
+            up on the account the order is tracked in the 'ordered' state.
+
+        :param int order_id: the orderId returned by
+                             :func:`HardwareManager.place_order`
+        :param int quantity: the number of servers the order creates
+        :returns: the :class:`TrackedServer` standing in for the order
+        """
+        tracked = self.orders.get(order_id)
+        if tracked is None:
+            tracked = self.orders[order_id] = TrackedServer(order_id=order_id)
+            tracked.quantity = quantity
+        return tracked
+
+    def on_change(self, callback):
+        """ Registers a callable which is passed the :class:`TrackedServer`
+            and its previous state whenever a server changes state """
+        self._callbacks.append(callback)
+
+    def waiting(self):
+        """ Returns the tracked servers and orders which aren't ready """
+        return [tracked for tracked in
+                list(self.orders.values()) + list(self.servers.values())
+                if tracked.state != self.READY]
+
+    def check(self):
+        """ Checks every server which isn't ready once. Returns the servers
+            which changed state, after passing each one to the callbacks. """
+        changed = []
+
+        hardware_ids = [tracked.id for tracked in self.servers.values()
+                        if tracked.state != self.READY]
+        if hardware_ids:
+            servers = self.account.getHardware(
+                mask=self.MASK,
+                filter={'hardware': {'id': in_filter(hardware_ids)}})
+            for server in servers:
+                tracked = self.servers.get(server['id'])
+                if tracked is not None and self._update(tracked, server):
+                    changed.append(tracked)
+
+        if self.orders:
+            _filter = {'hardware': {'billingItem': {'orderItem': {'order': {
+                'id': in_filter(self.orders)}}}}}
+            servers = self.account.getHardware(mask=self.MASK, filter=_filter)
+            for server in servers:
+                order_id = lookup(server, 'billingItem', 'orderItem', 'order',
+                                  'id')
+                if order_id not in self.orders \
+                        or server['id'] in self.servers:
+                    continue
+                tracked = self.servers[server['id']] = TrackedServer(
+                    server['id'], order_id=order_id)
+                tracked.state = self.ORDERED
+                if self._update(tracked, server):
+                    changed.append(tracked)
+
+            # Orders are followed by server id once all their servers show up
+            for order_id, tracked in list(self.orders.items()):
+                found = [server for server in self.servers.values()
+                         if server.order_id == order_id]
+                if len(found) >= tracked.quantity:
+                    del self.orders[order_id]
+
+        return changed
+
+    def watch(self, limit):
+        """ Checks until every server is ready, yielding each
+            :class:`TrackedServer` which changes state.
+
+        :param int limit: The maximum number of seconds to wait.
+        :raises SoftLayer.WaitTimeout: if limit seconds pass with servers
+                                       still not ready. Its ``pending``
+                                       attribute lists them.
+        """
+        deadline = time() + limit
+        wait = self.delay
+        while True:
+            changed = self.check()
+            for tracked in changed:
+                yield tracked
+
+            waiting = self.waiting()
+            if not waiting:
+                return
+
+            time_left = deadline - time()
+            if time_left <= 0:
+                raise WaitTimeout(waiting)
+
+            if changed:
+                wait = self.delay
+            sleep(min(wait, time_left))
+            if not changed:
+                wait = min(wait * 1.5, self.max_delay)
+
+    def _update(self, tracked, server):
+        """ Records the latest copy of a server. Returns True (after calling
+            the callbacks) if its state changed. """
+        tracked.server = server
+        state = self._state(tracked, server)
+        if state == tracked.state:
+            return False
+
+        old_state, tracked.state = tracked.state, state
+        for callback in self._callbacks:
+            callback(tracked, old_state)
+        return True
+
+    def _state(self, tracked, server):
+        """ Returns the state a server is in """
+        if not server.get('provisionDate'):
+            return self.PROVISIONING
+
+        last_reload = lookup(server, 'lastOperatingSystemReload', 'id')
+        active_transaction = lookup(server, 'activeTransaction', 'id')
+        if active_transaction and active_transaction == last_reload:
+            tracked.expect_reload = False
+            return self.RELOADING
+        if tracked.expect_reload:
+            if tracked.state is None:
+                tracked.reload_id = last_reload
+            # The reload may have run entirely between two checks
+            finished = _timestamp(lookup(server, 'lastOperatingSystemReload',
+                                         'statusChangeDate'))
+            if not active_transaction and (
+                    last_reload != tracked.reload_id
+                    or (finished and finished > tracked.started)):
+                tracked.expect_reload = False
+        if tracked.expect_reload:
+            # The reload hasn't started yet
+            return self.BUSY
+        if active_transaction and self.pending:
+            return self.BUSY
+        return self.READY
+
+
+def _timestamp(value):
+    """ Returns the seconds since the epoch of an API date such as
+        2013-08-01T15:23:45-06:00, or None if there's no date """
+    if not value:
+        return None
+    date, offset = value[:19], value[19:].replace(':', '')
+    seconds = calendar.timegm(
+        datetime.strptime(date, '%Y-%m-%dT%H:%M:%S').timetuple())
+    if offset and offset != 'Z':
+        sign = -1 if offset[0] == '-' else 1
+        seconds -= sign * (int(offset[1:3]) * 3600 + int(offset[3:5]) * 60)
+    return seconds
+
+
 def get_default_value(package_options, category, hourly=False):
     """ Returns the default price ID for the specified category.
 
@@ -64,10 +64,16 @@ class MetadataManager(object):
         :param string path: path to the specific metadata resource
         """
         url = '/'.join([self.url, 'SoftLayer_Resource_Metadata', path])
+        extra = {}
+        pool = getattr(self.client, 'connection_pool', None)
+        if pool is not None:
+            # Shares the client's connections (and cassette, if it has one)
+            extra['session'] = pool.get_session()
         try:
             return make_rest_api_call('GET', url,
                                       http_headers={'User-Agent': USER_AGENT},
-                                      timeout=self.timeout)
+                                      timeout=self.timeout,
+                                      **extra)
         except SoftLayerAPIError as ex:
             if ex.faultCode == 404:
                 return None
@@ -6,7 +6,8 @@
     :license: MIT, see LICENSE for more details.
 """
 
-from SoftLayer.utils import NestedDict, query_filter, resolve_ids, lookup
+from SoftLayer.cache import PackageItemIndex
+from SoftLayer.utils import NestedDict, query_filter, resolve_ids
 
 DEFAULT_SUBNET_MASK = ','.join(['hardware',
                                 'datacenter',
@@ -23,9 +24,19 @@ DEFAULT_VLAN_MASK = ','.join(['firewallInterfaces',
 
 
 class NetworkManager(object):
-    """ Manage Networks """
-    def __init__(self, client):
+    """ Manage Networks
+
+    :param SoftLayer.API.Client client: an API client instance
+    :param SoftLayer.cache.PackageItemIndex item_index: an index of the
+        items subnets are ordered with. Defaults to the client's
+        ``item_index``, or one kept by this manager.
+    """
+    def __init__(self, client, item_index=None):
         self.client = client
+        if item_index is None:
+            item_index = getattr(client, 'item_index', None) \
+                or PackageItemIndex()
+        self.item_index = item_index
         self.account = client['Account']
         self.vlan = client['Network_Vlan']
         self.subnet = client['Network_Subnet']
@@ -52,7 +63,6 @@ class NetworkManager(object):
         :param int version: 4 for IPv4, 6 for IPv6
         :param bool test_order: If true, this will only verify the order.
         """
-        package = self.client['Product_Package']
         category = 'sov_sec_ip_addresses_priv'
         desc = ''
         if version == 4:
@@ -71,19 +81,12 @@ class NetworkManager(object):
                 desc = 'Portable'
 
         # In the API, every non-server item is contained within package ID 0.
-        # This means that we need to get all of the items and loop through them
-        # looking for the items we need based upon the category, quantity, and
-        # item description.
-        price_id = None
-        quantity_str = str(quantity)
-        for item in package.getItems(id=0, mask='itemCategory'):
-            category_code = lookup(item, 'itemCategory', 'categoryCode')
-            if all([category_code == category,
-                    item.get('capacity') == quantity_str,
-                    version == 4 or (version == 6 and
-                                     desc in item['description'])]):
-                price_id = item['prices'][0]['id']
-                break
+        # Its items are indexed by category and quantity the first time a
+        # subnet is ordered, and the index is reused for later orders.
+        item = self.item_index.find(
+            0, category, quantity, self._get_subnet_items,
+            include=[desc] if desc else [])
+        price_id = item and item['prices'][0]['id']
 
         if not price_id:
             raise TypeError('Invalid combination specified for ordering a'
@@ -106,6 +109,11 @@ class NetworkManager(object):
         else:
             return self.client['Product_Order'].placeOrder(order)
 
+    def _get_subnet_items(self):
+        """ Returns every item of package 0, which subnets are ordered from """
+        return self.client['Product_Package'].getItems(id=0,
+                                                       mask='itemCategory')
+
     def assign_global_ip(self, global_ip_id, target):
         """ Assigns a global IP address to a specified target.
 
@@ -0,0 +1,318 @@
+"""
+    SoftLayer.metrics
+    ~~~~~~~~~~~~~~~~~
+    Instrumentation for API calls
+
+    :license: MIT, see LICENSE for more details.
+"""
+from collections import deque
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from SoftLayer.utils import short_service_name
+
+__all__ = ['CallRecord', 'Histogram', 'MetricsRecorder', 'LoggingObserver']
+
+LOGGER = logging.getLogger(__name__)
+
+PHASES = ['duration', 'serialize_time', 'network_time', 'decode_time']
+QUANTILES = [0.5, 0.95, 0.99]
+
+
+class CallRecord(object):
+    """ Everything measured about a single API call. Observers get one of
+        these after every call made through a client.
+
+    :ivar name: 'Service.method'
+    :ivar start: time the call was made at
+    :ivar duration: seconds the whole call took
+    :ivar serialize_time: seconds spent encoding the request
+    :ivar network_time: seconds spent sending the request and receiving the
+                        response
+    :ivar decode_time: seconds spent decoding the response
+    :ivar request_bytes: size of the request body
+    :ivar response_bytes: size of the response body
+    :ivar status: HTTP status of the response
+    :ivar retries: number of times the call was retried
+    :ivar cache_hit: True if the result came from the response cache
+    :ivar coalesced: True if the result was shared by an identical call
+    :ivar error: name of the exception raised by the call, if any
+
+    Timings, sizes and the status are None when the call didn't reach the
+    network.
+    """
+    __slots__ = ['name', 'start', 'duration', 'serialize_time',
+                 'network_time', 'decode_time', 'request_bytes',
+                 'response_bytes', 'status', 'retries', 'cache_hit',
+                 'coalesced', 'error']
+
+    def __init__(self, service, method):
+        self.name = '%s.%s' % (short_service_name(service), method)
+        self.start = time.time()
+        self.duration = None
+        self.serialize_time = None
+        self.network_time = None
+        self.decode_time = None
+        self.request_bytes = None
+        self.response_bytes = None
+        self.status = None
+        self.retries = 0
+        self.cache_hit = False
+        self.coalesced = False
+        self.error = None
+
+    def update(self, stats):
+        """ Copies transport measurements from a dictionary """
+        for key, value in stats.items():
+            setattr(self, key, value)
+
+    def finish(self):
+        """ Marks the call as done """
+        self.duration = time.time() - self.start
+
+    def to_dict(self):
+        """ Returns the record as a dictionary """
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+    def __repr__(self):
+        return "<CallRecord: %s %.3fs>" % (self.name, self.duration or 0)
+
+
+class Histogram(object):
+    """ Keeps the most recent max_samples values to compute percentiles
+        from, along with the count and sum of every value.
+
+    :param int max_samples: number of values to compute percentiles from
+    """
+    def __init__(self, max_samples=1000):
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+
+    def add(self, value):
+        """ Adds a value """
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, quantile):
+        """ Returns the value at the given quantile (0 to 1) of the recent
+            values, or None if there are none. """
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(quantile * len(ordered)))
+        return ordered[index]
+
+    def summary(self):
+        """ Returns the count, sum, max and p50/p95/p99 of the values """
+        summary = {
+            'count': self.count,
+            'sum': self.total,
+            'max': max(self.samples) if self.samples else None,
+        }
+        for quantile in QUANTILES:
+            summary['p%d' % (quantile * 100)] = self.percentile(quantile)
+        return summary
+
+
+class _CallStats(object):
+    """ Aggregated measurements of one Service.method """
+    def __init__(self, max_samples):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.statuses = {}
+        self.histograms = dict((phase, Histogram(max_samples))
+                               for phase in PHASES)
+
+    def add(self, record):
+        """ Adds the measurements of a call """
+        self.calls += 1
+        self.retries += record.retries
+        if record.error:
+            self.errors += 1
+        if record.cache_hit:
+            self.cache_hits += 1
+        if record.coalesced:
+            self.coalesced += 1
+        self.request_bytes += record.request_bytes or 0
+        self.response_bytes += record.response_bytes or 0
+        if record.status is not None:
+            status = str(record.status)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+        for phase, histogram in self.histograms.items():
+            value = getattr(record, phase)
+            if value is not None:
+                histogram.add(value)
+
+    def to_dict(self):
+        """ Returns the aggregated measurements as a dictionary """
+        result = {
+            'calls': self.calls,
+            'errors': self.errors,
+            'retries': self.retries,
+            'cache_hits': self.cache_hits,
+            'coalesced': self.coalesced,
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+            'statuses': dict(self.statuses),
+        }
+        for phase, histogram in self.histograms.items():
+            result[phase] = histogram.summary()
+        return result
+
+
+class MetricsRecorder(object):
+    """ An observer which aggregates call records per Service.method.
+
+    Memory use is bounded: each histogram only keeps the most recent
+    max_samples values to compute percentiles from.
+
+    :param int max_samples: values kept per histogram
+
+    Usage:
+
+        >>> import SoftLayer
+        >>> from SoftLayer.metrics import MetricsRecorder
+        >>> metrics = MetricsRecorder()
+        >>> client = SoftLayer.Client(observers=[metrics])
+        >>> client['Account'].getObject()
+        {...}
+        >>> metrics.snapshot()['Account.getObject']['duration']['p95']
+        0.254
+        >>> metrics.write_prometheus('/var/lib/node_exporter/softlayer.prom')
+
+    """
+    def __init__(self, max_samples=1000):
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def __call__(self, record):
+        with self._lock:
+            if record.name not in self._stats:
+                self._stats[record.name] = _CallStats(self.max_samples)
+            self._stats[record.name].add(record)
+
+    def snapshot(self):
+        """ Returns the aggregated measurements, keyed by Service.method """
+        with self._lock:
+            return dict((name, stats.to_dict())
+                        for name, stats in self._stats.items())
+
+    def reset(self):
+        """ Drops everything recorded so far """
+        with self._lock:
+            self._stats = {}
+
+    def to_json(self):
+        """ Returns a JSON snapshot of the aggregated measurements """
+        return json.dumps(self.snapshot(), sort_keys=True)
+
+    def to_prometheus(self, prefix='softlayer_api'):
+        """ Returns the aggregated measurements in the Prometheus text
+            exposition format.
+
+        :param string prefix: prefix for the metric names
+        """
+        snapshot = self.snapshot()
+        lines = [
+            '# HELP %s_call_seconds Time spent in each phase of API calls'
+            % prefix,
+            '# TYPE %s_call_seconds summary' % prefix,
+        ]
+        for name in sorted(snapshot):
+            for phase in PHASES:
+                summary = snapshot[name][phase]
+                labels = 'call="%s",phase="%s"' % (
+                    name, phase.replace('_time', ''))
+                for quantile in QUANTILES:
+                    value = summary['p%d' % (quantile * 100)]
+                    if value is not None:
+                        lines.append('%s_call_seconds{%s,quantile="%s"} %r'
+                                     % (prefix, labels, quantile, value))
+                lines.append('%s_call_seconds_sum{%s} %r'
+                             % (prefix, labels, summary['sum']))
+                lines.append('%s_call_seconds_count{%s} %d'
+                             % (prefix, labels, summary['count']))
+
+        counters = [
+            ('calls', 'API calls made'),
+            ('errors', 'API calls which raised an error'),
+            ('retries', 'API call retries'),
+            ('cache_hits', 'API calls answered by the response cache'),
+            ('coalesced', 'API calls which shared an identical call'),
+            ('request_bytes', 'Bytes sent in API requests'),
+            ('response_bytes', 'Bytes received in API responses'),
+        ]
+        for counter, description in counters:
+            lines.append('# HELP %s_%s_total %s'
+                         % (prefix, counter, description))
+            lines.append('# TYPE %s_%s_total counter' % (prefix, counter))
+            for name in sorted(snapshot):
+                lines.append('%s_%s_total{call="%s"} %d'
+                             % (prefix, counter, name,
+                                snapshot[name][counter]))
+
+        lines.append('# HELP %s_responses_total API responses by HTTP status'
+                     % prefix)
+        lines.append('# TYPE %s_responses_total counter' % prefix)
+        for name in sorted(snapshot):
+            statuses = snapshot[name]['statuses']
+            for status in sorted(statuses):
+                lines.append('%s_responses_total{call="%s",status="%s"} %d'
+                             % (prefix, name, status, statuses[status]))
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path, prefix='softlayer_api'):
+        """ Writes the Prometheus text format to a file, E.G. for the node
+            exporter's textfile collector. The file is replaced atomically.
+
+        :param string path: file to write
+        :param string prefix: prefix for the metric names
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        handle, tmp_name = tempfile.mkstemp(dir=directory)
+        with os.fdopen(handle, 'w') as tmp_file:
+            tmp_file.write(self.to_prometheus(prefix=prefix))
+        # mkstemp only lets the owner read the file; the exporter may not
+        os.chmod(tmp_name, 0o644)
+        os.rename(tmp_name, path)
+
+
+class LoggingObserver(object):
+    """ An observer which logs one line per call.
+
+    :param logger: the logger to use. Defaults to this module's logger.
+    :param int level: the level to log at
+    """
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or LOGGER
+        self.level = level
+
+    def __call__(self, record):
+        self.logger.log(self.level, format_record(record))
+
+
+def format_record(record):
+    """ Formats a call record as a single line of key=value pairs """
+    parts = [record.name]
+    for name in ['status', 'duration', 'serialize_time', 'network_time',
+                 'decode_time', 'request_bytes', 'response_bytes', 'retries',
+                 'cache_hit', 'coalesced', 'error']:
+        value = getattr(record, name)
+        if value is None:
+            continue
+        if isinstance(value, float):
+            value = '%.6f' % value
+        parts.append('%s=%s' % (name, value))
+    return ' '.join(parts)
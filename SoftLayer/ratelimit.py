@@ -0,0 +1,151 @@
+"""
+    SoftLayer.ratelimit
+    ~~~~~~~~~~~~~~~~~~~
+    Client-side rate limiting for API calls
+
+    :license: MIT, see LICENSE for more details.
+"""
+from contextlib import contextmanager
+import threading
+import time
+
+from SoftLayer.utils import short_service_name
+
+__all__ = ['RateLimiter', 'TokenBucket']
+
+
+class TokenBucket(object):
+    """ A thread-safe token bucket.
+
+    Tokens are added at rate per second, up to burst tokens. Taking a token
+    never fails; when the bucket is empty the token is reserved ahead of
+    time and the caller is told how long to wait for it. Callers are
+    therefore served in the order they arrived.
+
+    :param float rate: tokens added per second
+    :param int burst: maximum number of tokens which can be saved up.
+                      Defaults to one second's worth of tokens.
+    """
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def take(self):
+        """ Takes a token and returns the number of seconds to wait before
+            it may be used. """
+        with self._lock:
+            now = time.time()
+            self._tokens = min(self.burst, self._tokens +
+                               (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self.rate
+
+
+class RateLimiter(object):
+    """ Limits the rate and concurrency of API calls made by a client.
+
+    Calls over the limit wait (in the order they were made) instead of
+    failing. One limiter can be shared by every thread using a client, or
+    by several clients.
+
+    :param float rate: maximum number of calls per second
+    :param int burst: number of calls which may be made at once before rate
+                      applies. Defaults to one second's worth of calls.
+    :param int max_concurrent: maximum number of calls in flight at once
+    :param dict service_rates: calls per second for specific services,
+                               E.G.: {'Virtual_Guest': 5}. These apply on
+                               top of rate.
+
+    Usage:
+
+        >>> import SoftLayer
+        >>> from SoftLayer.ratelimit import RateLimiter
+        >>> limiter = RateLimiter(rate=10, max_concurrent=4)
+        >>> client = SoftLayer.Client(rate_limiter=limiter)
+        >>> client['Account'].getObject()
+        {...}
+        >>> limiter.stats()
+        {'calls': 1, 'delayed': 0, 'wait_time': 0.0, 'max_wait': 0.0,
+         'in_flight': 0}
+
+    """
+    def __init__(self, rate=None, burst=None, max_concurrent=None,
+                 service_rates=None):
+        self.bucket = None
+        if rate:
+            self.bucket = TokenBucket(rate, burst=burst)
+        self.max_concurrent = max_concurrent
+        self._slots = None
+        if max_concurrent:
+            self._slots = threading.BoundedSemaphore(max_concurrent)
+        self.service_buckets = dict(
+            (short_service_name(service), TokenBucket(service_rate))
+            for service, service_rate in (service_rates or {}).items())
+
+        self.calls = 0
+        self.delayed = 0
+        self.wait_time = 0.0
+        self.max_wait = 0.0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def limit(self, service):
+        """ Waits until a call to service may be made. The call is counted
+            as in flight until the block exits.
+
+        :param string service: the name of the service being called
+
+        Usage:
+
+            >>> with limiter.limit('Account'):
+            ...     make_the_call()
+
+        """
+        start = time.time()
+        delay = 0
+        if self.bucket is not None:
+            delay = self.bucket.take()
+        service_bucket = self.service_buckets.get(short_service_name(service))
+        if service_bucket is not None:
+            delay = max(delay, service_bucket.take())
+        if delay:
+            time.sleep(delay)
+
+        if self._slots is not None:
+            self._slots.acquire()
+        waited = time.time() - start
+
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            if delay or waited > 0.001:
+                self.delayed += 1
+                self.wait_time += waited
+                self.max_wait = max(self.max_wait, waited)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            if self._slots is not None:
+                self._slots.release()
+
+    def stats(self):
+        """ Returns a dictionary with the number of calls made, how many of
+            them had to wait and for how long in total and at most, and the
+            number of calls currently in flight. """
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'delayed': self.delayed,
+                'wait_time': self.wait_time,
+                'max_wait': self.max_wait,
+                'in_flight': self.in_flight,
+            }
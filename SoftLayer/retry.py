@@ -0,0 +1,252 @@
+"""
+    SoftLayer.retry
+    ~~~~~~~~~~~~~~~
+    Retries for transient API failures
+
+    :license: MIT, see LICENSE for more details.
+"""
+import logging
+import random
+import threading
+import time
+
+from SoftLayer.exceptions import (
+    SoftLayerAPIError, TransportError, RemoteSystemError, InternalError,
+    CircuitBreakerOpen)
+from SoftLayer.utils import has_method_prefix
+
+__all__ = ['RetryPolicy', 'CircuitBreaker', 'IDEMPOTENT_PREFIXES']
+
+LOGGER = logging.getLogger(__name__)
+
+# Only methods starting with one of these words are retried by default, E.G.
+# getObject or isPingable but not issueCertificate. Retrying anything else
+# (createObject, placeOrder, ...) could repeat its side effects.
+IDEMPOTENT_PREFIXES = ('get', 'find', 'is', 'verify', 'check')
+
+# TransportError fault codes for connection errors and timeouts (0) and for
+# the XML-RPC "transport error" fault
+TRANSIENT_FAULT_CODES = (0, '-32300')
+
+
+class CircuitBreaker(object):
+    """ Tracks consecutive failures of an endpoint.
+
+    The breaker opens after threshold transient failures in a row. While it
+    is open calls fail straight away instead of waiting on an endpoint that
+    is down. After reset_timeout seconds one trial call is let through; the
+    breaker closes again if it succeeds and re-opens if it fails.
+
+    :param int threshold: consecutive failures before the breaker opens
+    :param int reset_timeout: seconds to wait before letting a trial call
+                              through
+    """
+    def __init__(self, threshold=5, reset_timeout=30):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """ One of 'closed', 'open' or 'half-open' """
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        """ Returns the state. Callers must hold the lock. """
+        if self._opened is None:
+            return 'closed'
+        if time.time() - self._opened >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self):
+        """ Returns True if a call may be made right now """
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        """ Records a call which reached the endpoint """
+        with self._lock:
+            self.failures = 0
+            self._opened = None
+            self._trial = False
+
+    def record_failure(self):
+        """ Records a call which failed with a transient error """
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self._opened = time.time()
+            self._trial = False
+
+
+class RetryPolicy(object):
+    """ Retries API calls which failed with a transient error.
+
+    Connection errors, timeouts, HTTP 502/503/504 responses,
+    RemoteSystemError and InternalError are retried. Other errors, like
+    ObjectNotFound or invalid parameters, are raised straight away. Waits
+    between attempts grow exponentially and are randomized ("full jitter")
+    so that many clients don't retry in lockstep.
+
+    :param int max_retries: maximum number of retries for each call
+    :param float backoff: seconds to wait (on average, before jitter) ahead
+                          of the first retry; doubled for each retry after
+    :param float max_backoff: upper bound of a single wait
+    :param float deadline: if set, seconds each call may take in total,
+                           including every attempt and wait. It also caps
+                           each attempt's timeout.
+    :param tuple retry_statuses: HTTP status codes which are retried
+    :param tuple idempotent_prefixes: only methods starting with one of these
+                                      words (followed by an uppercase letter
+                                      or nothing) are retried. Pass None to
+                                      retry every method.
+    :param int breaker_threshold: consecutive failures before calls to an
+                                  endpoint fail fast. Set to 0 to disable the
+                                  circuit breaker.
+    :param int breaker_reset: seconds before an open circuit lets a trial
+                              call through
+
+    Usage:
+
+        >>> import SoftLayer
+        >>> from SoftLayer.retry import RetryPolicy
+        >>> client = SoftLayer.Client(retry=RetryPolicy(max_retries=5,
+        ...                                             deadline=120))
+        >>> client['Account'].getObject()
+        {...}
+        >>> client.retry.stats()
+        {'calls': 1, 'retries': 0, 'backoff_time': 0.0, 'rejected': 0}
+
+    """
+    def __init__(self, max_retries=3, backoff=0.5, max_backoff=30,
+                 deadline=None, retry_statuses=(502, 503, 504),
+                 idempotent_prefixes=IDEMPOTENT_PREFIXES,
+                 breaker_threshold=5, breaker_reset=30):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.retry_statuses = tuple(retry_statuses)
+        self.idempotent_prefixes = idempotent_prefixes
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self.calls = 0
+        self.retries = 0
+        self.backoff_time = 0.0
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._breakers = {}
+
+    def is_idempotent(self, method):
+        """ Returns True if the method can safely be retried """
+        if self.idempotent_prefixes is None:
+            return True
+        return has_method_prefix(method, self.idempotent_prefixes)
+
+    def is_retryable(self, error):
+        """ Returns True if the error is likely to go away when retried """
+        if isinstance(error, CircuitBreakerOpen):
+            return False
+        if isinstance(error, TransportError):
+            return error.faultCode in TRANSIENT_FAULT_CODES \
+                or error.faultCode in self.retry_statuses
+        return isinstance(error, (RemoteSystemError, InternalError))
+
+    def get_backoff(self, retry):
+        """ Returns the number of seconds to wait before the given retry,
+            counting from 0. """
+        ceiling = min(self.max_backoff, self.backoff * (2 ** retry))
+        return random.uniform(0, ceiling)
+
+    def get_breaker(self, endpoint):
+        """ Returns the circuit breaker for an endpoint, or None if circuit
+            breaking is disabled. """
+        if not self.breaker_threshold:
+            return None
+        with self._lock:
+            if endpoint not in self._breakers:
+                self._breakers[endpoint] = CircuitBreaker(
+                    threshold=self.breaker_threshold,
+                    reset_timeout=self.breaker_reset)
+            return self._breakers[endpoint]
+
+    def call(self, func, endpoint, method, timeout=None):
+        """ Calls func, retrying it according to this policy.
+
+        :param func: a callable which makes the API call. It is passed the
+                     timeout to use for that attempt.
+        :param string endpoint: the endpoint the call is made against. Each
+                                endpoint has its own circuit breaker.
+        :param string method: the name of the API method being called
+        :param float timeout: timeout for each attempt
+        """
+        breaker = self.get_breaker(endpoint)
+        start = time.time()
+        retry = 0
+        with self._lock:
+            self.calls += 1
+
+        while True:
+            if breaker is not None and not breaker.allow():
+                with self._lock:
+                    self.rejected += 1
+                raise CircuitBreakerOpen(
+                    0, 'Not calling %s after %s consecutive failures'
+                    % (endpoint, breaker.failures))
+
+            attempt_timeout = timeout
+            if self.deadline:
+                remaining = max(self.deadline - (time.time() - start), 0)
+                attempt_timeout = min(timeout or remaining, remaining)
+
+            try:
+                result = func(attempt_timeout)
+            except SoftLayerAPIError as ex:
+                retryable = self.is_retryable(ex)
+                if breaker is not None:
+                    if retryable:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+
+                if not retryable or retry >= self.max_retries \
+                        or not self.is_idempotent(method):
+                    raise
+
+                delay = self.get_backoff(retry)
+                if self.deadline \
+                        and time.time() - start + delay >= self.deadline:
+                    raise
+
+                LOGGER.info('Retrying %s in %.2fs after %s', method, delay, ex)
+                with self._lock:
+                    self.retries += 1
+                    self.backoff_time += delay
+                time.sleep(delay)
+                retry += 1
+            else:
+                if breaker is not None:
+                    breaker.record_success()
+                return result
+
+    def stats(self):
+        """ Returns a dictionary of call, retry and rejection counters and
+            the total time spent waiting between attempts. """
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'retries': self.retries,
+                'backoff_time': self.backoff_time,
+                'rejected': self.rejected,
+            }
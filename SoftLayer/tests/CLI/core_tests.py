@@ -84,6 +84,27 @@ class CommandLineTests(unittest.TestCase):
             env=self.env)
         calls_mock.assert_called()
 
+    @patch('SoftLayer.cassette.Cassette')
+    def test_record(self, cassette):
+        self.env.get_module_name.return_value = 'cci'
+        self.assertRaises(
+            SystemExit, core.main,
+            args=['cci', 'list', '--record=cci.jsonl'],
+            env=self.env)
+        cassette.assert_called_with('cci.jsonl', mode='record')
+        cassette().close.assert_called_with()
+
+    def test_replay_missing_cassette(self):
+        self.env.get_module_name.return_value = 'cci'
+        self.env.err = MagicMock()
+        try:
+            core.main(args=['cci', 'list', '--replay=/no/such/cassette'],
+                      env=self.env)
+        except SystemExit as ex:
+            self.assertNotEqual(ex.code, 0)
+        self.assertIn('Unable to read cassette',
+                      self.env.err.call_args[0][0])
+
     @patch('logging.getLogger')
     @patch('logging.StreamHandler')
     def test_with_debug(self, stream_handler, logger):
@@ -178,6 +199,71 @@ class CommandLineTests(unittest.TestCase):
                 SystemExit, core.main, args=['cci', 'list'], env=self.env)
             m.assert_called_once_with()
 
+    def test_eof(self):
+        self.env.get_module_name.side_effect = EOFError
+        self.assertEqual(core.run(['cci', 'list'], self.env), 1)
+
+    def test_run_reuses_clients(self):
+        seen = []
+
+        class Command(submodule_fixture):
+            __doc__ = submodule_fixture.__doc__
+
+            def execute(self, args):
+                seen.append(self.client)
+
+        self.env.get_module_name.return_value = 'cci'
+        self.env.plugins = {'cci': {'list': Command}}
+        clients = {}
+        self.assertEqual(core.run(['cci', 'list'], self.env, clients), 0)
+        self.assertEqual(core.run(['cci', 'list'], self.env, clients), 0)
+        core.run(['cci', 'list', '--proxy=http://proxy'], self.env, clients)
+        core.run(['cci', 'list', '--timings'], self.env, clients)
+
+        self.assertIs(seen[0], seen[1])
+        self.assertIsNot(seen[0], seen[2])
+        self.assertIsInstance(seen[3], SoftLayer.TimedClient)
+        self.assertEqual(len(clients), 3)
+        self.assertIsNotNone(seen[0].cache)
+        self.assertIsNotNone(seen[0].identifier_index)
+        self.assertIsNotNone(seen[0].item_index)
+
+        # Without a clients dict every run makes its own client
+        core.run(['cci', 'list'], self.env)
+        self.assertIsNot(seen[0], seen[4])
+        self.assertIsNone(seen[4].cache)
+
+    @patch.dict('os.environ', {'SL_USERNAME': 'first'})
+    def test_get_client_credentials(self):
+        clients = {}
+        client = core.get_client(clients, {})
+        self.assertIs(core.get_client(clients, {}), client)
+        with patch.dict('os.environ', {'SL_USERNAME': 'second'}):
+            self.assertIsNot(core.get_client(clients, {}), client)
+
+    def test_shell(self):
+        from SoftLayer.CLI.modules.shell import Shell
+
+        self.env.input = MagicMock(side_effect=[
+            'cci list', '', 'sl cci list --timings', '"unbalanced', 'shell',
+            KeyboardInterrupt, 'exit', 'cci list'])
+        self.env.out = MagicMock()
+        self.env.err = MagicMock()
+        with patch('SoftLayer.CLI.core.run') as run:
+            Shell(env=self.env).execute({})
+
+        self.assertEqual(run.call_count, 2)
+        self.assertEqual(run.call_args_list[0][0][0], ['cci', 'list'])
+        self.assertEqual(run.call_args_list[1][0][0],
+                         ['cci', 'list', '--timings'])
+        clients = [call[1]['clients'] for call in run.call_args_list]
+        self.assertIs(clients[0], clients[1])
+        self.assertEqual(self.env.err.call_count, 2)
+
+        # Ctrl-D leaves the shell too
+        self.env.input = MagicMock(side_effect=EOFError)
+        Shell(env=self.env).execute({})
+
 
 class TestCommandParser(unittest.TestCase):
     def setUp(self):
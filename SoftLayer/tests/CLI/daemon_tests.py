@@ -0,0 +1,131 @@
+"""
+    SoftLayer.tests.CLI.daemon_tests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :license: MIT, see LICENSE for more details.
+"""
+import os
+import shutil
+import socket
+import tempfile
+import threading
+
+from mock import patch
+from six import StringIO
+
+from SoftLayer.CLI import core, daemon, formatting
+from SoftLayer.CLI.environment import Environment
+from SoftLayer.CLI.exceptions import CLIAbort
+from SoftLayer.CLI.modules import cci
+from SoftLayer.tests import unittest
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX'), 'needs unix sockets')
+class DaemonTests(unittest.TestCase):
+
+    def setUp(self):
+        # Loading modules registers their commands on Environment.plugins
+        plugins = patch.object(Environment, 'plugins', {})
+        plugins.start()
+        self.addCleanup(plugins.stop)
+
+        self.path = tempfile.mkdtemp()
+        self.socket = os.path.join(self.path, 'cache', 'daemon.sock')
+        self.daemon = daemon.Daemon(self.socket, idle_timeout=10)
+        self.daemon.bind()
+        self.thread = threading.Thread(target=self.daemon.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def tearDown(self):
+        daemon.request({'control': 'stop'}, self.socket)
+        self.thread.join(5)
+        shutil.rmtree(self.path)
+
+    def test_forward(self):
+        out, err = StringIO(), StringIO()
+        exit_status = daemon.forward(['help', 'cci'], self.socket,
+                                     stdout=out, stderr=err)
+        self.assertEqual(exit_status, 0)
+        self.assertEqual(out.getvalue().strip(), cci.__doc__.strip())
+        self.assertEqual(err.getvalue(), '')
+
+        exit_status = daemon.forward(['nope'], self.socket,
+                                     stdout=out, stderr=err)
+        self.assertEqual(exit_status, 1)
+        self.assertIn('Invalid module: "nope"', err.getvalue())
+        self.assertEqual(self.daemon.commands, 2)
+
+    def test_status(self):
+        status = daemon.request({'control': 'status'}, self.socket)
+        self.assertEqual(status['pid'], os.getpid())
+        self.assertEqual(status['socket'], self.socket)
+        self.assertEqual(os.stat(self.socket).st_mode & 0o777, 0o600)
+
+    def test_version_mismatch(self):
+        answer = daemon.request({'args': ['help', 'cci'],
+                                 'version': '0.0.0'}, self.socket)
+        self.assertIn('error', answer)
+        self.assertEqual(self.daemon.commands, 0)
+
+    def test_stop(self):
+        self.assertEqual(daemon.request({'control': 'stop'}, self.socket),
+                         {'stopped': True})
+        self.thread.join(5)
+        self.assertFalse(os.path.exists(self.socket))
+        self.assertIsNone(daemon.forward(['help', 'cci'], self.socket))
+        self.assertIsNone(daemon.request({'control': 'status'}, self.socket))
+
+    def test_already_running(self):
+        self.assertRaises(CLIAbort, daemon.Daemon(self.socket).bind)
+
+    def test_prompts(self):
+        def run(args, env, clients=None):
+            env.out('name: %s' % env.input('Name? '))
+            env.out('sure: %s' % formatting.confirm('Sure?'))
+            env.out('password: %s' % env.getpass('Password: '))
+            try:
+                env.input('More? ')
+            except EOFError:
+                # Prompts after stdin runs out fail like they do locally
+                env.out('no more')
+            return 0
+
+        out, err = StringIO(), StringIO()
+        with patch('SoftLayer.CLI.core.run', run), \
+                patch('SoftLayer.CLI.daemon.getpass.getpass') as _getpass:
+            _getpass.return_value = 'secret'
+            exit_status = daemon.forward(
+                ['cci', 'cancel', '1'], self.socket,
+                stdin=StringIO('web01\ny\n'), stdout=out, stderr=err)
+        self.assertEqual(exit_status, 0, err.getvalue())
+        _getpass.assert_called_once_with('Password: ')
+        output = out.getvalue()
+        self.assertIn('Name? ', output)
+        self.assertIn('Sure? [y/N]: ', output)
+        self.assertIn('name: web01', output)
+        self.assertIn('sure: True', output)
+        self.assertIn('password: secret', output)
+        self.assertIn('no more', output)
+
+    def test_run_in_daemon(self):
+        self.assertIsNone(daemon.run_in_daemon(['shell'], self.socket))
+        self.assertIsNone(daemon.run_in_daemon([], self.socket))
+        self.assertEqual(daemon.run_in_daemon(['help', 'cci'], self.socket), 0)
+
+    @patch('SoftLayer.CLI.core.run')
+    def test_main(self, run):
+        run.return_value = 0
+        env = Environment()
+        with patch.dict('os.environ', {'SL_DAEMON_SOCKET': self.socket}):
+            # Not forwarded unless asked for
+            self.assertRaises(SystemExit, core.main, ['help', 'cci'], env)
+            self.assertIs(run.call_args[0][1], env)
+
+            os.environ['SL_DAEMON'] = '1'
+            self.assertRaises(SystemExit, core.main, ['help', 'cci'], env)
+            self.assertIsInstance(run.call_args[0][1],
+                                  daemon.RemoteEnvironment)
+            self.assertRaises(SystemExit, core.main, ['shell'], env)
+            self.assertIs(run.call_args[0][1], env)
+        self.assertEqual(self.daemon.commands, 1)
@@ -10,7 +10,7 @@ import json
 
 import SoftLayer.CLI as cli
 from SoftLayer.tests import FIXTURE_PATH, unittest
-from mock import patch, mock_open, call
+from mock import patch, mock_open, call, Mock
 
 if sys.version_info >= (3,):
     open_path = 'builtins.open'
@@ -241,21 +241,30 @@ class CLIAbortTests(unittest.TestCase):
 class ResolveIdTests(unittest.TestCase):
 
     def test_resolve_id_one(self):
-        resolver = lambda r: [12345]
+        resolver = Mock(return_value=[12345])
         id = cli.helpers.resolve_id(resolver, 'test')
 
         self.assertEqual(id, 12345)
 
     def test_resolve_id_none(self):
-        resolver = lambda r: []
+        resolver = Mock(return_value=[])
         self.assertRaises(
             cli.helpers.CLIAbort, cli.helpers.resolve_id, resolver, 'test')
 
     def test_resolve_id_multiple(self):
-        resolver = lambda r: [12345, 54321]
+        resolver = Mock(return_value=[12345, 54321])
         self.assertRaises(
             cli.helpers.CLIAbort, cli.helpers.resolve_id, resolver, 'test')
 
+    def test_resolve_many(self):
+        resolver = Mock(return_value={'a': [1], 'b': [2], 'c': [3, 4]})
+        ids = cli.helpers.resolve_many(resolver, ['b', 'a'])
+        self.assertEqual(ids, [2, 1])
+        self.assertRaises(cli.helpers.CLIAbort, cli.helpers.resolve_many,
+                          resolver, ['a', 'c'])
+        self.assertRaises(cli.helpers.CLIAbort, cli.helpers.resolve_many,
+                          resolver, ['a', 'd'])
+
 
 class TestFormatOutput(unittest.TestCase):
 
@@ -356,6 +365,169 @@ class TestFormatOutput(unittest.TestCase):
         self.assertEqual({'nothing': None}, ret)
 
 
+class StreamingTableTests(unittest.TestCase):
+
+    def rows(self, read=None):
+        rows = [[1, 'a.example.com', cli.mb_to_gb(1024)],
+                [22, 'bb', cli.blank()],
+                [3, 'c', None]]
+        for row in rows:
+            if read is not None:
+                read.append(row)
+            yield row
+
+    def buffered(self):
+        table = cli.Table(['id', 'host', 'memory'])
+        table.align['host'] = 'l'
+        for row in self.rows():
+            table.add_row(row)
+        return table
+
+    def streaming(self, rows=None, **kwargs):
+        table = cli.StreamingTable(['id', 'host', 'memory'],
+                                   rows or self.rows(), **kwargs)
+        table.align['host'] = 'l'
+        return table
+
+    def test_table(self):
+        self.assertEqual(cli.format_output(self.streaming(), 'table'),
+                         cli.format_output(self.buffered(), 'table'))
+
+    def test_lines_are_written_as_rows_are_read(self):
+        read = []
+        lines = cli.iter_output(self.streaming(self.rows(read),
+                                               sample_size=1))
+        self.assertEqual(next(lines), ':....:...............:........:')
+        self.assertEqual(len(read), 1)
+        self.assertEqual(list(lines)[2], ': 1  : a.example.com :   1G   :')
+        self.assertEqual(len(read), 3)
+
+        lines = cli.iter_output(self.streaming(self.rows(read)), 'raw')
+        del read[:]
+        self.assertEqual(next(lines), '1  a.example.com  1024  ')
+        self.assertEqual(len(read), 1)
+
+    def test_fixed_widths(self):
+        lines = list(cli.iter_output(self.streaming(
+            widths={'host': 5}, sample_size=0)))
+        self.assertEqual(lines[1], ': id : host  : memory :')
+        self.assertEqual(lines[3], ': 1  : a.example.com :   1G   :')
+        self.assertEqual(lines[4], ': 22 : bb    :   -    :')
+
+    def test_nested(self):
+        def nested():
+            table = cli.Table(['a'])
+            table.add_row(['x'])
+            return table
+
+        buffered = cli.Table(['id', 'nested'])
+        buffered.add_row([1, nested()])
+        streaming = cli.StreamingTable(['id', 'nested'], iter([[1, nested()]]))
+        self.assertEqual(cli.format_output(streaming, 'table'),
+                         cli.format_output(buffered, 'table'))
+
+    def test_raw(self):
+        self.assertEqual(cli.format_output(self.streaming(), 'raw'),
+                         '1  a.example.com  1024  \n'
+                         '22  bb             NULL  \n'
+                         '3   c              None  ')
+
+    def test_json(self):
+        ret = cli.format_output(self.streaming(), 'json')
+        self.assertEqual(json.loads(ret),
+                         json.loads(cli.format_output(self.buffered(),
+                                                      'json')))
+        self.assertEqual(ret.splitlines()[1],
+                         '    {"host": "a.example.com", "id": 1, '
+                         '"memory": 1024},')
+        self.assertEqual(json.loads(cli.format_output(
+            self.streaming(iter([])), 'json')), [])
+
+    def test_python(self):
+        self.assertEqual(cli.format_output(self.streaming(), 'python'),
+                         cli.format_output(self.buffered(), 'python'))
+
+    def test_add_row(self):
+        self.assertRaises(TypeError, self.streaming().add_row, [1, 2, 3])
+
+    def test_iter_output_other(self):
+        self.assertEqual(list(cli.iter_output('text')), ['text'])
+
+    def test_stream_args(self):
+        self.assertEqual(cli.stream_args({}), {})
+        self.assertEqual(cli.stream_args({'--stream': True}),
+                         {'iter': True, 'stream': True})
+        self.assertRaises(cli.ArgumentError, cli.stream_args,
+                          {'--stream': True, '--sortby': 'id'})
+
+
+class LineFormatTests(unittest.TestCase):
+
+    def table(self):
+        nested = cli.KeyValueTable(['name', 'value'])
+        nested.add_row(['a', cli.blank()])
+        table = cli.Table(['id', 'host', 'memory', 'nested'])
+        table.sortby = 'id'
+        table.add_row([2, 'b\tb', cli.blank(), [1, 2]])
+        table.add_row([1, 'a,"a"', cli.mb_to_gb(1024), nested])
+        return table
+
+    def test_csv(self):
+        output = cli.format_output(self.table(), 'csv')
+        self.assertEqual(output, os.linesep.join([
+            'id,host,memory,nested',
+            '1,"a,""a""",1024,"{""a"": null}"',
+            '2,b\tb,,"[1, 2]"',
+        ]))
+
+    def test_tsv(self):
+        self.assertEqual(list(cli.iter_output(self.table(), 'tsv')), [
+            'id\thost\tmemory\tnested',
+            '1\t"a,""a"""\t1024\t"{""a"": null}"',
+            '2\t"b\tb"\t\t[1, 2]',
+        ])
+
+    def test_csv_unicode(self):
+        table = cli.Table([u'h\xf4te', 'id'])
+        table.add_row([u'\u65e5\u672c', 1])
+        self.assertEqual(list(cli.iter_output(table, 'csv')),
+                         [u'h\xf4te,id', u'\u65e5\u672c,1'])
+
+    def test_ndjson(self):
+        lines = list(cli.iter_output(self.table(), 'ndjson'))
+        self.assertEqual([json.loads(line) for line in lines],
+                         cli.format_output(self.table(), 'python')[::-1])
+        self.assertEqual(lines[0], '{"id": 1, "host": "a,\\"a\\"", '
+                                   '"memory": 1024, "nested": {"a": null}}')
+
+    def test_streaming(self):
+        read = []
+
+        def rows():
+            for row in self.table().rows:
+                read.append(row)
+                yield row
+
+        for fmt in ['csv', 'tsv', 'ndjson']:
+            del read[:]
+            table = cli.StreamingTable(['id', 'host', 'memory', 'nested'],
+                                       rows())
+            lines = cli.iter_output(table, fmt)
+            if fmt != 'ndjson':
+                next(lines)  # header
+            self.assertIn('2', next(lines).split(',')[0])
+            self.assertEqual(len(read), 1)
+
+    def test_other_data(self):
+        table = cli.KeyValueTable(['name', 'value'])
+        table.add_row(['a', 1])
+        self.assertEqual(cli.format_output(table, 'ndjson'), '{"a": 1}')
+        self.assertEqual(cli.format_output(['a', 'b'], 'ndjson'),
+                         '"a"' + os.linesep + '"b"')
+        self.assertEqual(cli.format_output('text', 'csv'), 'text')
+        self.assertEqual(cli.format_output(cli.blank(), 'tsv'), 'NULL')
+
+
 class TestTemplateArgs(unittest.TestCase):
 
     def test_no_template_option(self):
@@ -393,6 +565,22 @@ class TestTemplateArgs(unittest.TestCase):
         })
 
 
+class TestTemplateSections(unittest.TestCase):
+
+    def test_template_sections(self):
+        path = os.path.join(FIXTURE_PATH, 'sample_cci_specs.conf')
+        self.assertEqual(cli.helpers.read_template_sections(path), [
+            ('web01', {'--datacenter': 'dal05'}),
+            ('web02', {'--datacenter': 'ams01', '--cpu': '2'}),
+            ('db01', {'--hostname': 'database01', '--memory': '8192'}),
+        ])
+
+    def test_template_sections_not_exists(self):
+        path = os.path.join(FIXTURE_PATH, 'sample_template_not_exists.conf')
+        self.assertRaises(cli.helpers.ArgumentError,
+                          cli.helpers.read_template_sections, path)
+
+
 class TestExportToTemplate(unittest.TestCase):
     def test_export_to_template(self):
         with patch(open_path, mock_open(), create=True) as open_:
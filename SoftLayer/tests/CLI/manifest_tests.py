@@ -0,0 +1,106 @@
+"""
+    SoftLayer.tests.CLI.manifest_tests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :license: MIT, see LICENSE for more details.
+"""
+import os
+import shutil
+import tempfile
+
+from mock import patch
+
+from SoftLayer.CLI import core
+from SoftLayer.CLI.environment import Environment, InvalidModule
+from SoftLayer.CLI.manifest import Manifest, LazyCommand, build_manifest, \
+    module_signature
+from SoftLayer.CLI.modules import cci
+from SoftLayer.tests import unittest
+
+
+class ManifestTests(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.filename = os.path.join(self.path, 'cache', 'manifest.json')
+        self.manifest = Manifest(self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_build(self):
+        found = build_manifest()
+        self.assertEqual(found['cci']['doc'], cci.__doc__)
+        commands = dict((command['action'], command)
+                        for command in found['cci']['commands'])
+        self.assertEqual(commands['list']['class'],
+                         'SoftLayer.CLI.modules.cci:ListCCIs')
+        self.assertEqual(commands['list']['doc'], cci.ListCCIs.__doc__)
+        self.assertEqual(commands['cancel']['options'], ['confirm'])
+        self.assertIn(None, [command['action']
+                             for command in found['help']['commands']])
+
+    def test_saved(self):
+        self.assertEqual(self.manifest.get_module('cci').__doc__, cci.__doc__)
+        self.assertTrue(os.path.exists(self.filename))
+
+        with patch('SoftLayer.CLI.manifest.build_manifest') as build:
+            manifest = Manifest(self.filename)
+            self.assertEqual(manifest.get_module('cci').__doc__,
+                             cci.__doc__)
+            self.assertFalse(build.called)
+
+    def test_stale(self):
+        signature = module_signature()
+        self.manifest.save(signature, {'cci': {'doc': 'old',
+                                               'commands': []}})
+        self.assertEqual(self.manifest.load(signature)['cci']['doc'], 'old')
+
+        signature[0][2] += 1
+        self.assertIsNone(self.manifest.load(signature))
+        with patch('SoftLayer.CLI.manifest.VERSION', '0.0.0'):
+            self.assertIsNone(self.manifest.load(module_signature()))
+
+        self.manifest.clear()
+        self.assertFalse(os.path.exists(self.filename))
+        self.assertEqual(self.manifest.get_module('cci').__doc__, cci.__doc__)
+
+    def test_unwritable(self):
+        with open(os.path.join(self.path, 'cache'), 'w'):
+            pass
+        self.assertEqual(self.manifest.get_module('cci').__doc__, cci.__doc__)
+
+    def test_commands(self):
+        self.assertIsNone(self.manifest.get_module('nope'))
+        self.assertEqual(self.manifest.get_commands('nope'), {})
+
+        command = self.manifest.get_commands('cci')['list']
+        self.assertIsInstance(command, LazyCommand)
+        self.assertEqual(command.__doc__, cci.ListCCIs.__doc__)
+        self.assertIs(command.load(), cci.ListCCIs)
+
+        env = Environment()
+        runnable = command(client='client', env=env)
+        self.assertIsInstance(runnable, cci.ListCCIs)
+        self.assertEqual(runnable.client, 'client')
+
+    def test_environment(self):
+        env = Environment()
+        env.plugins = {}
+        env.manifest = self.manifest
+
+        module = env.load_module('cci')
+        self.assertEqual(module.__doc__, cci.__doc__)
+        self.assertEqual(env.get_command('cci', 'list').load(), cci.ListCCIs)
+        self.assertRaises(InvalidModule, env.load_module, 'nope')
+
+    @patch('SoftLayer.CLI.core.run')
+    @patch('SoftLayer.CLI.core.Manifest')
+    def test_entry_point(self, manifest, run):
+        # Only the sl entry point keeps a manifest on disk
+        self.assertIsNone(Environment().manifest)
+
+        run.return_value = 0
+        self.assertRaises(SystemExit, core.main, ['help', 'cci'])
+        self.assertIs(run.call_args[0][1].manifest, manifest.return_value)
+        manifest.assert_called_once_with()
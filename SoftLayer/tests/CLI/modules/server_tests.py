@@ -16,7 +16,8 @@ try:
 except ImportError:
     builtins_name = '__builtin__'
 
-from SoftLayer.CLI.helpers import format_output, CLIAbort, ArgumentError
+from SoftLayer.CLI.helpers import (
+    format_output, CLIAbort, ArgumentError, StreamingTable)
 from SoftLayer.CLI.modules import server
 
 
@@ -192,6 +193,22 @@ class ServerCLITests(unittest.TestCase):
 
         self.assertEqual(expected, format_output(output, 'python'))
 
+    def test_ListServers_stream(self):
+        runnable = server.ListServers(client=self.client)
+
+        output = runnable.execute({'--stream': True})
+
+        self.assertIsInstance(output, StreamingTable)
+        lines = format_output(output, 'raw').splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('1000  TEST00  hardware-test1'))
+        _, kwargs = self.client['Account'].getHardware.call_args
+        self.assertEqual(kwargs['iter'], True)
+        self.assertEqual(kwargs['stream'], True)
+
+        self.assertRaises(ArgumentError, runnable.execute,
+                          {'--stream': True, '--sortby': 'id'})
+
     @patch('SoftLayer.CLI.modules.server.CLIAbort')
     @patch('SoftLayer.CLI.modules.server.no_going_back')
     @patch('SoftLayer.HardwareManager.reload')
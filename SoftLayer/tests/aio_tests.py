@@ -0,0 +1,151 @@
+"""
+    SoftLayer.tests.aio_tests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :license: MIT, see LICENSE for more details.
+"""
+import sys
+
+from SoftLayer import TransportError, MethodNotFound
+from SoftLayer.cache import ResponseCache
+from SoftLayer.tests import unittest
+from SoftLayer.tests.fixtures import Account, Virtual_Guest
+from SoftLayer.tests.standin import StandInServer, scale_result
+
+AsyncClient = None
+if sys.version_info >= (3, 6):
+    try:
+        import aiohttp  # NOQA
+    except ImportError:
+        pass
+    else:
+        import asyncio
+        from SoftLayer.aio import AsyncClient
+
+SCALE = 125
+GUESTS = scale_result(Account.getVirtualGuests, SCALE)
+
+
+@unittest.skipIf(AsyncClient is None, 'requires Python 3.6+ and aiohttp')
+class AsyncClientTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandInServer(
+            scale={'Account.getVirtualGuests': SCALE},
+            statuses={'Account.unavailable': 503}).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.server.requests.clear()
+        self.loop = asyncio.new_event_loop()
+        self.client = AsyncClient(
+            username='doesnotexist', api_key='issurelywrong',
+            endpoint_url=self.server.endpoint_url)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.client.close())
+        self.loop.close()
+
+    def run_async(self, awaitable):
+        return self.loop.run_until_complete(awaitable)
+
+    def collect(self, generator):
+        items = []
+        while True:
+            try:
+                items.append(self.run_async(generator.__anext__()))
+            except StopAsyncIteration:  # NOQA
+                return items
+
+    def test_call(self):
+        result = self.run_async(
+            self.client['Virtual_Guest'].getObject(id=100, mask='id'))
+        self.assertEqual(result, Virtual_Guest.getObject)
+
+        name, headers = self.server.requests[0]
+        self.assertEqual(name, 'Virtual_Guest.getObject')
+        self.assertEqual(headers['SoftLayer_Virtual_GuestInitParameters'],
+                         {'id': 100})
+        self.assertEqual(headers['SoftLayer_ObjectMask'],
+                         {'mask': 'mask[id]'})
+        self.assertEqual(headers['authenticate'],
+                         {'username': 'doesnotexist',
+                          'apiKey': 'issurelywrong'})
+
+    def test_invalid_arguments(self):
+        self.assertRaises(TypeError, self.client.call,
+                          'SERVICE', 'METHOD', invalid_kwarg='invalid')
+
+    def test_fault(self):
+        self.assertRaises(MethodNotFound, self.run_async,
+                          self.client['Account'].nope())
+
+    def test_http_error(self):
+        try:
+            self.run_async(self.client['Account'].unavailable())
+        except TransportError as ex:
+            self.assertEqual(ex.faultCode, 503)
+        else:
+            self.fail('TransportError not raised')
+
+    def test_connection_error(self):
+        client = AsyncClient(username='a', api_key='b',
+                             endpoint_url='http://127.0.0.1:1')
+        try:
+            self.assertRaises(TransportError, self.run_async,
+                              client['Account'].getObject())
+        finally:
+            self.run_async(client.close())
+
+    def test_iter_call(self):
+        result = self.collect(
+            self.client['Account'].getVirtualGuests(iter=True))
+        self.assertEqual(result, GUESTS)
+        self.assertEqual(len(self.server.requests), 3)
+
+        self.server.requests.clear()
+        result = self.collect(self.client.iter_call(
+            'Account', 'getVirtualGuests', chunk=25, limit=30, offset=12))
+        self.assertEqual(result, GUESTS[12:42])
+        self.assertEqual([headers['resultLimit']
+                          for _, headers in self.server.requests],
+                         [{'limit': 25, 'offset': 12},
+                          {'limit': 5, 'offset': 37}])
+
+    def test_iter_call_prefetch(self):
+        result = self.collect(self.client['Account'].getVirtualGuests(
+            iter=True, chunk=20, prefetch=4))
+        self.assertEqual(result, GUESTS)
+
+    def test_iter_call_not_a_list(self):
+        result = self.collect(self.client['Virtual_Guest'].getObject(
+            iter=True, id=1))
+        self.assertEqual(result, [Virtual_Guest.getObject])
+
+    def test_cache(self):
+        self.client.cache = ResponseCache(default_ttl=60)
+        for _ in range(3):
+            self.run_async(self.client['Virtual_Guest'].getObject(id=1))
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_observers(self):
+        records = []
+        self.client.add_observer(records.append)
+        self.run_async(self.client['Virtual_Guest'].getObject(id=1))
+        self.assertRaises(MethodNotFound, self.run_async,
+                          self.client['Account'].nope())
+
+        self.assertEqual([record.name for record in records],
+                         ['Virtual_Guest.getObject', 'Account.nope'])
+        self.assertEqual(records[0].status, 200)
+        self.assertGreater(records[0].response_bytes, 0)
+        self.assertIsNotNone(records[0].decode_time)
+        self.assertEqual(records[1].error, 'MethodNotFound')
+
+    def test_unsupported(self):
+        self.assertRaises(TypeError, AsyncClient, retry=object())
+        self.assertRaises(TypeError, self.client.batch)
@@ -4,10 +4,17 @@
 
     :license: MIT, see LICENSE for more details.
 """
+import threading
+import time
+
 from mock import patch, call, Mock, ANY
 
 import SoftLayer
 import SoftLayer.API
+from SoftLayer.cache import ResponseCache, SingleFlight
+from SoftLayer.metrics import MetricsRecorder
+from SoftLayer.ratelimit import RateLimiter
+from SoftLayer.retry import RetryPolicy
 from SoftLayer.tests import unittest
 from SoftLayer.consts import USER_AGENT
 
@@ -37,6 +44,18 @@ class Inititialization(unittest.TestCase):
         self.assertEquals(client.timeout, 10)
         self.assertEquals(client.endpoint_url, 'http://endpoint_url')
 
+    @patch('SoftLayer.API.get_client_settings')
+    def test_pool_settings(self, get_client_settings):
+        get_client_settings.return_value = {
+            'pool_connections': '2',
+            'pool_maxsize': '20',
+            'pool_idle_timeout': '30',
+        }
+        client = SoftLayer.Client()
+        self.assertEquals(client.connection_pool.pool_connections, 2)
+        self.assertEquals(client.connection_pool.pool_maxsize, 20)
+        self.assertEquals(client.connection_pool.idle_timeout, 30.0)
+
 
 class ClientMethods(unittest.TestCase):
     def test_help(self):
@@ -87,6 +106,7 @@ class APIClient(unittest.TestCase):
                     'username': 'doesnotexist', 'apiKey': 'issurelywrong'}},
             proxy=None,
             timeout=None,
+            session=ANY,
             http_headers={
                 'Content-Type': 'application/xml',
                 'User-Agent': USER_AGENT,
@@ -119,6 +139,7 @@ class APIClient(unittest.TestCase):
                 'resultLimit': {'limit': 9, 'offset': 10}},
             proxy=None,
             timeout=None,
+            session=ANY,
             http_headers={
                 'RAW': 'HEADER',
                 'Content-Type': 'application/xml',
@@ -139,6 +160,7 @@ class APIClient(unittest.TestCase):
                 'SoftLayer_ObjectMask': {'mask': 'mask[something[nested]]'}},
             proxy=None,
             timeout=None,
+            session=ANY,
             http_headers={
                 'Content-Type': 'application/xml',
                 'User-Agent': USER_AGENT,
@@ -158,6 +180,7 @@ class APIClient(unittest.TestCase):
                 'SoftLayer_ObjectMask': {'mask': 'mask.something.nested'}},
             proxy=None,
             timeout=None,
+            session=ANY,
             http_headers={
                 'Content-Type': 'application/xml',
                 'User-Agent': USER_AGENT,
@@ -176,6 +199,7 @@ class APIClient(unittest.TestCase):
                 'SoftLayer_ObjectMask': {'mask': 'mask[something.nested]'}},
             proxy=None,
             timeout=None,
+            session=ANY,
             http_headers={
                 'Content-Type': 'application/xml',
                 'User-Agent': USER_AGENT,
@@ -183,6 +207,20 @@ class APIClient(unittest.TestCase):
                 'Accept-Encoding': 'gzip, deflate, compress',
             })
 
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_session_reused(self, make_xml_rpc_api_call):
+        self.client['SERVICE'].METHOD()
+        self.client['SERVICE'].METHOD()
+        sessions = [kwargs['session']
+                    for _, kwargs in make_xml_rpc_api_call.call_args_list]
+        self.assertIsNotNone(sessions[0])
+        self.assertIs(sessions[0], sessions[1])
+
+        self.client.close()
+        self.client['SERVICE'].METHOD()
+        _, kwargs = make_xml_rpc_api_call.call_args
+        self.assertIsNot(kwargs['session'], sessions[0])
+
     @patch('SoftLayer.API.Client.iter_call')
     def test_iterate(self, _iter_call):
         self.client['SERVICE'].METHOD(iter=True)
@@ -253,6 +291,114 @@ class APIClient(unittest.TestCase):
             lambda: list(self.client.iter_call(
                 'SERVICE', 'METHOD', iter=True, chunk=0)))
 
+    @patch('SoftLayer.API.Client.call')
+    def test_iter_call_prefetch(self, _call):
+        data = list(range(250))
+
+        def fake_call(service, method, offset=0, limit=None, **kwargs):
+            return data[offset:offset + limit]
+        _call.side_effect = fake_call
+
+        # chunk=100, no limit
+        result = list(self.client.iter_call(
+            'SERVICE', 'METHOD', iter=True, prefetch=3))
+        self.assertEquals(data, result)
+        _call.assert_has_calls([
+            call('SERVICE', 'METHOD', limit=100, iter=False, offset=0),
+            call('SERVICE', 'METHOD', limit=100, iter=False, offset=100),
+            call('SERVICE', 'METHOD', limit=100, iter=False, offset=200),
+        ], any_order=True)
+        _call.reset_mock()
+
+        # chunk=25, limit=30, offset=12
+        result = list(self.client.iter_call(
+            'SERVICE', 'METHOD', iter=True, limit=30, chunk=25, offset=12,
+            prefetch=4))
+        self.assertEquals(data[12:42], result)
+        self.assertEqual(_call.call_count, 2)
+        _call.assert_has_calls([
+            call('SERVICE', 'METHOD', iter=False, limit=25, offset=12),
+            call('SERVICE', 'METHOD', iter=False, limit=5, offset=37),
+        ], any_order=True)
+        _call.reset_mock()
+
+        # A non-list was returned
+        _call.side_effect = None
+        _call.return_value = "test"
+        result = list(self.client.iter_call(
+            'SERVICE', 'METHOD', iter=True, prefetch=2))
+        self.assertEquals(["test"], result)
+
+    @patch('SoftLayer.API.Client.call')
+    def test_iter_call_prefetch_is_bounded(self, _call):
+        _call.side_effect = lambda *args, **kwargs: list(range(10))
+        gen = self.client.iter_call(
+            'SERVICE', 'METHOD', iter=True, chunk=10, prefetch=2)
+
+        # Consuming the first page keeps two pages in flight
+        for _ in range(10):
+            next(gen)
+        gen.close()
+        self.assertLessEqual(_call.call_count, 3)
+
+    @patch('SoftLayer.API.Client.call')
+    def test_iter_call_stream(self, _call):
+        def fake_call(service, method, offset=0, limit=None, **kwargs):
+            page = Mock(is_list=True)
+            page.__iter__ = lambda _: iter(list(range(250))[offset:][:limit])
+            return page
+        _call.side_effect = fake_call
+
+        result = list(self.client.iter_call(
+            'SERVICE', 'METHOD', iter=True, stream=True))
+        self.assertEquals(list(range(250)), result)
+        _call.assert_has_calls([
+            call('SERVICE', 'METHOD', iter=False, stream=True, limit=100,
+                 offset=0),
+            call('SERVICE', 'METHOD', iter=False, stream=True, limit=100,
+                 offset=100),
+            call('SERVICE', 'METHOD', iter=False, stream=True, limit=100,
+                 offset=200),
+        ])
+        _call.reset_mock()
+
+        # chunk=25, limit=30
+        result = list(self.client.iter_call(
+            'SERVICE', 'METHOD', iter=True, stream=True, limit=30, chunk=25))
+        self.assertEquals(list(range(30)), result)
+        self.assertEqual(_call.call_count, 2)
+
+        # A non-list was returned
+        _call.side_effect = None
+        _call.return_value = Mock(is_list=False)
+        _call.return_value.__iter__ = lambda _: iter(['test'])
+        result = list(self.client.iter_call(
+            'SERVICE', 'METHOD', iter=True, stream=True, chunk=1))
+        self.assertEquals(['test'], result)
+
+        self.assertRaises(
+            TypeError,
+            lambda: list(self.client.iter_call(
+                'SERVICE', 'METHOD', iter=True, stream=True, prefetch=2)))
+
+    @patch('SoftLayer.API.iter_xml_rpc_api_call')
+    def test_call_stream(self, iter_xml_rpc_api_call):
+        self.client.cache = ResponseCache(default_ttl=60)
+        result = self.client['SERVICE'].METHOD(stream=True, limit=10)
+
+        self.assertEqual(result, iter_xml_rpc_api_call.return_value)
+        iter_xml_rpc_api_call.assert_called_with(
+            'ENDPOINT/SoftLayer_SERVICE', 'METHOD', (),
+            headers=ANY,
+            proxy=None,
+            timeout=None,
+            session=ANY,
+            http_headers=ANY)
+        headers = iter_xml_rpc_api_call.call_args[1]['headers']
+        self.assertEqual(headers['resultLimit'], {'limit': 10, 'offset': 0})
+        # Streams are never cached
+        self.assertEqual(len(self.client.cache), 0)
+
     def test_call_invalid_arguments(self):
         self.assertRaises(
             TypeError,
@@ -266,6 +412,7 @@ class APIClient(unittest.TestCase):
             headers=ANY,
             proxy=None,
             timeout=None,
+            session=ANY,
             http_headers={
                 'Content-Type': 'application/xml',
                 'User-Agent': USER_AGENT,
@@ -279,6 +426,7 @@ class APIClient(unittest.TestCase):
             headers=ANY,
             proxy=None,
             timeout=None,
+            session=ANY,
             http_headers={
                 'Content-Type': 'application/xml',
                 'User-Agent': USER_AGENT,
@@ -297,6 +445,7 @@ class APIClient(unittest.TestCase):
             headers=ANY,
             proxy=None,
             timeout=None,
+            session=ANY,
             http_headers={
                 'Content-Type': 'application/xml',
                 'User-Agent': USER_AGENT,
@@ -304,6 +453,260 @@ class APIClient(unittest.TestCase):
             })
 
 
+class APIRetryingClient(unittest.TestCase):
+    def setUp(self):
+        self.client = SoftLayer.TimedClient(
+            username='doesnotexist', api_key='issurelywrong',
+            endpoint_url="ENDPOINT", timeout=10,
+            retry=RetryPolicy(backoff=0))
+
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_retry(self, make_xml_rpc_api_call):
+        make_xml_rpc_api_call.side_effect = [
+            SoftLayer.TransportError(503, 'unavailable'), 'result']
+        self.assertEqual(self.client['SERVICE'].getObject(), 'result')
+        self.assertEqual(make_xml_rpc_api_call.call_count, 2)
+        make_xml_rpc_api_call.assert_called_with(
+            'ENDPOINT/SoftLayer_SERVICE', 'getObject', (),
+            headers=ANY,
+            proxy=None,
+            timeout=10,
+            session=ANY,
+            http_headers=ANY)
+        self.assertEqual(self.client.get_retry_stats()['retries'], 1)
+
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_no_retry(self, make_xml_rpc_api_call):
+        make_xml_rpc_api_call.side_effect = SoftLayer.TransportError(
+            503, 'unavailable')
+        self.assertRaises(SoftLayer.TransportError,
+                          self.client['SERVICE'].createObject, {})
+        self.assertEqual(make_xml_rpc_api_call.call_count, 1)
+
+    def test_retry_stats_without_policy(self):
+        self.client.retry = None
+        self.assertEqual(self.client.get_retry_stats(), {})
+
+
+class APIRateLimitedClient(unittest.TestCase):
+    def setUp(self):
+        self.limiter = RateLimiter(max_concurrent=2)
+        self.client = SoftLayer.Client(
+            username='doesnotexist', api_key='issurelywrong',
+            endpoint_url="ENDPOINT", rate_limiter=self.limiter)
+
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_call(self, make_xml_rpc_api_call):
+        def check_in_flight(*args, **kwargs):
+            self.assertEqual(self.limiter.stats()['in_flight'], 1)
+            return 'result'
+        make_xml_rpc_api_call.side_effect = check_in_flight
+
+        self.assertEqual(self.client['SERVICE'].METHOD(), 'result')
+        self.assertEqual(self.limiter.stats()['calls'], 1)
+        self.assertEqual(self.limiter.stats()['in_flight'], 0)
+
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_retries_are_limited(self, make_xml_rpc_api_call):
+        self.client.retry = RetryPolicy(backoff=0)
+        make_xml_rpc_api_call.side_effect = [
+            SoftLayer.TransportError(503, 'unavailable'), 'result']
+        self.client['SERVICE'].getObject()
+        self.assertEqual(self.limiter.stats()['calls'], 2)
+
+
+class APISingleFlightClient(unittest.TestCase):
+    def setUp(self):
+        self.client = SoftLayer.Client(
+            username='doesnotexist', api_key='issurelywrong',
+            endpoint_url="ENDPOINT", single_flight=SingleFlight())
+
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_call(self, make_xml_rpc_api_call):
+        make_xml_rpc_api_call.return_value = {'id': 1}
+        self.assertEqual(self.client['SERVICE'].getObject(id=1), {'id': 1})
+        self.assertEqual(self.client.single_flight.stats()['calls'], 1)
+
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_concurrent_calls(self, make_xml_rpc_api_call):
+        release = threading.Event()
+
+        def slow_call(*args, **kwargs):
+            release.wait(5)
+            return {'id': 1}
+        make_xml_rpc_api_call.side_effect = slow_call
+
+        batch = self.client.batch(max_workers=4)
+        for _ in range(4):
+            batch['SERVICE'].getObject(id=1, mask='id')
+        while self.client.single_flight.stats()['calls'] < 4:
+            time.sleep(0.001)
+        release.set()
+
+        self.assertEqual(batch.results(), [{'id': 1}] * 4)
+        self.assertEqual(make_xml_rpc_api_call.call_count, 1)
+
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_mutating_calls(self, make_xml_rpc_api_call):
+        self.client['SERVICE'].editObject({}, id=1)
+        self.assertEqual(self.client.single_flight.stats()['calls'], 0)
+        self.assertEqual(make_xml_rpc_api_call.call_count, 1)
+
+
+class APIObservedClient(unittest.TestCase):
+    def setUp(self):
+        self.records = []
+        self.client = SoftLayer.Client(
+            username='doesnotexist', api_key='issurelywrong',
+            endpoint_url="ENDPOINT", observers=[self.records.append])
+
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_record(self, make_xml_rpc_api_call):
+        def fake_call(*args, **kwargs):
+            kwargs['stats'].update({'status': 200, 'network_time': 0.25,
+                                    'response_bytes': 1000})
+            return {'id': 1}
+        make_xml_rpc_api_call.side_effect = fake_call
+
+        self.assertEqual(self.client['SERVICE'].getObject(), {'id': 1})
+        record, = self.records
+        self.assertEqual(record.name, 'SERVICE.getObject')
+        self.assertEqual(record.status, 200)
+        self.assertEqual(record.network_time, 0.25)
+        self.assertEqual(record.response_bytes, 1000)
+        self.assertEqual(record.retries, 0)
+        self.assertIsNotNone(record.duration)
+        self.assertIsNone(record.error)
+
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_error(self, make_xml_rpc_api_call):
+        make_xml_rpc_api_call.side_effect = SoftLayer.TransportError(
+            503, 'unavailable')
+        self.client.retry = RetryPolicy(backoff=0, max_retries=2)
+
+        self.assertRaises(SoftLayer.TransportError,
+                          self.client['SERVICE'].getObject)
+        record, = self.records
+        self.assertEqual(record.error, 'TransportError')
+        self.assertEqual(record.retries, 2)
+
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_cache_hit(self, make_xml_rpc_api_call):
+        self.client.cache = ResponseCache(default_ttl=60)
+        self.client['SERVICE'].getObject()
+        self.client['SERVICE'].getObject()
+        self.assertEqual([record.cache_hit for record in self.records],
+                         [False, True])
+        self.assertIsNone(self.records[1].network_time)
+
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_metrics_recorder(self, make_xml_rpc_api_call):
+        metrics = MetricsRecorder()
+        self.client.add_observer(metrics)
+        self.client['SERVICE'].getObject()
+        self.assertEqual(metrics.snapshot()['SERVICE.getObject']['calls'], 1)
+
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_failing_observer(self, make_xml_rpc_api_call):
+        make_xml_rpc_api_call.return_value = 'result'
+        self.client.observers.insert(0, Mock(side_effect=ValueError))
+        self.assertEqual(self.client['SERVICE'].getObject(), 'result')
+        self.assertEqual(len(self.records), 1)
+
+
+class APIBatch(unittest.TestCase):
+    def setUp(self):
+        self.client = SoftLayer.Client(
+            username='doesnotexist', api_key='issurelywrong',
+            endpoint_url="ENDPOINT")
+
+    @patch('SoftLayer.API.Client.call')
+    def test_batch(self, _call):
+        _call.side_effect = lambda service, method, *args, **kwargs: \
+            (method, args, kwargs)
+
+        with self.client.batch(max_workers=2) as batch:
+            first = batch['SERVICE'].METHOD(1, id=5, mask='id')
+            second = batch.call('SERVICE', 'OTHER')
+
+        self.assertEqual(first.result(), ('METHOD', (1,), {'id': 5,
+                                                           'mask': 'id'}))
+        self.assertEqual(second.result(), ('OTHER', (), {}))
+        self.assertEqual(batch.results(),
+                         [first.result(), second.result()])
+        self.assertEqual(batch.max_workers, 2)
+
+    @patch('SoftLayer.API.Client.call')
+    def test_batch_errors(self, _call):
+        error = SoftLayer.SoftLayerAPIError('SoftLayer_Exception', 'Error')
+
+        def fake_call(service, method, *args, **kwargs):
+            if method == 'FAIL':
+                raise error
+            return method
+        _call.side_effect = fake_call
+
+        with self.client.batch() as batch:
+            batch['SERVICE'].METHOD()
+            failed = batch['SERVICE'].FAIL()
+            batch['SERVICE'].OTHER()
+
+        self.assertEqual(batch.results(), ['METHOD', error, 'OTHER'])
+        self.assertRaises(SoftLayer.SoftLayerAPIError, failed.result)
+
+    def test_batch_default_workers(self):
+        batch = self.client.batch()
+        self.assertEqual(batch.max_workers,
+                         self.client.connection_pool.pool_maxsize)
+        self.assertEqual(batch.results(), [])
+        self.assertIn("Batch", repr(batch))
+
+
+class APICachedClient(unittest.TestCase):
+    def setUp(self):
+        self.cache = ResponseCache(ttls={'SERVICE.METHOD': 60})
+        self.client = SoftLayer.Client(
+            username='doesnotexist', api_key='issurelywrong',
+            endpoint_url="ENDPOINT", cache=self.cache)
+
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_cached_call(self, make_xml_rpc_api_call):
+        make_xml_rpc_api_call.return_value = {'id': 1}
+
+        self.assertEqual(self.client['SERVICE'].METHOD(id=1), {'id': 1})
+        self.assertEqual(self.client['SERVICE'].METHOD(id=1), {'id': 1})
+        self.assertEqual(make_xml_rpc_api_call.call_count, 1)
+
+        # Different arguments aren't served from the cache
+        self.client['SERVICE'].METHOD(id=2)
+        self.client['SERVICE'].METHOD(id=1, mask='id')
+        self.assertEqual(make_xml_rpc_api_call.call_count, 3)
+        self.assertEqual(self.cache.stats(),
+                         {'hits': 1, 'misses': 3, 'size': 3})
+
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_uncached_method(self, make_xml_rpc_api_call):
+        self.client['SERVICE'].getObject()
+        self.client['SERVICE'].getObject()
+        self.assertEqual(make_xml_rpc_api_call.call_count, 2)
+
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_invalidated_by_mutating_call(self, make_xml_rpc_api_call):
+        self.client['SERVICE'].METHOD()
+        self.client['SERVICE'].editObject({})
+        self.client['SERVICE'].METHOD()
+        self.assertEqual(make_xml_rpc_api_call.call_count, 3)
+
+    @patch('SoftLayer.API.make_xml_rpc_api_call')
+    def test_errors_not_cached(self, make_xml_rpc_api_call):
+        make_xml_rpc_api_call.side_effect = [
+            SoftLayer.SoftLayerAPIError('SoftLayer_Exception', 'Error'),
+            {'id': 1}]
+        self.assertRaises(SoftLayer.SoftLayerAPIError,
+                          self.client['SERVICE'].METHOD)
+        self.assertEqual(self.client['SERVICE'].METHOD(), {'id': 1})
+
+
 class APITimedClient(unittest.TestCase):
     def setUp(self):
         self.client = SoftLayer.TimedClient(
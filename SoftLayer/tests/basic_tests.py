@@ -34,6 +34,25 @@ class TestExceptions(unittest.TestCase):
 
 class TestUtils(unittest.TestCase):
 
+    def test_short_service_name(self):
+        self.assertEqual(
+            SoftLayer.utils.short_service_name('SoftLayer_Account'), 'Account')
+        self.assertEqual(
+            SoftLayer.utils.short_service_name('Account'), 'Account')
+
+    def test_has_method_prefix(self):
+        has_prefix = SoftLayer.utils.has_method_prefix
+        self.assertTrue(has_prefix('setTags', ('get', 'set')))
+        self.assertTrue(has_prefix('set', ('set',)))
+        self.assertFalse(has_prefix('settleInvoice', ('set',)))
+        self.assertFalse(has_prefix('routerList', ('route',)))
+
+    def test_in_filter(self):
+        result = SoftLayer.utils.in_filter(set([1]))
+        self.assertEqual({'operation': 'in',
+                          'options': [{'name': 'data', 'value': [1]}]},
+                         result)
+
     def test_query_filter(self):
         result = SoftLayer.utils.query_filter('test')
         self.assertEqual({'operation': '_= test'}, result)
@@ -117,6 +136,25 @@ class TestLookup(unittest.TestCase):
         self.assertEqual(val, None)
 
 
+class TestLazyImports(unittest.TestCase):
+
+    def test_lazy_module(self):
+        json = SoftLayer.utils.LazyModule('json')
+        self.assertEqual(repr(json), '<LazyModule: json>')
+        self.assertEqual(json.dumps([1]), '[1]')
+        self.assertRaises(AttributeError, getattr, json, 'nope')
+
+    def test_managers(self):
+        from SoftLayer.managers.dns import DNSManager
+        self.assertIs(SoftLayer.DNSManager, DNSManager)
+        self.assertIs(SoftLayer.managers.DNSManager, DNSManager)
+        for name in SoftLayer.managers.__all__:
+            self.assertTrue(hasattr(SoftLayer, name))
+        self.assertRaises(AttributeError, getattr, SoftLayer, 'NopeManager')
+        self.assertRaises(AttributeError, getattr, SoftLayer.managers,
+                          'NopeManager')
+
+
 def is_a(string):
     if string == 'a':
         return ['this', 'is', 'a']
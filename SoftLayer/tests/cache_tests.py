@@ -0,0 +1,467 @@
+"""
+    SoftLayer.tests.cache_tests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :license: MIT, see LICENSE for more details.
+"""
+import os
+import shutil
+import tempfile
+import threading
+
+from mock import patch, Mock
+
+from SoftLayer import Client
+from SoftLayer.cache import ResponseCache, CatalogCache, SingleFlight, \
+    IdentifierIndex, PackageItemIndex, catalog_key
+from SoftLayer.metrics import CallRecord
+from SoftLayer.tests.fixtures import Account, Product_Package
+from SoftLayer.tests import unittest
+
+
+class ResponseCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ResponseCache(ttls={'Product_Package.getItems': 60,
+                                         'Account.getDomains': 30})
+
+    def test_make_key(self):
+        key = self.cache.make_key('SoftLayer_Product_Package', 'getItems',
+                                  (), {'id': 46, 'mask': 'id'})
+        self.assertEqual(key, self.cache.make_key(
+            'Product_Package', 'getItems', (), {'mask': 'id', 'id': 46}))
+
+        for kwargs in [{'id': 47, 'mask': 'id'},
+                       {'id': 46, 'mask': 'prices'},
+                       {'id': 46, 'mask': 'id', 'limit': 10},
+                       {'id': 46, 'mask': 'id', 'limit': 10, 'offset': 10},
+                       {'id': 46, 'mask': 'id', 'filter': {'items': {}}}]:
+            self.assertNotEqual(key, self.cache.make_key(
+                'Product_Package', 'getItems', (), kwargs))
+
+        self.assertNotEqual(key, self.cache.make_key(
+            'Product_Package', 'getItems', ('arg',), {'id': 46, 'mask': 'id'}))
+
+    def test_make_key_uncached_method(self):
+        self.assertIsNone(self.cache.make_key('Account', 'getObject', (), {}))
+
+        cache = ResponseCache(ttls={}, default_ttl=10)
+        self.assertIsNotNone(cache.make_key('Account', 'getObject', (), {}))
+
+    def test_get_set(self):
+        key = self.cache.make_key('Account', 'getDomains', (), {})
+        self.assertEqual(self.cache.get(key), (False, None))
+
+        response = [{'id': 1}]
+        self.cache.set(key, 'Account', 'getDomains', response)
+        self.assertEqual(self.cache.get(key), (True, [{'id': 1}]))
+
+        # Responses are copied so callers can't modify cached data
+        response[0]['id'] = 2
+        _, cached = self.cache.get(key)
+        cached[0]['id'] = 3
+        self.assertEqual(self.cache.get(key), (True, [{'id': 1}]))
+
+        self.assertEqual(self.cache.stats(),
+                         {'hits': 3, 'misses': 1, 'size': 1})
+
+    @patch('SoftLayer.cache.time.time')
+    def test_expiry(self, _time):
+        _time.return_value = 1000
+        key = self.cache.make_key('Account', 'getDomains', (), {})
+        self.cache.set(key, 'Account', 'getDomains', [])
+
+        _time.return_value = 1030
+        self.assertEqual(self.cache.get(key), (True, []))
+
+        _time.return_value = 1031
+        self.assertEqual(self.cache.get(key), (False, None))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(max_size=2, default_ttl=60)
+        cache.set('a', 'Account', 'getObject', 'a')
+        cache.set('b', 'Account', 'getObject', 'b')
+        cache.get('a')
+        cache.set('c', 'Account', 'getObject', 'c')
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get('a'), (True, 'a'))
+        self.assertEqual(cache.get('b'), (False, None))
+        self.assertEqual(cache.get('c'), (True, 'c'))
+
+    def test_invalidate(self):
+        items = self.cache.make_key('Product_Package', 'getItems', (), {})
+        domains = self.cache.make_key('Account', 'getDomains', (), {})
+        self.cache.set(items, 'Product_Package', 'getItems', [])
+        self.cache.set(domains, 'Account', 'getDomains', [])
+
+        self.cache.invalidate('SoftLayer_Account')
+        self.assertEqual(self.cache.get(domains), (False, None))
+        self.assertEqual(self.cache.get(items), (True, []))
+
+        self.cache.invalidate()
+        self.assertEqual(len(self.cache), 0)
+
+    def test_is_mutating(self):
+        for method in ['editObject', 'createObject', 'deleteObject',
+                       'placeOrder', 'setTags']:
+            self.assertTrue(self.cache.is_mutating(method))
+
+        for method in ['getObject', 'getItems', 'verifyOrder',
+                       'settleInvoice', 'updateableFields']:
+            self.assertFalse(self.cache.is_mutating(method))
+
+
+class SingleFlightTests(unittest.TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight()
+
+    def run_concurrently(self, func, count=5):
+        """ Calls flight.do(key, func) from count threads at once. func blocks
+            until every thread has joined the flight. """
+        release = threading.Event()
+        results = [None] * count
+
+        def slow():
+            release.wait(5)
+            return func()
+
+        def worker(index):
+            try:
+                results[index] = self.flight.do('key', slow)
+            except Exception as ex:  # pylint: disable=W0703
+                results[index] = ex
+
+        threads = [threading.Thread(target=worker, args=(i,))
+                   for i in range(count)]
+        for thread in threads:
+            thread.start()
+        while self.flight.stats()['calls'] < count:
+            threading.Event().wait(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_make_key(self):
+        key = self.flight.make_key('SoftLayer_Virtual_Guest', 'getObject',
+                                   (), {'id': 1, 'mask': 'id'})
+        self.assertEqual(key, self.flight.make_key(
+            'Virtual_Guest', 'getObject', (), {'mask': 'id', 'id': 1}))
+
+        for kwargs in [{'id': 2, 'mask': 'id'},
+                       {'id': 1, 'mask': 'id', 'headers': {'a': 1}},
+                       {'id': 1, 'mask': 'id', 'filter': {'id': {}}}]:
+            self.assertNotEqual(key, self.flight.make_key(
+                'Virtual_Guest', 'getObject', (), kwargs))
+
+        self.assertIsNone(self.flight.make_key(
+            'Virtual_Guest', 'editObject', ({},), {'id': 1}))
+
+    def test_do(self):
+        self.assertEqual(self.flight.do('key', lambda: 'result'), 'result')
+        self.assertEqual(self.flight.stats(),
+                         {'calls': 1, 'shared': 0, 'in_flight': 0})
+
+    def test_coalesces(self):
+        func = Mock(return_value={'id': 1, 'tags': []})
+        results = self.run_concurrently(func)
+
+        func.assert_called_once_with()
+        self.assertEqual(results, [{'id': 1, 'tags': []}] * 5)
+        # Every caller gets its own copy
+        self.assertEqual(len(set(id(result) for result in results)), 5)
+        self.assertEqual(self.flight.stats(),
+                         {'calls': 5, 'shared': 4, 'in_flight': 0})
+
+    def test_shares_errors(self):
+        error = ValueError('error')
+        func = Mock(side_effect=error)
+        results = self.run_concurrently(func)
+
+        func.assert_called_once_with()
+        self.assertEqual(results, [error] * 5)
+
+        # Later calls are made again
+        func.side_effect = None
+        self.assertEqual(self.flight.do('key', func), func.return_value)
+
+
+class CatalogCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cache = CatalogCache(path=os.path.join(self.path, 'catalog'),
+                                  max_age=100)
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_save_load(self):
+        self.assertIsNone(self.cache.load('package_50'))
+
+        data = {'categories': {'os': {'items': [{'id': 1}]}}}
+        self.cache.save('package_50', data)
+        age, loaded = self.cache.load('package_50')
+        self.assertEqual(loaded, data)
+        self.assertLess(age, 100)
+
+        self.cache.clear()
+        self.assertIsNone(self.cache.load('package_50'))
+
+    def test_version_mismatch(self):
+        self.cache.save('package_50', {})
+        with patch('SoftLayer.cache.VERSION', 'v0.0.1'):
+            self.assertIsNone(self.cache.load('package_50'))
+
+        self.cache.format_version = 0
+        self.assertIsNone(self.cache.load('package_50'))
+
+    def test_corrupt_entry(self):
+        self.cache.save('package_50', {})
+        with open(self.cache._filename('package_50'), 'wb') as entry:
+            entry.write(b'not gzip')
+        self.assertIsNone(self.cache.load('package_50'))
+
+    def test_unwritable(self):
+        cache = CatalogCache(path=os.path.join(self.path, 'file', 'catalog'))
+        open(os.path.join(self.path, 'file'), 'w').close()
+        cache.save('package_50', {})
+        self.assertIsNone(cache.load('package_50'))
+
+    def test_fetch(self):
+        loader = Mock(return_value={'id': 1})
+        self.assertEqual(self.cache.fetch('package_50', loader), {'id': 1})
+        self.assertEqual(self.cache.fetch('package_50', loader), {'id': 1})
+        self.assertEqual(loader.call_count, 1)
+
+    @patch('SoftLayer.cache.time.time')
+    def test_fetch_expired(self, _time):
+        _time.return_value = 1000
+        self.cache.save('package_50', {'id': 1})
+
+        _time.return_value = 1100
+        loader = Mock(return_value={'id': 2})
+        self.assertEqual(self.cache.fetch('package_50', loader), {'id': 2})
+        loader.assert_called_once_with()
+
+    @patch('SoftLayer.cache.time.time')
+    def test_fetch_background_refresh(self, _time):
+        _time.return_value = 1000
+        self.cache.save('package_50', {'id': 1})
+
+        _time.return_value = 1060
+        loader = Mock(return_value={'id': 2})
+        with patch.object(self.cache, '_refresh') as refresh:
+            self.assertEqual(self.cache.fetch('package_50', loader),
+                             {'id': 1})
+            refresh.assert_called_once_with('package_50', loader)
+
+        self.cache._refresh('package_50', loader).join()
+        self.assertEqual(self.cache.load('package_50')[1], {'id': 2})
+
+    @patch('SoftLayer.cache.time.time')
+    def test_fetch_max_age(self, _time):
+        _time.return_value = 1000
+        self.cache.save('package_50', {'id': 1})
+
+        _time.return_value = 1020
+        loader = Mock(return_value={'id': 2})
+        with patch.object(self.cache, '_refresh') as refresh:
+            self.assertEqual(self.cache.fetch('package_50', loader,
+                                              max_age=30), {'id': 1})
+            refresh.assert_called_once_with('package_50', loader)
+
+        _time.return_value = 1030
+        self.assertEqual(self.cache.fetch('package_50', loader, max_age=30),
+                         {'id': 2})
+
+    def test_refresh_thread_is_daemon(self):
+        loader = Mock(return_value={'id': 2})
+        thread = self.cache._refresh('package_50', loader)
+        self.assertTrue(thread.daemon)
+        thread.join()
+
+    def test_clients_dont_share_entries(self):
+        clients = [
+            Client(username='alice', api_key='key',
+                   endpoint_url='https://api.softlayer.com/xmlrpc/v3'),
+            Client(username='bob', api_key='key',
+                   endpoint_url='https://api.softlayer.com/xmlrpc/v3'),
+            Client(username='alice', api_key='key',
+                   endpoint_url='https://api.service.softlayer.com/xmlrpc/v3'),
+        ]
+        for number, client in enumerate(clients):
+            self.assertEqual(
+                self.cache.fetch(catalog_key(client, 'package_50'),
+                                 Mock(return_value={'id': number})),
+                {'id': number})
+
+        for number, client in enumerate(clients):
+            loader = Mock()
+            self.assertEqual(
+                self.cache.fetch(catalog_key(client, 'package_50'), loader),
+                {'id': number})
+            self.assertFalse(loader.called)
+
+
+class IdentifierIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.index = IdentifierIndex(ttl=300, negative_ttl=60)
+        self.loader = Mock(return_value=Account.getVirtualGuests)
+
+    def test_lookup(self):
+        lookup = self.index.lookup
+        self.assertEqual(lookup('guest', 'cci-test1', self.loader), [100])
+        self.assertEqual(lookup('guest', 'CCI-Test2.test.sftlyr.ws',
+                                self.loader), [104])
+        self.assertEqual(lookup('guest', '172.16.240.7', self.loader), [104])
+        self.assertEqual(lookup('guest', '10.45.19.37', self.loader), [100])
+        self.assertEqual(lookup('guest', '10.45.19.37', self.loader,
+                                fields=['public_ip']), [])
+        self.assertEqual(self.loader.call_count, 1)
+        self.assertEqual(self.index.stats()['size'], 2)
+
+    def test_lookup_many(self):
+        found = self.index.lookup_many(
+            'guest', ['cci-test1', '172.16.240.7', 'nope'], self.loader)
+        self.assertEqual(found, {'cci-test1': [100], '172.16.240.7': [104],
+                                 'nope': []})
+        self.assertEqual(self.loader.call_count, 1)
+
+        hardware = Mock(return_value=Account.getHardware)
+        self.assertEqual(self.index.lookup('hardware', 'hardware-test1',
+                                           hardware), [1000])
+        self.assertEqual(self.index.stats(), {
+            'sweeps': 2, 'hits': 3, 'misses': 1, 'size': 5})
+
+    def test_duplicate_hostnames(self):
+        self.loader.return_value = [
+            {'id': 1, 'hostname': 'web', 'fullyQualifiedDomainName': 'web.a'},
+            {'id': 2, 'hostname': 'web', 'fullyQualifiedDomainName': 'web.b'},
+            {'id': 3, 'hostname': 'db', 'primaryIpAddress': None}]
+        self.assertEqual(self.index.lookup('guest', 'web', self.loader),
+                         [1, 2])
+        self.assertEqual(self.index.lookup('guest', 'web.b', self.loader),
+                         [2])
+
+    @patch('SoftLayer.cache.time.time')
+    def test_ttl(self, now):
+        now.return_value = 1000
+        self.index.lookup('guest', 'cci-test1', self.loader)
+        now.return_value = 1299
+        self.index.lookup('guest', 'cci-test1', self.loader)
+        self.assertEqual(self.loader.call_count, 1)
+
+        now.return_value = 1300
+        self.index.lookup('guest', 'cci-test1', self.loader)
+        self.assertEqual(self.loader.call_count, 2)
+
+    @patch('SoftLayer.cache.time.time')
+    def test_negative(self, now):
+        now.return_value = 1000
+        self.assertEqual(self.index.lookup('guest', 'new', self.loader), [])
+        now.return_value = 1059
+        self.assertEqual(self.index.lookup('guest', 'new', self.loader), [])
+        self.assertEqual(self.loader.call_count, 1)
+
+        # Once the miss expires and the index is old enough, a new object
+        # is found by sweeping again
+        self.loader.return_value = [{'id': 1, 'hostname': 'new'}]
+        now.return_value = 1061
+        self.assertEqual(self.index.lookup('guest', 'new', self.loader), [1])
+        self.assertEqual(self.loader.call_count, 2)
+
+        # Unknown identifiers don't sweep while the index is young
+        now.return_value = 1100
+        self.assertEqual(self.index.lookup('guest', 'other', self.loader), [])
+        self.assertEqual(self.loader.call_count, 2)
+
+    def test_indexable(self):
+        self.assertTrue(self.index.indexable('web01'))
+        self.assertTrue(self.index.indexable('web01.example.com'))
+        self.assertFalse(self.index.indexable('web*'))
+        self.assertFalse(self.index.indexable('^= web'))
+        self.assertFalse(self.index.indexable(' '))
+
+    def test_invalidate(self):
+        self.index.lookup('guest', 'cci-test1', self.loader)
+        self.index(CallRecord('SoftLayer_Virtual_Guest', 'getObject'))
+        self.index.lookup('guest', 'cci-test1', self.loader)
+        self.assertEqual(self.loader.call_count, 1)
+
+        self.index(CallRecord('SoftLayer_Virtual_Guest', 'editObject'))
+        self.index.lookup('guest', 'cci-test1', self.loader)
+        self.assertEqual(self.loader.call_count, 2)
+
+    def test_invalidated_while_sweeping(self):
+        def loader():
+            self.index.invalidate()
+            return Account.getVirtualGuests
+
+        self.assertEqual(self.index.lookup('guest', 'cci-test1', loader),
+                         [100])
+        self.assertEqual(self.index.stats()['size'], 0)
+
+
+class PackageItemIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.index = PackageItemIndex(ttl=3600)
+        self.loader = Mock(return_value=Product_Package.getItems)
+
+    def _price(self, *args, **kwargs):
+        item = self.index.find(46, *args, **kwargs)
+        return item and item['prices'][0]['id']
+
+    def test_find(self):
+        # By category id and code, with an int or string capacity
+        self.assertEqual(self._price(3, 2, self.loader), 1133)
+        self.assertEqual(self._price('RAM', '2', self.loader), 1133)
+        self.assertEqual(self._price(3, 4, self.loader), None)
+        self.assertEqual(self._price(26, 1000, self.loader), 1122)
+        self.assertEqual(self.loader.call_count, 1)
+        self.assertEqual(self.index.stats(), {'loads': 1, 'packages': 1})
+
+    def test_find_qualifiers(self):
+        self.assertEqual(self._price(80, 4, self.loader,
+                                     include=['Private']), 1007)
+        self.assertEqual(self._price(80, 4, self.loader,
+                                     exclude=['Private']), 1144)
+        self.assertEqual(self._price('static_ipv6_addresses', 64,
+                                     self.loader, include=['Portable']),
+                         664641)
+        self.assertEqual(self._price('sov_sec_ip_addresses_pub', 4,
+                                     self.loader, include=['Global']),
+                         None)
+
+    def test_packages(self):
+        self.index.find(46, 3, 2, self.loader)
+        self.index.find(0, 3, 2, self.loader)
+        self.index.find(46, 80, 4, self.loader)
+        self.assertEqual(self.loader.call_count, 2)
+
+    @patch('SoftLayer.cache.time.time')
+    def test_ttl(self, _time):
+        _time.return_value = 1000
+        self.index.find(46, 3, 2, self.loader)
+        _time.return_value = 1000 + 3599
+        self.index.find(46, 3, 2, self.loader)
+        self.assertEqual(self.loader.call_count, 1)
+
+        _time.return_value = 1000 + 3600
+        self.index.find(46, 3, 2, self.loader)
+        self.assertEqual(self.loader.call_count, 2)
+
+    def test_invalidate(self):
+        self.index.find(46, 3, 2, self.loader)
+        self.index.invalidate(0)
+        self.index.find(46, 3, 2, self.loader)
+        self.assertEqual(self.loader.call_count, 1)
+
+        self.index.invalidate(46)
+        self.index.find(46, 3, 2, self.loader)
+        self.assertEqual(self.loader.call_count, 2)
@@ -0,0 +1,221 @@
+"""
+    SoftLayer.tests.cassette_tests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :license: MIT, see LICENSE for more details.
+"""
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from mock import patch
+
+import SoftLayer
+from SoftLayer import CassetteMiss, TransportError
+from SoftLayer.cassette import Cassette, request_key
+from SoftLayer.retry import RetryPolicy
+from SoftLayer.transports import make_rest_api_call
+from SoftLayer.tests import unittest
+from SoftLayer.tests.fixtures import Account, Resource_Metadata
+from SoftLayer.tests.standin import StandInHandler, StandInServer
+from SoftLayer.utils import xmlrpc_client
+
+
+GUESTS = Account.getVirtualGuests
+
+
+class CookieHandler(StandInHandler):
+    """ Sets a cookie on every response """
+    def end_headers(self):
+        self.send_header('Set-Cookie', 'secret=1')
+        StandInHandler.end_headers(self)
+
+
+class CountingServer(StandInServer):
+    """ Answers Account.getObject with the number of calls seen so far """
+    handler_class = CookieHandler
+
+    @property
+    def hits(self):
+        """ The number of calls seen so far """
+        return len(self.requests)
+
+    def call(self, service, method, *args, **kwargs):
+        result = StandInServer.call(self, service, method, *args, **kwargs)
+        if (service, method) == ('Account', 'getObject'):
+            return self.hits
+        return result
+
+
+class RequestKeyTests(unittest.TestCase):
+
+    def body(self, method='getObject', headers=None, *args):
+        return xmlrpc_client.dumps(({'headers': headers},) + args,
+                                   methodname=method, allow_none=True)
+
+    def test_ignores_credentials_and_host(self):
+        key = request_key('POST', 'https://api.example.com/SoftLayer_Account',
+                          self.body(headers={'authenticate': {'apiKey': 'a'},
+                                             'resultLimit': {'limit': 1}}))
+        self.assertEqual(key, request_key(
+            'post', 'http://127.0.0.1:1234/SoftLayer_Account',
+            self.body(headers={'resultLimit': {'limit': 1},
+                               'authenticate': {'apiKey': 'b'}})))
+
+    def test_differences(self):
+        url = 'http://127.0.0.1/SoftLayer_Account'
+        key = request_key('POST', url, self.body())
+        self.assertNotEqual(key, request_key('POST', url, self.body('nope')))
+        self.assertNotEqual(key, request_key(
+            'POST', url, self.body(headers={'resultLimit': {'limit': 1}})))
+        self.assertNotEqual(key, request_key('POST', url,
+                                             self.body('getObject', None, 1)))
+        self.assertNotEqual(key, request_key('POST', url + '_', self.body()))
+        self.assertNotEqual(request_key('GET', url + '?a=1'),
+                            request_key('GET', url + '?a=2'))
+        self.assertEqual(request_key('GET', url, b'not xml'),
+                         request_key('GET', url, 'not xml'))
+
+
+class CassetteTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = CountingServer(
+            statuses={'Account.unavailable': 503}).start()
+        cls.endpoint = cls.server.endpoint_url
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.server.requests.clear()
+        self.path = tempfile.mkdtemp()
+        self.filename = os.path.join(self.path, 'cassette.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def client(self, cassette, **kwargs):
+        return SoftLayer.Client(username='user', api_key='secret',
+                                endpoint_url=self.endpoint,
+                                cassette=cassette, **kwargs)
+
+    def record(self, func, filename=None):
+        with Cassette(filename or self.filename, mode='record') as cassette:
+            func(self.client(cassette))
+        return cassette
+
+    def test_record_replay(self):
+        def calls(client):
+            return [client['Account'].getObject(),
+                    client['Account'].getObject(),
+                    client['Account'].getObject(id=1),
+                    list(client['Account'].getVirtualGuests(iter=True,
+                                                            chunk=2))]
+
+        recorded = []
+        cassette = self.record(lambda client: recorded.extend(calls(client)))
+        self.assertEqual(cassette.stats()['recorded'], 5)
+        self.assertEqual(recorded, [1, 2, 3, GUESTS])
+
+        cassette = Cassette(self.filename)
+        self.assertEqual(calls(self.client(cassette)), recorded)
+        self.assertEqual(self.server.hits, 5)
+        self.assertEqual(cassette.stats(),
+                         {'recorded': 0, 'replayed': 5, 'missed': 0})
+
+        # Once the recorded responses run out the last one is repeated
+        client = self.client(cassette)
+        self.assertEqual(client['Account'].getObject(), 2)
+
+    def test_replay_other_credentials(self):
+        self.record(lambda client: client['Account'].getObject())
+
+        client = self.client(Cassette(self.filename))
+        client.auth = None
+        self.assertEqual(client['Account'].getObject(), 1)
+
+    def test_miss(self):
+        self.record(lambda client: client['Account'].getObject())
+
+        client = self.client(Cassette(self.filename),
+                             retry=RetryPolicy(backoff=0))
+        self.assertRaises(CassetteMiss, client['Account'].getObject, id=1)
+        self.assertEqual(client.cassette.stats()['missed'], 1)
+
+    def test_http_error(self):
+        def call(client):
+            self.assertRaises(TransportError, client['Account'].unavailable)
+        self.record(call)
+
+        try:
+            self.client(Cassette(self.filename))['Account'].unavailable()
+        except TransportError as ex:
+            self.assertEqual(ex.faultCode, 503)
+        else:
+            self.fail('TransportError not raised')
+
+    def test_stream(self):
+        self.record(lambda client: client['Account'].getVirtualGuests())
+        self.server.requests.clear()
+
+        client = self.client(Cassette(self.filename))
+        self.assertEqual(list(client['Account'].getVirtualGuests(
+            stream=True)), GUESTS)
+        self.assertEqual(self.server.hits, 0)
+
+    def test_rest(self):
+        url = self.endpoint + '/SoftLayer_Resource_Metadata/getId.json'
+        with Cassette(self.filename, mode='record') as cassette:
+            session = self.client(cassette).connection_pool.get_session()
+            self.assertEqual(make_rest_api_call('GET', url, session=session),
+                             Resource_Metadata.getId)
+
+        session = self.client(Cassette(self.filename)) \
+            .connection_pool.get_session()
+        self.assertEqual(make_rest_api_call('GET', url, session=session),
+                         Resource_Metadata.getId)
+        self.assertEqual(self.server.hits, 1)
+
+    def test_file_contents(self):
+        self.record(lambda client: client['Account'].getObject(
+            raw_headers={'Authorization': 'Basic secret'}))
+
+        with open(self.filename) as cassette:
+            exchange, = [json.loads(line) for line in cassette]
+        self.assertEqual(exchange['method'], 'POST')
+        self.assertEqual(exchange['status'], 200)
+        self.assertIn('<int>1</int>', exchange['body'])
+        self.assertIn('User-Agent', exchange['request_headers'])
+        self.assertNotIn('Authorization', exchange['request_headers'])
+        self.assertNotIn('Set-Cookie', exchange['headers'])
+        self.assertNotIn('secret', json.dumps(exchange))
+        self.assertGreater(exchange['elapsed'], 0)
+
+    def test_gzip(self):
+        filename = self.filename + '.gz'
+        self.record(lambda client: client['Account'].getObject(), filename)
+
+        with gzip.open(filename) as cassette:
+            self.assertEqual(len(cassette.readlines()), 1)
+        self.assertEqual(
+            self.client(Cassette(filename))['Account'].getObject(), 1)
+
+    @patch('SoftLayer.cassette.time.sleep')
+    def test_keep_latency(self, sleep):
+        self.record(lambda client: client['Account'].getObject())
+
+        self.client(Cassette(self.filename))['Account'].getObject()
+        self.assertFalse(sleep.called)
+
+        self.client(Cassette(self.filename, keep_latency=True))[
+            'Account'].getObject()
+        self.assertEqual(sleep.call_count, 1)
+        self.assertGreater(sleep.call_args[0][0], 0)
+
+    def test_invalid_mode(self):
+        self.assertRaises(ValueError, Cassette, self.filename, mode='nope')
@@ -63,8 +63,20 @@ class TestGetClientSettingsArgs(unittest.TestCase):
             'timeout': None,
             'proxy': None,
             'auth': None,
+            'pool_connections': None,
+            'pool_maxsize': None,
+            'pool_idle_timeout': None,
         })
 
+    def test_pool_settings(self):
+        result = get_client_settings_args(pool_connections=2,
+                                          pool_maxsize=20,
+                                          pool_idle_timeout=30)
+
+        self.assertEqual(result['pool_connections'], 2)
+        self.assertEqual(result['pool_maxsize'], 20)
+        self.assertEqual(result['pool_idle_timeout'], 30)
+
     def test_with_auth(self):
         auth = Mock()
         result = get_client_settings_args(auth=auth)
@@ -102,6 +114,7 @@ class TestGetClientSettingsConfigFile(unittest.TestCase):
         self.assertEqual(result['endpoint_url'], config_parser().get())
         self.assertEqual(result['timeout'], config_parser().get())
         self.assertEqual(result['proxy'], config_parser().get())
+        self.assertEqual(result['pool_maxsize'], config_parser().get())
         self.assertEqual(result['auth'].username, config_parser().get())
         self.assertEqual(result['auth'].api_key, config_parser().get())
 
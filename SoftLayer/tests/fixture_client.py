@@ -7,6 +7,8 @@
 from mock import MagicMock
 from importlib import import_module
 
+from SoftLayer.API import Batch
+
 
 class FixtureClient(object):
 
@@ -23,6 +25,9 @@ class FixtureClient(object):
 
         return service
 
+    def batch(self, max_workers=10):
+        return Batch(self, max_workers=max_workers)
+
     def reset_mock(self):
         self.loaded_services = {}
 
@@ -0,0 +1,16 @@
+getBackendMacAddresses = ['06:00:00:00:00:00']
+getDatacenter = 'dal01'
+getDatacenterId = 1234
+getDomain = 'example.com'
+getFrontendMacAddresses = ['06:00:00:00:00:01']
+getFullyQualifiedDomainName = 'test.example.com'
+getHostname = 'test'
+getId = 1000
+getPrimaryBackendIpAddress = '10.0.0.1'
+getPrimaryIpAddress = '172.16.0.1'
+getProvisionState = 'COMPLETE'
+getRouter = 'fcr01.dal01'
+getTags = ['production']
+getUserMetadata = 'user_data'
+getVlanIds = [10, 11]
+getVlans = [100, 101]
@@ -4,7 +4,8 @@
 
     :license: MIT, see LICENSE for more details.
 """
-from SoftLayer import CCIManager
+from SoftLayer import CCIManager, SoftLayerAPIError, WaitTimeout
+from SoftLayer.cache import IdentifierIndex, INDEX_MASK
 from SoftLayer.tests import unittest, FixtureClient
 from SoftLayer.tests.fixtures import Virtual_Guest
 
@@ -101,6 +102,35 @@ class CCITests(unittest.TestCase):
         _id = self.cci._get_ids_from_hostname('cci-test1')
         self.assertEqual(_id, [100, 104])
 
+    def test_resolve_ids_index(self):
+        self.client.identifier_index = IdentifierIndex()
+        cci = CCIManager(self.client)
+        service = self.client['Account']
+
+        self.assertEqual(cci.resolve_ids('cci-test2'), [104])
+        self.assertEqual(cci.resolve_ids('cci-test1.test.sftlyr.ws'), [100])
+        self.assertEqual(cci.resolve_ids('172.16.240.7'), [104])
+        self.assertEqual(cci.resolve_ids('10.45.19.37'), [100])
+        self.assertEqual(cci.resolve_ids('nope'), [])
+        service.getVirtualGuests.assert_called_once_with(
+            mask=INDEX_MASK, iter=True, chunk=500)
+
+        # Wildcards still need the API
+        cci.resolve_ids('cci-*')
+        service.getVirtualGuests.assert_called_with(
+            mask='id', filter={
+                'virtualGuests': {'hostname': {'operation': '^= cci-'}}})
+
+    def test_resolve_many(self):
+        service = self.client['Account']
+        found = self.cci.resolve_many(['cci-test1', '172.16.240.7', '42',
+                                       'nope'])
+        self.assertEqual(found, {'cci-test1': [100], '172.16.240.7': [104],
+                                 '42': [42], 'nope': []})
+        service.getVirtualGuests.assert_called_once_with(
+            mask=INDEX_MASK, iter=True, chunk=500)
+        self.assertIsNone(self.cci.identifier_index)
+
     def test_get_instance(self):
         result = self.cci.get_instance(100)
         self.client['Virtual_Guest'].getObject.assert_called_once_with(
@@ -140,6 +170,72 @@ class CCITests(unittest.TestCase):
         self.client['Virtual_Guest'].createObject.assert_called_once_with(
             {'test': 1, 'verify': 1})
 
+    def test_create_instances(self):
+        specs = [{'cpus': 1, 'memory': 1024, 'hostname': 'web%s' % i,
+                  'domain': 'example.com', 'os_code': 'UBUNTU_LATEST'}
+                 for i in range(5)]
+        guest = {'id': 1, 'createDate': 'now', 'globalIdentifier': 'guid'}
+        f = self.client['Virtual_Guest'].createObjects
+        f.side_effect = lambda templates: [guest] * len(templates)
+
+        results = self.cci.create_instances(specs, batch_size=2)
+
+        self.assertEqual(results, [guest] * 5)
+        self.assertEqual([len(args[0]) for args, _ in f.call_args_list],
+                         [2, 2, 1])
+        self.assertEqual(f.call_args_list[0][0][0][1]['hostname'], 'web1')
+        self.assertFalse(
+            self.client['Virtual_Guest'].generateOrderTemplate.called)
+
+    def test_create_instances_errors(self):
+        specs = [{'cpus': 1, 'memory': 1024, 'hostname': 'web%s' % i,
+                  'domain': 'example.com', 'os_code': 'UBUNTU_LATEST'}
+                 for i in range(5)]
+        specs[0] = {'hostname': 'invalid'}
+        specs[1] = dict(specs[1], nope=True)
+        error = SoftLayerAPIError('SoftLayer_Exception', 'Out of stock')
+        f = self.client['Virtual_Guest'].createObjects
+        f.side_effect = [[{'id': 1}, {'id': 2}], error]
+
+        results = self.cci.create_instances(specs, batch_size=2)
+
+        self.assertIsInstance(results[0], ValueError)
+        self.assertIsInstance(results[1], TypeError)
+        self.assertEqual(results[2:], [{'id': 1}, {'id': 2}, error])
+        self.assertEqual(f.call_count, 2)
+
+    def test_create_instances_verify(self):
+        specs = [{'cpus': 1, 'memory': 1024, 'hostname': 'web%s' % i,
+                  'domain': 'example.com', 'os_code': 'UBUNTU_LATEST'}
+                 for i in range(3)]
+        error = SoftLayerAPIError('SoftLayer_Exception', 'Invalid VLAN')
+
+        def verify(template):
+            if template['hostname'] == 'web1':
+                raise error
+            return {'prices': []}
+        self.client['Virtual_Guest'].generateOrderTemplate.side_effect = \
+            verify
+        f = self.client['Virtual_Guest'].createObjects
+        f.side_effect = lambda templates: [
+            {'id': template['hostname']} for template in templates]
+
+        results = self.cci.create_instances(specs, verify=True)
+
+        self.assertEqual(results, [{'id': 'web0'}, error, {'id': 'web2'}])
+        f.assert_called_once_with([ANY, ANY])
+
+    def test_verify_create_instances(self):
+        specs = [{'cpus': 1, 'memory': 1024, 'hostname': 'web',
+                  'domain': 'example.com', 'os_code': 'UBUNTU_LATEST'},
+                 {'cpus': 1}]
+        results = self.cci.verify_create_instances(specs)
+
+        self.assertEqual(results[0], Virtual_Guest.generateOrderTemplate)
+        self.assertIsInstance(results[1], ValueError)
+        self.client['Virtual_Guest'].generateOrderTemplate\
+            .assert_called_once_with(ANY)
+
     def test_generate_os_and_image(self):
         self.assertRaises(
             ValueError,
@@ -549,6 +645,20 @@ class CCITests(unittest.TestCase):
         args = {'cpus': 4, 'memory': 2, 'nic_speed': 1000, 'public': 1000}
         orderClient.placeOrder.called_once_with(1, **args)
 
+    def test_upgrade_prices(self):
+        order = self.client['Product_Order']
+        self.cci.upgrade(1, cpus=4, public=False)
+        self.assertEqual(order.placeOrder.call_args[0][0]['prices'],
+                         [{'id': 1007}])
+
+        self.cci.upgrade(1, cpus=4, memory=2, nic_speed=1000)
+        self.assertEqual(order.placeOrder.call_args[0][0]['prices'],
+                         [{'id': 1144}, {'id': 1133}, {'id': 1122}])
+
+        # The package is fetched once for both upgrades
+        self.assertEqual(
+            self.client['Product_Package'].getItems.call_count, 1)
+
     def test_get_item_id_for_upgrade(self):
         item_id = 0
         package_items = self.client['Product_Package'].getItems(id=46)
@@ -721,3 +831,50 @@ class CCIWaitReadyGoTests(unittest.TestCase):
         _sleep.assert_has_calls([
             call(10), call(10), call(10), call(10), call(10),
             call(10), call(10), call(10), call(10)])
+
+    @patch('SoftLayer.managers.cci.time')
+    @patch('SoftLayer.managers.cci.sleep')
+    def test_ready_many(self, _sleep, _time):
+        _time.return_value = 0
+        guests = self.client['Account'].getVirtualGuests
+        guests.side_effect = [
+            [{'id': 1}, {'id': 2}, {'id': 3, 'provisionDate': 'aaa'}],
+            [{'id': 1, 'provisionDate': 'aaa',
+              'activeTransaction': {'id': 5},
+              'lastOperatingSystemReload': {'id': 5}}, {'id': 2}],
+            [{'id': 1}, {'id': 2}],
+            [{'id': 1}, {'id': 2, 'provisionDate': 'aaa'}],
+            [{'id': 1, 'provisionDate': 'aaa'}],
+        ]
+
+        ready = list(self.cci.wait_for_ready_many([1, 2, 3, 3], 600))
+        self.assertEqual(ready, [3, 2, 1])
+        self.assertEqual(guests.call_count, 5)
+        guests.assert_any_call(
+            mask='id,provisionDate,activeTransaction.id,'
+                 'lastOperatingSystemReload.id',
+            filter={'virtualGuests': {'id': {
+                'operation': 'in',
+                'options': [{'name': 'data', 'value': [1, 2, 3]}]}}})
+        self.assertEqual(
+            guests.call_args[1]['filter']['virtualGuests']['id'],
+            {'operation': 'in', 'options': [{'name': 'data', 'value': [1]}]})
+        # Waits grow while nothing is ready and reset when something is
+        _sleep.assert_has_calls([call(1), call(1), call(1.5), call(1)])
+
+    @patch('SoftLayer.managers.cci.time')
+    @patch('SoftLayer.managers.cci.sleep')
+    def test_ready_many_timeout(self, _sleep, _time):
+        _time.side_effect = [0, 5, 9, 12]
+        guests = self.client['Account'].getVirtualGuests
+        guests.return_value = [{'id': 1}, {'id': 2}]
+
+        waiting = self.cci.wait_for_ready_many([1, 2], 10, delay=4,
+                                               max_delay=5)
+        try:
+            next(waiting)
+        except WaitTimeout as ex:
+            self.assertEqual(ex.pending, [1, 2])
+        else:
+            self.fail('WaitTimeout not raised')
+        _sleep.assert_has_calls([call(4), call(1)])
@@ -4,13 +4,16 @@
 
     :license: MIT, see LICENSE for more details.
 """
-from SoftLayer import HardwareManager
-from SoftLayer.managers.hardware import get_default_value
+from SoftLayer import HardwareManager, SoftLayerAPIError, WaitTimeout
+from SoftLayer.exceptions import TransportError
+from SoftLayer.cache import IdentifierIndex, INDEX_MASK, catalog_key
+from SoftLayer.managers.hardware import (
+    get_default_value, HardwareTracker, PACKAGE_LIST_TTL)
 from SoftLayer.tests import unittest, FixtureClient
 from SoftLayer.tests.fixtures import (
     Hardware_Server, Account, Billing_Item, Ticket)
 
-from mock import ANY, call, patch
+from mock import ANY, call, patch, Mock, MagicMock
 
 
 class HardwareTests(unittest.TestCase):
@@ -77,6 +80,22 @@ class HardwareTests(unittest.TestCase):
         _id = self.hardware._get_ids_from_hostname('hardware-test1')
         self.assertEqual(_id, [1000, 1001, 1002])
 
+    def test_resolve_many(self):
+        service = self.client['Account']
+        found = self.hardware.resolve_many([
+            'hardware-test2', 'hardware-test1.test.sftlyr.ws', '10.1.0.4'])
+        self.assertEqual(found, {'hardware-test2': [1001],
+                                 'hardware-test1.test.sftlyr.ws': [1000],
+                                 '10.1.0.4': [1002]})
+        service.getHardware.assert_called_once_with(
+            mask=INDEX_MASK, iter=True, chunk=500)
+
+        self.client.identifier_index = IdentifierIndex()
+        hardware = HardwareManager(self.client)
+        self.assertEqual(hardware.resolve_ids('172.16.4.94'), [1001])
+        self.assertEqual(hardware.resolve_ids('hardware-test1'), [1000])
+        self.assertEqual(service.getHardware.call_count, 2)
+
     def test_get_hardware(self):
         result = self.hardware.get_hardware(1000)
 
@@ -275,10 +294,69 @@ class HardwareTests(unittest.TestCase):
         f.assert_called_once_with(speed, id=hw_id)
 
     def test_get_available_dedicated_server_packages(self):
+        result = self.hardware.get_available_dedicated_server_packages()
+
+        self.assertEqual(result, [
+            (13, 'Mock Testing Package', 'a thing'),
+            (27, 'An additional testing category', None)])
+        f = self.client['Product_Package'].getAllObjects
+        f.assert_called_once_with(
+            mask='mask[id, name, description]',
+            filter={'id': {'operation': 'in', 'options': [
+                {'name': 'data', 'value': ANY}]}})
+        self.assertFalse(self.client['Product_Package'].getObject.called)
+
+    def test_get_available_dedicated_server_packages_fallback(self):
+        package = self.client['Product_Package']
+        package.getAllObjects.side_effect = SoftLayerAPIError(
+            'SoftLayer_Exception_ObjectFilter', 'Unable to filter')
+
+        result = self.hardware.get_available_dedicated_server_packages()
+
+        # The fixture answers every getObject with package 13
+        self.assertEqual(result, [(13, 'Mock Testing Package', 'a thing')])
+        f = package.getObject
+        f.assert_has_calls([call(id=13, mask='mask[id, name, description]')])
+        self.assertEqual(f.call_count, 31)
+
+    def test_get_available_dedicated_server_packages_errors(self):
+        package = self.client['Product_Package']
+        for error in [
+                SoftLayerAPIError('SoftLayer_Exception_InvalidLegacyToken',
+                                  'Invalid API token'),
+                TransportError(0, 'Connection refused')]:
+            package.getAllObjects.side_effect = error
+            self.assertRaises(
+                type(error),
+                self.hardware.get_available_dedicated_server_packages)
+        self.assertFalse(package.getObject.called)
+
+    @patch('SoftLayer.managers.hardware.time')
+    def test_get_available_dedicated_server_packages_ttl(self, _time):
+        f = self.client['Product_Package'].getAllObjects
+        _time.return_value = 1000
+        first = self.hardware.get_available_dedicated_server_packages()
+        _time.return_value = 1000 + PACKAGE_LIST_TTL - 1
+        self.assertEqual(
+            self.hardware.get_available_dedicated_server_packages(), first)
+        self.assertEqual(f.call_count, 1)
+
+        _time.return_value = 1000 + PACKAGE_LIST_TTL
         self.hardware.get_available_dedicated_server_packages()
+        self.assertEqual(f.call_count, 2)
 
-        f = self.client['Product_Package'].getObject
-        f.assert_has_calls([call(id=13, mask='mask[id, name, description]')])
+    def test_get_available_dedicated_server_packages_cached(self):
+        catalog_cache = MagicMock()
+        catalog_cache.fetch.return_value = [{'id': 13, 'name': 'cached'}]
+        hardware = HardwareManager(self.client, catalog_cache=catalog_cache)
+
+        result = hardware.get_available_dedicated_server_packages()
+
+        self.assertEqual(result, [(13, 'cached', None)])
+        catalog_cache.fetch.assert_called_once_with(
+            catalog_key(self.client, 'dedicated_server_packages'), ANY,
+            max_age=PACKAGE_LIST_TTL)
+        self.assertFalse(self.client['Product_Package'].getAllObjects.called)
 
     def test_get_dedicated_server_options(self):
         package_id = 13
@@ -294,6 +372,29 @@ class HardwareTests(unittest.TestCase):
         f3 = self.client['Product_Package'].getCategories
         f3.assert_called_once_with(id=package_id)
 
+    def test_catalog_cache(self):
+        catalog_cache = Mock()
+        catalog_cache.fetch.side_effect = lambda key, loader: loader()
+        hardware = HardwareManager(self.client, catalog_cache=catalog_cache)
+
+        hardware.get_bare_metal_create_options()
+        catalog_cache.fetch.assert_has_calls([
+            call(catalog_key(self.client, 'bare_metal_package_id'), ANY),
+            call(catalog_key(self.client, 'package_50'), ANY),
+        ])
+
+        catalog_cache.fetch.side_effect = None
+        catalog_cache.fetch.return_value = {'categories': {}}
+        self.assertEqual(hardware.get_dedicated_server_create_options(13),
+                         {'categories': {}})
+        catalog_cache.fetch.assert_called_with(
+            catalog_key(self.client, 'package_13'), ANY)
+
+    def test_catalog_cache_from_client(self):
+        self.client.catalog_cache = Mock()
+        hardware = HardwareManager(self.client)
+        self.assertEqual(hardware.catalog_cache, self.client.catalog_cache)
+
     def test_get_default_value_returns_none_for_unknown_category(self):
         package_options = {'categories': ['Cat1', 'Cat2']}
 
@@ -386,3 +487,123 @@ class HardwareTests(unittest.TestCase):
 
         self.hardware.edit(100, **args)
         service.editObject.assert_called_once_with(args, id=100)
+
+
+class HardwareTrackerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.hardware = HardwareManager(self.client)
+        self.getHardware = self.client['Account'].getHardware
+
+    @patch('SoftLayer.managers.hardware.time')
+    @patch('SoftLayer.managers.hardware.sleep')
+    def test_watch(self, _sleep, _time):
+        _time.return_value = 0
+        order = {'billingItem': {'orderItem': {'order': {'id': 7}}}}
+        reloading = {'provisionDate': 'a', 'activeTransaction': {'id': 3},
+                     'lastOperatingSystemReload': {'id': 3}}
+        self.getHardware.side_effect = [
+            # Tracked servers, then orders
+            [{'id': 1}], [],
+            [{'id': 1}], [dict(order, id=2)],
+            [{'id': 1, 'provisionDate': 'a'}, {'id': 2}], [],
+            [dict(reloading, id=2)],
+            [{'id': 2, 'provisionDate': 'a'}],
+        ]
+        tracker = self.hardware.tracker(delay=5)
+        tracker.track(1)
+        tracker.track_order(7)
+        changes = []
+        tracker.on_change(lambda server, old: changes.append(
+            (str(server), old, server.state)))
+
+        seen = [(server.id, server.state) for server in tracker.watch(600)]
+        self.assertEqual(seen, [(1, 'provisioning'), (2, 'provisioning'),
+                                (1, 'ready'), (2, 'reloading'),
+                                (2, 'ready')])
+        self.assertEqual(changes[0], ('1', None, 'provisioning'))
+        self.assertEqual(changes[1], ('2', 'ordered', 'provisioning'))
+        self.assertEqual(tracker.servers[2].order_id, 7)
+        self.assertEqual(self.getHardware.call_count, 8)
+
+        self.getHardware.assert_any_call(
+            mask=HardwareTracker.MASK, filter={'hardware': {'id': {
+                'operation': 'in',
+                'options': [{'name': 'data', 'value': [1]}]}}})
+        self.assertEqual(self.getHardware.call_args[1]['filter'], {
+            'hardware': {'id': {'operation': 'in',
+                                'options': [{'name': 'data', 'value': [2]}]}}})
+        _sleep.assert_has_calls([call(5), call(5), call(5), call(5)])
+
+    @patch('SoftLayer.managers.hardware.time')
+    @patch('SoftLayer.managers.hardware.sleep')
+    def test_watch_timeout(self, _sleep, _time):
+        _time.side_effect = [0, 0, 0, 0, 300]
+        self.getHardware.return_value = [{'id': 1}]
+        tracker = self.hardware.tracker(delay=10)
+        tracker.track(1)
+        tracker.track_order(7)
+
+        try:
+            list(tracker.watch(200))
+        except WaitTimeout as ex:
+            self.assertEqual([str(server) for server in ex.pending],
+                             ['order 7', '1'])
+        else:
+            self.fail('WaitTimeout not raised')
+        # Nothing changes after the first check, so the waits grow
+        self.assertEqual(_sleep.call_args_list, [call(10), call(10),
+                                                 call(15)])
+
+    @patch('SoftLayer.managers.hardware.time')
+    @patch('SoftLayer.managers.hardware.sleep')
+    def test_wait_for_ready(self, _sleep, _time):
+        _time.return_value = 0
+        self.getHardware.side_effect = [
+            # Not reloading yet, reloading, then done
+            [{'id': 1, 'provisionDate': 'a'}],
+            [{'id': 1, 'provisionDate': 'a', 'activeTransaction': {'id': 3},
+              'lastOperatingSystemReload': {'id': 3}}],
+            [{'id': 1, 'provisionDate': 'a', 'activeTransaction': {'id': 4},
+              'lastOperatingSystemReload': {'id': 3}}],
+        ]
+        self.assertTrue(self.hardware.wait_for_ready(1, 600, reload=True))
+        self.assertEqual(self.getHardware.call_count, 3)
+
+        self.getHardware.side_effect = None
+        self.getHardware.return_value = [{
+            'id': 1, 'provisionDate': 'a', 'activeTransaction': {'id': 4}}]
+        self.assertTrue(self.hardware.wait_for_ready(1, 0))
+        _time.side_effect = [0, 1]
+        self.assertFalse(self.hardware.wait_for_ready(1, 0, pending=True))
+
+    @patch('SoftLayer.managers.hardware.time')
+    @patch('SoftLayer.managers.hardware.sleep')
+    def test_wait_for_ready_reload_missed(self, _sleep, _time):
+        # 2013-08-01T12:00:00Z
+        _time.return_value = 1375358400
+        self.getHardware.side_effect = [
+            # Not reloading yet, then a new reload which ran between checks
+            [{'id': 1, 'provisionDate': 'a',
+              'lastOperatingSystemReload': {'id': 3}}],
+            [{'id': 1, 'provisionDate': 'a',
+              'lastOperatingSystemReload': {'id': 4}}],
+        ]
+        self.assertTrue(self.hardware.wait_for_ready(1, 600, reload=True))
+        self.assertEqual(self.getHardware.call_count, 2)
+
+        # Finished before the first check, after tracking started
+        self.getHardware.side_effect = None
+        self.getHardware.return_value = [{
+            'id': 1, 'provisionDate': 'a', 'lastOperatingSystemReload': {
+                'id': 4, 'statusChangeDate': '2013-08-01T06:30:00-06:00'}}]
+        self.assertTrue(self.hardware.wait_for_ready(1, 600, reload=True))
+        self.assertEqual(self.getHardware.call_count, 3)
+
+        # An older reload doesn't count
+        self.getHardware.return_value = [{
+            'id': 1, 'provisionDate': 'a', 'lastOperatingSystemReload': {
+                'id': 4, 'statusChangeDate': '2013-08-01T05:30:00-06:00'}}]
+        _time.side_effect = [1375358400, 1375358400, 1375358400, 1375359000]
+        self.assertFalse(self.hardware.wait_for_ready(1, 600, reload=True))
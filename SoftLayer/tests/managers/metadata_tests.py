@@ -91,6 +91,17 @@ class MetadataTestsMakeRequest(unittest.TestCase):
             http_headers={'User-Agent': USER_AGENT})
         self.assertEqual(make_api_call(), r)
 
+    @patch('SoftLayer.managers.metadata.make_rest_api_call')
+    def test_client_session(self, make_api_call):
+        client = MagicMock()
+        MetadataManager(client).make_request('something.json')
+        self.assertEqual(make_api_call.call_args[1]['session'],
+                         client.connection_pool.get_session())
+
+        # Clients without a connection pool, E.G. in tests
+        MetadataManager(MagicMock(spec=[])).make_request('something.json')
+        self.assertNotIn('session', make_api_call.call_args[1])
+
     @patch('SoftLayer.managers.metadata.make_rest_api_call')
     def test_raise_error(self, make_api_call):
         make_api_call.side_effect = SoftLayerAPIError(
@@ -72,6 +72,20 @@ class NetworkTests(unittest.TestCase):
 
         self.assertEqual(Product_Order.verifyOrder, result)
 
+    def test_add_subnet_prices(self):
+        order = self.client['Product_Order']
+        self.network.add_subnet('private', quantity=8, vlan_id=1234)
+        self.network.add_subnet('public', quantity=64, vlan_id=1234,
+                                version=6)
+        self.network.add_global_ip(version=6)
+
+        prices = [args[0]['prices'] for args, _
+                  in order.placeOrder.call_args_list]
+        self.assertEqual(prices, [[{'id': 88881}], [{'id': 664641}],
+                                  [{'id': 611}]])
+        self.client['Product_Package'].getItems.assert_called_once_with(
+            id=0, mask='itemCategory')
+
     def test_assign_global_ip(self):
         id = 9876
         target = '172.16.24.76'
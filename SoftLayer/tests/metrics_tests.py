@@ -0,0 +1,157 @@
+"""
+    SoftLayer.tests.metrics_tests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :license: MIT, see LICENSE for more details.
+"""
+import json
+import os
+import shutil
+import stat
+import tempfile
+
+from mock import Mock
+
+from SoftLayer.metrics import (
+    CallRecord, Histogram, MetricsRecorder, LoggingObserver)
+from SoftLayer.tests import unittest
+
+
+def make_record(name='Account.getObject', duration=0.5, **kwargs):
+    service, method = name.split('.')
+    record = CallRecord('SoftLayer_' + service, method)
+    record.duration = duration
+    for key, value in kwargs.items():
+        setattr(record, key, value)
+    return record
+
+
+class CallRecordTests(unittest.TestCase):
+
+    def test_record(self):
+        record = CallRecord('SoftLayer_Account', 'getObject')
+        self.assertEqual(record.name, 'Account.getObject')
+        self.assertEqual(record.retries, 0)
+        self.assertIsNone(record.duration)
+
+        record.update({'status': 200, 'network_time': 0.1})
+        record.finish()
+        data = record.to_dict()
+        self.assertEqual(data['status'], 200)
+        self.assertEqual(data['network_time'], 0.1)
+        self.assertGreaterEqual(data['duration'], 0)
+
+
+class HistogramTests(unittest.TestCase):
+
+    def test_percentiles(self):
+        histogram = Histogram()
+        self.assertIsNone(histogram.percentile(0.5))
+
+        for value in range(1, 101):
+            histogram.add(value)
+        self.assertEqual(histogram.percentile(0.5), 51)
+        self.assertEqual(histogram.percentile(0.95), 96)
+        self.assertEqual(histogram.percentile(0.99), 100)
+        self.assertEqual(histogram.summary(), {
+            'count': 100, 'sum': 5050, 'max': 100,
+            'p50': 51, 'p95': 96, 'p99': 100,
+        })
+
+    def test_bounded(self):
+        histogram = Histogram(max_samples=10)
+        for value in range(100):
+            histogram.add(value)
+        self.assertEqual(len(histogram.samples), 10)
+        self.assertEqual(histogram.percentile(0), 90)
+        self.assertEqual(histogram.count, 100)
+
+
+class MetricsRecorderTests(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = MetricsRecorder()
+        self.metrics(make_record(duration=0.5, serialize_time=0.01,
+                                 network_time=0.4, decode_time=0.05,
+                                 request_bytes=100, response_bytes=1000,
+                                 status=200))
+        self.metrics(make_record(duration=0.001, cache_hit=True))
+        self.metrics(make_record(duration=1.5, network_time=1.4, status=503,
+                                 retries=2, error='TransportError'))
+        self.metrics(make_record('Account.getDomains', duration=0.2,
+                                 coalesced=True))
+
+    def test_snapshot(self):
+        snapshot = self.metrics.snapshot()
+        self.assertEqual(sorted(snapshot),
+                         ['Account.getDomains', 'Account.getObject'])
+
+        stats = snapshot['Account.getObject']
+        self.assertEqual(stats['calls'], 3)
+        self.assertEqual(stats['errors'], 1)
+        self.assertEqual(stats['retries'], 2)
+        self.assertEqual(stats['cache_hits'], 1)
+        self.assertEqual(stats['request_bytes'], 100)
+        self.assertEqual(stats['response_bytes'], 1000)
+        self.assertEqual(stats['statuses'], {'200': 1, '503': 1})
+        self.assertEqual(stats['duration']['count'], 3)
+        self.assertEqual(stats['duration']['p50'], 0.5)
+        self.assertEqual(stats['duration']['max'], 1.5)
+        self.assertEqual(stats['network_time']['count'], 2)
+        self.assertEqual(stats['decode_time']['count'], 1)
+        self.assertEqual(snapshot['Account.getDomains']['coalesced'], 1)
+
+    def test_to_json(self):
+        self.assertEqual(json.loads(self.metrics.to_json()),
+                         self.metrics.snapshot())
+
+    def test_to_prometheus(self):
+        output = self.metrics.to_prometheus()
+        lines = output.splitlines()
+
+        self.assertIn('# TYPE softlayer_api_call_seconds summary', lines)
+        self.assertIn('softlayer_api_call_seconds{call="Account.getObject",'
+                      'phase="duration",quantile="0.99"} 1.5', lines)
+        self.assertIn('softlayer_api_call_seconds_count{'
+                      'call="Account.getObject",phase="network"} 2', lines)
+        self.assertIn('softlayer_api_retries_total{'
+                      'call="Account.getObject"} 2', lines)
+        self.assertIn('softlayer_api_responses_total{'
+                      'call="Account.getObject",status="503"} 1', lines)
+        self.assertTrue(output.endswith('\n'))
+
+        # Summaries without values have no quantiles
+        self.assertNotIn('softlayer_api_call_seconds{'
+                         'call="Account.getDomains",phase="network",'
+                         'quantile="0.5"}', output)
+
+    def test_write_prometheus(self):
+        path = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(path, 'softlayer.prom')
+            self.metrics.write_prometheus(filename, prefix='sl')
+            with open(filename) as prom_file:
+                self.assertEqual(prom_file.read(),
+                                 self.metrics.to_prometheus(prefix='sl'))
+            self.assertEqual(os.listdir(path), ['softlayer.prom'])
+            self.assertEqual(stat.S_IMODE(os.stat(filename).st_mode), 0o644)
+        finally:
+            shutil.rmtree(path)
+
+    def test_reset(self):
+        self.metrics.reset()
+        self.assertEqual(self.metrics.snapshot(), {})
+
+
+class LoggingObserverTests(unittest.TestCase):
+
+    def test_log_line(self):
+        logger = Mock()
+        observer = LoggingObserver(logger=logger, level=20)
+        observer(make_record(duration=0.5, network_time=0.25, status=200,
+                             request_bytes=100))
+
+        logger.log.assert_called_once_with(
+            20, 'Account.getObject status=200 duration=0.500000 '
+            'network_time=0.250000 request_bytes=100 retries=0 '
+            'cache_hit=False coalesced=False')
@@ -0,0 +1,141 @@
+"""
+    SoftLayer.tests.ratelimit_tests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :license: MIT, see LICENSE for more details.
+"""
+import threading
+
+from mock import patch
+
+from SoftLayer.ratelimit import RateLimiter, TokenBucket
+from SoftLayer.tests import unittest
+
+
+@patch('SoftLayer.ratelimit.time.time')
+class TokenBucketTests(unittest.TestCase):
+
+    def test_take(self, _time):
+        _time.return_value = 1000
+        bucket = TokenBucket(rate=2, burst=2)
+
+        self.assertEqual(bucket.take(), 0)
+        self.assertEqual(bucket.take(), 0)
+        # Empty; later callers queue up behind earlier ones
+        self.assertEqual(bucket.take(), 0.5)
+        self.assertEqual(bucket.take(), 1.0)
+
+        _time.return_value = 1010
+        self.assertEqual(bucket.take(), 0)
+
+    def test_default_burst(self, _time):
+        _time.return_value = 1000
+        self.assertEqual(TokenBucket(rate=10).burst, 10)
+        self.assertEqual(TokenBucket(rate=0.5).burst, 1)
+
+
+@patch('SoftLayer.ratelimit.time.sleep')
+@patch('SoftLayer.ratelimit.time.time')
+class RateLimiterTests(unittest.TestCase):
+
+    def test_unlimited(self, _time, sleep):
+        _time.return_value = 1000
+        limiter = RateLimiter()
+        for _ in range(100):
+            with limiter.limit('Account'):
+                pass
+        self.assertFalse(sleep.called)
+        self.assertEqual(limiter.stats()['calls'], 100)
+        self.assertEqual(limiter.stats()['delayed'], 0)
+
+    def test_rate(self, _time, sleep):
+        _time.return_value = 1000
+        limiter = RateLimiter(rate=2, burst=1)
+
+        with limiter.limit('Account'):
+            pass
+        with limiter.limit('Account'):
+            pass
+        sleep.assert_called_once_with(0.5)
+
+        stats = limiter.stats()
+        self.assertEqual(stats['calls'], 2)
+        self.assertEqual(stats['delayed'], 1)
+
+    def test_service_rates(self, _time, sleep):
+        _time.return_value = 1000
+        limiter = RateLimiter(service_rates={'SoftLayer_Virtual_Guest': 1})
+
+        with limiter.limit('Virtual_Guest'):
+            pass
+        for _ in range(5):
+            with limiter.limit('SoftLayer_Account'):
+                pass
+        self.assertFalse(sleep.called)
+
+        with limiter.limit('SoftLayer_Virtual_Guest'):
+            pass
+        sleep.assert_called_once_with(1.0)
+
+    def test_wait_stats(self, _time, sleep):
+        _time.return_value = 1000
+
+        def fake_sleep(seconds):
+            _time.return_value += seconds
+        sleep.side_effect = fake_sleep
+
+        limiter = RateLimiter(rate=0.5, burst=1)
+        with limiter.limit('Account'):
+            self.assertEqual(limiter.stats()['in_flight'], 1)
+        with limiter.limit('Account'):
+            pass
+        with limiter.limit('Account'):
+            pass
+
+        self.assertEqual(limiter.stats(), {
+            'calls': 3,
+            'delayed': 2,
+            'wait_time': 4,
+            'max_wait': 2,
+            'in_flight': 0,
+        })
+
+
+class RateLimiterConcurrencyTests(unittest.TestCase):
+
+    def test_max_concurrent(self):
+        limiter = RateLimiter(max_concurrent=2)
+        lock = threading.Lock()
+        state = {'running': 0, 'peak': 0}
+        release = threading.Event()
+
+        def work():
+            with limiter.limit('Account'):
+                with lock:
+                    state['running'] += 1
+                    state['peak'] = max(state['peak'], state['running'])
+                release.wait(5)
+                with lock:
+                    state['running'] -= 1
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(state['peak'], 2)
+        self.assertEqual(limiter.stats()['calls'], 6)
+        self.assertEqual(limiter.stats()['in_flight'], 0)
+
+    def test_releases_on_error(self):
+        limiter = RateLimiter(max_concurrent=1)
+
+        def fail():
+            with limiter.limit('Account'):
+                raise ValueError()
+
+        for _ in range(3):
+            self.assertRaises(ValueError, fail)
+        self.assertEqual(limiter.stats()['in_flight'], 0)
@@ -0,0 +1,168 @@
+"""
+    SoftLayer.tests.retry_tests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :license: MIT, see LICENSE for more details.
+"""
+from mock import patch, Mock, call
+
+from SoftLayer import (
+    TransportError, RemoteSystemError, InternalError, SoftLayerAPIError,
+    MethodNotFound, CircuitBreakerOpen)
+from SoftLayer.retry import RetryPolicy, CircuitBreaker
+from SoftLayer.tests import unittest
+
+
+@patch('SoftLayer.retry.time.sleep')
+class RetryPolicyTests(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = RetryPolicy(max_retries=3, backoff=1, max_backoff=5)
+
+    def test_success(self, sleep):
+        func = Mock(return_value='result')
+        self.assertEqual(
+            self.policy.call(func, 'ENDPOINT', 'getObject', timeout=10),
+            'result')
+        func.assert_called_once_with(10)
+        self.assertFalse(sleep.called)
+
+    def test_retries_transient_errors(self, sleep):
+        func = Mock(side_effect=[TransportError(0, 'reset'),
+                                 TransportError(503, 'unavailable'),
+                                 RemoteSystemError('-32400', 'error'),
+                                 'result'])
+        self.assertEqual(self.policy.call(func, 'ENDPOINT', 'getObject'),
+                         'result')
+        self.assertEqual(func.call_count, 4)
+        self.assertEqual(sleep.call_count, 3)
+
+        stats = self.policy.stats()
+        self.assertEqual(stats['calls'], 1)
+        self.assertEqual(stats['retries'], 3)
+        waits = [args[0] for args, _ in sleep.call_args_list]
+        self.assertAlmostEqual(stats['backoff_time'], sum(waits))
+
+    def test_gives_up(self, sleep):
+        func = Mock(side_effect=InternalError('-32603', 'error'))
+        self.assertRaises(InternalError,
+                          self.policy.call, func, 'ENDPOINT', 'getObject')
+        self.assertEqual(func.call_count, 4)
+
+    def test_permanent_errors(self, sleep):
+        for error in [TransportError(404, 'not found'),
+                      MethodNotFound('-32601', 'nope'),
+                      SoftLayerAPIError('SoftLayer_Exception', 'nope')]:
+            func = Mock(side_effect=error)
+            self.assertRaises(type(error),
+                              self.policy.call, func, 'ENDPOINT', 'getObject')
+            func.assert_called_once_with(None)
+        self.assertFalse(sleep.called)
+
+    def test_not_idempotent(self, sleep):
+        func = Mock(side_effect=TransportError(0, 'reset'))
+        self.assertRaises(TransportError,
+                          self.policy.call, func, 'ENDPOINT', 'createObject')
+        self.assertEqual(func.call_count, 1)
+
+        policy = RetryPolicy(max_retries=1, idempotent_prefixes=None)
+        func = Mock(side_effect=[TransportError(0, 'reset'), 'result'])
+        self.assertEqual(policy.call(func, 'ENDPOINT', 'createObject'),
+                         'result')
+
+    def test_is_idempotent(self, sleep):
+        for method in ['getObject', 'isPingable', 'verifyOrder', 'get']:
+            self.assertTrue(self.policy.is_idempotent(method), method)
+        for method in ['issueCertificate', 'getter', 'createObject',
+                       'checkout']:
+            self.assertFalse(self.policy.is_idempotent(method), method)
+
+    @patch('SoftLayer.retry.random.uniform')
+    def test_backoff(self, uniform, sleep):
+        uniform.side_effect = lambda low, high: high
+        self.assertEqual([self.policy.get_backoff(retry)
+                          for retry in range(5)], [1, 2, 4, 5, 5])
+
+    @patch('SoftLayer.retry.time.time')
+    def test_deadline(self, _time, sleep):
+        _time.return_value = 1000
+        policy = RetryPolicy(max_retries=10, backoff=4, deadline=10)
+
+        def fail(timeout):
+            _time.return_value += 3
+            raise TransportError(0, 'timeout')
+        func = Mock(side_effect=fail)
+
+        with patch('SoftLayer.retry.random.uniform', return_value=2):
+            self.assertRaises(TransportError,
+                              policy.call, func, 'ENDPOINT', 'getObject',
+                              timeout=30)
+
+        # The deadline caps the timeout and stops retries
+        self.assertEqual(func.call_args_list, [call(10), call(7), call(4)])
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_circuit_breaker(self, sleep):
+        policy = RetryPolicy(max_retries=0, breaker_threshold=2)
+        func = Mock(side_effect=TransportError(503, 'unavailable'))
+
+        for _ in range(2):
+            self.assertRaises(TransportError,
+                              policy.call, func, 'ENDPOINT', 'getObject')
+        self.assertRaises(CircuitBreakerOpen,
+                          policy.call, func, 'ENDPOINT', 'getObject')
+        self.assertEqual(func.call_count, 2)
+        self.assertEqual(policy.stats()['rejected'], 1)
+
+        # Other endpoints have their own breaker
+        func.side_effect = None
+        self.assertEqual(policy.call(func, 'OTHER', 'getObject'),
+                         func.return_value)
+
+    def test_circuit_breaker_disabled(self, sleep):
+        policy = RetryPolicy(max_retries=0, breaker_threshold=0)
+        self.assertIsNone(policy.get_breaker('ENDPOINT'))
+        func = Mock(side_effect=TransportError(503, 'unavailable'))
+        for _ in range(10):
+            self.assertRaises(TransportError,
+                              policy.call, func, 'ENDPOINT', 'getObject')
+
+
+@patch('SoftLayer.retry.time.time')
+class CircuitBreakerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(threshold=2, reset_timeout=30)
+
+    def test_opens(self, _time):
+        _time.return_value = 1000
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'closed')
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+        self.assertFalse(self.breaker.allow())
+
+    def test_half_open(self, _time):
+        _time.return_value = 1000
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+
+        _time.return_value = 1030
+        self.assertEqual(self.breaker.state, 'half-open')
+        self.assertTrue(self.breaker.allow())
+        # Only one trial call at a time
+        self.assertFalse(self.breaker.allow())
+
+        # A failed trial re-opens the breaker
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, 'open')
+
+        _time.return_value = 1060
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, 'closed')
+        self.assertTrue(self.breaker.allow())
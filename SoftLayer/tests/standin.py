@@ -0,0 +1,303 @@
+"""
+usage: standin [options]
+
+Serves the test fixtures as a stand-in for the SoftLayer API. Run with
+python -m SoftLayer.tests.standin
+
+Options:
+  --host=HOST        Address to listen on [Default: 127.0.0.1]
+  --port=PORT        Port to listen on [Default: 8080]
+  --scale=N          Repeat list results N times [Default: 1]
+  --latency=SECONDS  Seconds to wait before answering each call [Default: 0]
+  -h --help          Show this screen
+"""
+# :license: MIT, see LICENSE for more details.
+from collections import deque
+import copy
+from importlib import import_module
+import json
+import re
+import threading
+import time
+
+from six.moves import BaseHTTPServer, socketserver
+from six.moves.urllib.parse import urlparse, parse_qs
+
+from SoftLayer.utils import short_service_name, xmlrpc_client
+
+__all__ = ['StandInServer', 'load_fixture']
+
+# Ids of the copies made when scaling results are offset by this much
+ID_STRIDE = 1000000
+
+REST_PATH = re.compile(r'/SoftLayer_(?P<service>\w+)'
+                       r'(?:/(?P<id>\d+))?'
+                       r'(?:/(?P<method>[^/.]+))?'
+                       r'(?P<args>(?:/[^/.]+)*)'
+                       r'\.(?P<format>json|txt)$')
+
+
+class FixtureNotFound(Exception):
+    """ There is no fixture for a Service.method """
+
+
+class HTTPStatusError(Exception):
+    """ A call is answered with an HTTP error status instead of a fixture """
+    def __init__(self, status):
+        Exception.__init__(self, status)
+        self.status = status
+
+
+def load_fixture(service, method):
+    """ Returns the fixture for a call.
+
+    :param string service: service name, E.G.: 'Account'
+    :param string method: method name, E.G.: 'getVirtualGuests'
+    """
+    try:
+        module = import_module('SoftLayer.tests.fixtures.%s' % service)
+    except ImportError:
+        raise FixtureNotFound('%s fixture is not implemented' % service)
+
+    fixture = getattr(module, method, None)
+    if fixture is None or method.startswith('_') or callable(fixture):
+        raise FixtureNotFound('%s::%s fixture is not implemented'
+                              % (service, method))
+    return fixture
+
+
+def scale_result(result, factor):
+    """ Returns a list result repeated factor times. The ids of each copy
+        (and hostnames, if there are any) are made unique. """
+    if not isinstance(result, list) or factor <= 1:
+        return result
+
+    scaled = list(result)
+    for index in range(1, factor):
+        for item in result:
+            if isinstance(item, dict):
+                item = copy.copy(item)
+                if isinstance(item.get('id'), int):
+                    item['id'] += index * ID_STRIDE
+                if item.get('hostname'):
+                    item['hostname'] = '%s-%d' % (item['hostname'], index)
+                    if item.get('fullyQualifiedDomainName'):
+                        item['fullyQualifiedDomainName'] = '%s.%s' % (
+                            item['hostname'], item.get('domain'))
+            scaled.append(item)
+    return scaled
+
+
+class StandInHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ Answers XML-RPC (POST /SoftLayer_Service) and REST
+        (GET /SoftLayer_Service[/id][/method].json) calls from the fixtures.
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):  # pylint: disable=C0103
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            params, method = xmlrpc_client.loads(self.rfile.read(length))
+        except Exception as ex:  # pylint: disable=W0703
+            return self.send_xml_rpc(xmlrpc_client.Fault('-32700', str(ex)))
+
+        service = short_service_name(self.path.rstrip('/').rsplit('/', 1)[-1])
+        headers = {}
+        if params and isinstance(params[0], dict):
+            headers = params[0].get('headers') or {}
+        page = headers.get('resultLimit') or {}
+
+        try:
+            result = self.server.call(service, method, headers=headers,
+                                      limit=page.get('limit'),
+                                      offset=page.get('offset', 0))
+        except FixtureNotFound as ex:
+            return self.send_xml_rpc(xmlrpc_client.Fault('-32601', str(ex)))
+        except HTTPStatusError as ex:
+            return self.send_body(b'', 'text/plain', status=ex.status)
+        self.send_xml_rpc((result,))
+
+    def do_GET(self):  # pylint: disable=C0103
+        url = urlparse(self.path)
+        match = REST_PATH.search(url.path)
+        if match is None:
+            return self.send_json({'error': 'Not found'}, status=404)
+
+        query = parse_qs(url.query)
+        limit, offset = None, 0
+        if query.get('resultLimit'):
+            offset, limit = [int(value) for value
+                             in query['resultLimit'][0].split(',')]
+
+        service = match.group('service')
+        method = match.group('method') or 'getObject'
+        try:
+            try:
+                result = self.server.call(service, method,
+                                          limit=limit, offset=offset)
+            except FixtureNotFound:
+                result = self.server.call(service, 'get' + method,
+                                          limit=limit, offset=offset)
+        except FixtureNotFound as ex:
+            return self.send_json({'error': str(ex)}, status=404)
+        except HTTPStatusError as ex:
+            return self.send_json({'error': str(ex)}, status=ex.status)
+
+        if match.group('format') == 'txt':
+            return self.send_body(str(result).encode('utf-8'), 'text/plain')
+        self.send_json(result)
+
+    def send_xml_rpc(self, result):
+        """ Sends an XML-RPC response or fault """
+        body = xmlrpc_client.dumps(result, methodresponse=True,
+                                   allow_none=True)
+        self.send_body(body.encode('utf-8'), 'text/xml')
+
+    def send_json(self, result, status=200):
+        """ Sends a JSON response """
+        self.send_body(json.dumps(result).encode('utf-8'), 'application/json',
+                       status=status)
+
+    def send_body(self, body, content_type, status=200):
+        """ Sends a response """
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """ A local HTTP server which stands in for the SoftLayer API, answering
+        calls with the test fixtures.
+
+    Both the XML-RPC endpoint and the REST endpoint are served at the root,
+    so :attr:`endpoint_url` can be used as the endpoint_url of a client. Each
+    keep-alive connection is served by its own thread.
+
+    :param tuple address: (host, port) to listen on. Port 0 picks a free one.
+    :param scale: repeat list results this many times, with unique ids. Either
+                  a number or a dict of numbers keyed by 'Service.method'.
+    :param latency: seconds to wait before answering each call. Either a
+                    number or a dict of numbers keyed by 'Service.method'.
+    :param dict statuses: HTTP error statuses to answer calls with instead of
+                          their fixtures, keyed by 'Service.method'
+
+    resultLimit headers (and the REST resultLimit parameter) are honored;
+    object masks and filters are ignored.
+
+    Usage:
+
+        >>> import SoftLayer
+        >>> from SoftLayer.tests.standin import StandInServer
+        >>> with StandInServer(scale={'Account.getVirtualGuests': 5000},
+        ...                    latency=0.05) as server:
+        ...     client = SoftLayer.Client(endpoint_url=server.endpoint_url)
+        ...     guests = list(client['Account'].getVirtualGuests(iter=True))
+        >>> len(guests)
+        10000
+
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    handler_class = StandInHandler
+
+    def __init__(self, address=('127.0.0.1', 0), scale=1, latency=0,
+                 statuses=None):
+        BaseHTTPServer.HTTPServer.__init__(self, address, self.handler_class)
+        self.scale = scale
+        self.latency = latency
+        self.statuses = statuses or {}
+        self.requests = deque(maxlen=1000)
+        self._lock = threading.Lock()
+        self._scaled = {}
+        self._thread = None
+
+    @property
+    def endpoint_url(self):
+        """ The URL of the XML-RPC and REST endpoints """
+        return 'http://%s:%s' % self.server_address[:2]
+
+    def _setting(self, setting, name):
+        """ Returns the value of a per-call setting """
+        if isinstance(setting, dict):
+            return setting.get(name, 0)
+        return setting
+
+    def call(self, service, method, headers=None, limit=None, offset=0):
+        """ Answers a call with its fixture.
+
+        :param string service: service name, E.G.: 'Account'
+        :param string method: method name, E.G.: 'getVirtualGuests'
+        :param dict headers: XML-RPC headers sent with the call
+        :param int limit: number of results to return
+        :param int offset: index of the first result to return
+        :raises HTTPStatusError: if the call is listed in :attr:`statuses`
+        """
+        name = '%s.%s' % (service, method)
+        with self._lock:
+            self.requests.append((name, headers or {}))
+
+        latency = self._setting(self.latency, name)
+        if latency:
+            time.sleep(latency)
+        if name in self.statuses:
+            raise HTTPStatusError(self.statuses[name])
+
+        factor = int(self._setting(self.scale, name) or 1)
+        with self._lock:
+            result = self._scaled.get((name, factor))
+        if result is None:
+            result = scale_result(load_fixture(service, method), factor)
+            with self._lock:
+                self._scaled[(name, factor)] = result
+
+        if limit and isinstance(result, list):
+            result = result[offset:offset + limit]
+        return result
+
+    def start(self):
+        """ Starts serving on a background thread """
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """ Stops serving and closes the listening socket """
+        if self._thread is not None:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_):
+        self.stop()
+
+
+def main(args=None):
+    """ Runs a stand-in server until interrupted """
+    from docopt import docopt
+
+    arguments = docopt(__doc__, argv=args)
+    server = StandInServer((arguments['--host'], int(arguments['--port'])),
+                           scale=int(arguments['--scale']),
+                           latency=float(arguments['--latency']))
+    print('Serving fixtures at %s' % server.endpoint_url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
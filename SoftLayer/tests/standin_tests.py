@@ -0,0 +1,128 @@
+"""
+    SoftLayer.tests.standin_tests
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    :license: MIT, see LICENSE for more details.
+"""
+import json
+
+from mock import patch
+
+import SoftLayer
+from SoftLayer import MetadataManager, MethodNotFound, SoftLayerAPIError, \
+    TransportError
+from SoftLayer.tests import unittest
+from SoftLayer.tests.fixtures import Account, Virtual_Guest
+from SoftLayer.tests.standin import StandInServer, scale_result, ID_STRIDE
+from SoftLayer.transports import make_rest_api_call
+
+
+class ScaleResultTests(unittest.TestCase):
+
+    def test_scale(self):
+        result = [{'id': 1, 'hostname': 'a', 'domain': 'b.com',
+                   'fullyQualifiedDomainName': 'a.b.com'}, 'x']
+        scaled = scale_result(result, 3)
+
+        self.assertEqual(len(scaled), 6)
+        self.assertEqual([item['id'] for item in scaled[::2]],
+                         [1, 1 + ID_STRIDE, 1 + 2 * ID_STRIDE])
+        self.assertEqual(scaled[2]['fullyQualifiedDomainName'], 'a-1.b.com')
+        self.assertEqual(scaled[3], 'x')
+        # The fixture itself is left alone
+        self.assertEqual(result[0]['id'], 1)
+
+    def test_not_a_list(self):
+        self.assertEqual(scale_result({'id': 1}, 10), {'id': 1})
+
+
+class StandInServerTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StandInServer(
+            scale={'Account.getVirtualGuests': 100}).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.stop()
+
+    def setUp(self):
+        self.server.requests.clear()
+        self.client = SoftLayer.Client(username='user', api_key='key',
+                                       endpoint_url=self.server.endpoint_url)
+
+    def test_call(self):
+        self.assertEqual(self.client['Virtual_Guest'].getObject(id=100),
+                         Virtual_Guest.getObject)
+        name, headers = self.server.requests[0]
+        self.assertEqual(name, 'Virtual_Guest.getObject')
+        self.assertEqual(headers['SoftLayer_Virtual_GuestInitParameters'],
+                         {'id': 100})
+
+    def test_method_not_found(self):
+        self.assertRaises(MethodNotFound, self.client['Account'].nope)
+        self.assertRaises(MethodNotFound, self.client['Nope'].getObject)
+
+    def test_pagination(self):
+        count = len(Account.getVirtualGuests) * 100
+        guests = list(self.client['Account'].getVirtualGuests(iter=True,
+                                                              chunk=50))
+        self.assertEqual(len(guests), count)
+        self.assertEqual(len(set(guest['id'] for guest in guests)), count)
+        self.assertEqual(len(self.server.requests), count // 50 + 1)
+
+        page = self.client['Account'].getVirtualGuests(limit=2, offset=3)
+        self.assertEqual(page, guests[3:5])
+
+    def test_unscaled(self):
+        self.assertEqual(self.client['Account'].getHardware(),
+                         Account.getHardware)
+
+    def test_rest(self):
+        url = self.server.endpoint_url + '/SoftLayer_Account/%s.json'
+        self.assertEqual(make_rest_api_call('GET', url % 'getDomains'),
+                         Account.getDomains)
+        self.assertEqual(make_rest_api_call('GET', url % 'Domains'),
+                         Account.getDomains)
+        page = make_rest_api_call('GET', url % 'VirtualGuests'
+                                  + '?resultLimit=10,5')
+        self.assertEqual(
+            json.loads(page),
+            self.client['Account'].getVirtualGuests(limit=5, offset=10))
+        self.assertRaises(SoftLayerAPIError, make_rest_api_call, 'GET',
+                          url % 'nope')
+
+    def test_metadata(self):
+        meta = MetadataManager(self.client)
+        meta.url = self.server.endpoint_url
+        self.assertEqual(meta.get('datacenter'), 'dal01')
+        self.assertEqual(meta.get('vlans', '06:00:00:00:00:00'), [100, 101])
+        self.assertEqual(meta.get('user_data'), 'user_data')
+        self.assertIsNone(meta.make_request('Nope.json'))
+
+    def test_statuses(self):
+        self.server.statuses = {'Account.getObject': 503}
+        try:
+            try:
+                self.client['Account'].getObject()
+            except TransportError as ex:
+                self.assertEqual(ex.faultCode, 503)
+            else:
+                self.fail('TransportError not raised')
+            self.assertRaises(SoftLayerAPIError, make_rest_api_call, 'GET',
+                              self.server.endpoint_url
+                              + '/SoftLayer_Account.json')
+        finally:
+            self.server.statuses = {}
+        self.assertEqual(len(self.server.requests), 2)
+
+    @patch('SoftLayer.tests.standin.time.sleep')
+    def test_latency(self, sleep):
+        self.server.latency = {'Account.getObject': 0.25}
+        try:
+            self.client['Account'].getObject()
+            self.client['Account'].getDomains()
+        finally:
+            self.server.latency = 0
+        sleep.assert_called_once_with(0.25)
@@ -6,9 +6,13 @@
 """
 from mock import patch, MagicMock, ANY
 
-from SoftLayer import SoftLayerAPIError, TransportError
-from SoftLayer.transports import make_rest_api_call, make_xml_rpc_api_call
+from SoftLayer import (
+    SoftLayerAPIError, TransportError, NotWellFormed, MethodNotFound)
+from SoftLayer.transports import (
+    make_rest_api_call, make_xml_rpc_api_call, iter_xml_rpc_api_call,
+    ConnectionPool, XmlRpcStreamDecoder)
 from SoftLayer.tests import unittest
+from SoftLayer.utils import xmlrpc_client
 from requests import HTTPError, RequestException
 
 
@@ -74,6 +78,182 @@ class TestXmlRpcAPICall(unittest.TestCase):
                      'http': 'http://localhost:3128'},
             timeout=None)
 
+    def test_stats(self):
+        session = MagicMock()
+        session.send().content = self.send_content
+        session.send().status_code = 200
+        stats = {}
+        make_xml_rpc_api_call('http://something.com/path/to/resource',
+                              'getObject', session=session, stats=stats)
+
+        self.assertEqual(sorted(stats), [
+            'decode_time', 'network_time', 'request_bytes', 'response_bytes',
+            'serialize_time', 'status'])
+        self.assertEqual(stats['status'], 200)
+        self.assertEqual(stats['response_bytes'], len(self.send_content))
+        self.assertGreater(stats['request_bytes'], 0)
+
+    def test_session(self):
+        session = MagicMock()
+        session.send().content = self.send_content
+        resp = make_xml_rpc_api_call('http://something.com/path/to/resource',
+                                     'getObject', session=session)
+        session.send.assert_called_with(ANY, proxies=None, timeout=None)
+        self.assertEqual(resp, [])
+
+
+def _response(*params):
+    return xmlrpc_client.dumps(params, methodresponse=True,
+                               allow_none=True).encode('utf-8')
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestXmlRpcStreamDecoder(unittest.TestCase):
+
+    def decode(self, data, size=7):
+        decoder = XmlRpcStreamDecoder()
+        items = []
+        for chunk in _chunks(data, size):
+            items.extend(decoder.feed(chunk))
+        items.extend(decoder.close())
+        return decoder, items
+
+    def test_array(self):
+        result = [
+            {'id': 1, 'hostname': 'a', 'tags': ['x', 'y'], 'maxMemory': 1.5,
+             'active': True, 'notes': None, 'extra': {'nested': [[]]}},
+            {'id': 2, 'hostname': u'b\u00e9', 'tags': [], 'maxMemory': 2.0,
+             'active': False, 'notes': '', 'extra': {}},
+        ]
+        decoder, items = self.decode(_response(result))
+        self.assertTrue(decoder.is_list)
+        self.assertEqual(items, result)
+
+    def test_matches_loads(self):
+        result = [{'id': 1, 'created': xmlrpc_client.DateTime(
+            '20140101T10:00:00'), 'data': xmlrpc_client.Binary(b'abc')}]
+        data = _response(result)
+        _, items = self.decode(data)
+        self.assertEqual(items, xmlrpc_client.loads(data)[0][0])
+
+    def test_untyped_string(self):
+        data = (b'<methodResponse><params><param><value><array><data>'
+                b'<value>plain</value><value></value>'
+                b'</data></array></value></param></params></methodResponse>')
+        _, items = self.decode(data)
+        self.assertEqual(items, ['plain', ''])
+
+    def test_incremental(self):
+        data = _response([{'id': i} for i in range(5)])
+        decoder = XmlRpcStreamDecoder()
+        head, tail = data.split(b'<int>3</int>')
+
+        self.assertEqual(decoder.feed(head),
+                         [{'id': 0}, {'id': 1}, {'id': 2}])
+        self.assertEqual(decoder.feed(b'<int>3</int>' + tail),
+                         [{'id': 3}, {'id': 4}])
+        self.assertEqual(decoder.close(), [])
+
+    def test_not_a_list(self):
+        decoder, items = self.decode(_response({'id': 1, 'tags': ['a']}))
+        self.assertFalse(decoder.is_list)
+        self.assertEqual(items, [{'id': 1, 'tags': ['a']}])
+
+    def test_empty_list(self):
+        decoder, items = self.decode(_response([]))
+        self.assertTrue(decoder.is_list)
+        self.assertEqual(items, [])
+
+    def test_fault(self):
+        data = xmlrpc_client.dumps(
+            xmlrpc_client.Fault('-32601', 'Method not found')).encode('utf-8')
+        try:
+            self.decode(data)
+        except xmlrpc_client.Fault as ex:
+            self.assertEqual(ex.faultCode, '-32601')
+            self.assertEqual(ex.faultString, 'Method not found')
+        else:
+            self.fail('Fault not raised')
+
+    def test_not_well_formed(self):
+        self.assertRaises(xmlrpc_client.Fault,
+                          self.decode, b'<methodResponse><params>')
+
+
+class TestIterXmlRpcAPICall(unittest.TestCase):
+
+    def setUp(self):
+        self.session = MagicMock()
+
+    def call(self, data):
+        self.session.send().iter_content.return_value = _chunks(data, 10)
+        return iter_xml_rpc_api_call('http://something.com/path/to/resource',
+                                     'getObject', session=self.session)
+
+    def test_call(self):
+        stream = self.call(_response([{'id': 1}, {'id': 2}]))
+        self.assertEqual(list(stream), [{'id': 1}, {'id': 2}])
+        self.assertTrue(stream.is_list)
+        self.session.send.assert_called_with(ANY, proxies=None, timeout=None,
+                                             stream=True)
+        self.session.send().close.assert_called_with()
+
+    def test_fault(self):
+        stream = self.call(xmlrpc_client.dumps(
+            xmlrpc_client.Fault('-32601', 'Method not found')).encode('utf-8'))
+        self.assertRaises(MethodNotFound, list, stream)
+
+    def test_not_well_formed(self):
+        stream = self.call(b'<methodResponse><params>')
+        self.assertRaises(NotWellFormed, list, stream)
+
+    def test_http_error(self):
+        error = HTTPError('error')
+        error.response = MagicMock()
+        error.response.status_code = 500
+        self.session.send().raise_for_status.side_effect = error
+        self.assertRaises(TransportError, iter_xml_rpc_api_call,
+                          'http://something.com/path/to/resource',
+                          'getObject', session=self.session)
+        self.session.send().close.assert_called_with()
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    def test_defaults(self):
+        pool = ConnectionPool()
+        session = pool.get_session()
+        adapter = session.get_adapter('https://api.softlayer.com/')
+        self.assertEqual(adapter._pool_connections, 10)
+        self.assertEqual(adapter._pool_maxsize, 10)
+
+    def test_pool_size(self):
+        pool = ConnectionPool(pool_connections=2, pool_maxsize=20)
+        adapter = pool.get_session().get_adapter('http://localhost/')
+        self.assertEqual(adapter._pool_connections, 2)
+        self.assertEqual(adapter._pool_maxsize, 20)
+
+    def test_reuse(self):
+        pool = ConnectionPool()
+        self.assertIs(pool.get_session(), pool.get_session())
+
+    @patch('SoftLayer.transports.time.time')
+    def test_idle_eviction(self, _time):
+        _time.side_effect = [100, 105, 200]
+        pool = ConnectionPool(idle_timeout=30)
+        first = pool.get_session()
+        self.assertIs(first, pool.get_session())
+        self.assertIsNot(first, pool.get_session())
+
+    def test_close(self):
+        pool = ConnectionPool()
+        first = pool.get_session()
+        pool.close()
+        self.assertIsNot(first, pool.get_session())
+
 
 class TestRestAPICall(unittest.TestCase):
 
@@ -9,14 +9,40 @@ from SoftLayer.exceptions import (
     SoftLayerAPIError, NotWellFormed, UnsupportedEncoding, InvalidCharacter,
     SpecViolation, MethodNotFound, InvalidMethodParameters, InternalError,
     ApplicationError, RemoteSystemError, TransportError)
-from SoftLayer.utils import xmlrpc_client
+from SoftLayer.utils import xmlrpc_client, LazyModule
 
+import base64
 import logging
-import requests
+import threading
+import time
+from xml.parsers import expat
+
 import json
 
+# requests is slow to import, so it's only imported once a call is made
+requests = LazyModule('requests')  # pylint: disable=C0103
+
 LOGGER = logging.getLogger(__name__)
 
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_STREAM_CHUNK_SIZE = 64 * 1024
+
+# These exceptions are formed from the XML-RPC spec
+# http://xmlrpc-epi.sourceforge.net/specs/rfc.fault_codes.php
+ERROR_MAPPING = {
+    '-32700': NotWellFormed,
+    '-32701': UnsupportedEncoding,
+    '-32702': InvalidCharacter,
+    '-32600': SpecViolation,
+    '-32601': MethodNotFound,
+    '-32602': InvalidMethodParameters,
+    '-32603': InternalError,
+    '-32500': ApplicationError,
+    '-32400': RemoteSystemError,
+    '-32300': TransportError,
+}
+
 
 def _proxies_dict(proxy):
     """ Makes a dict appropriate to pass to requests """
@@ -25,8 +51,117 @@ def _proxies_dict(proxy):
     return {'http': proxy, 'https': proxy}
 
 
+def _fault_error(fault):
+    """ Returns the SoftLayerAPIError matching an XML-RPC fault """
+    return ERROR_MAPPING.get(fault.faultCode, SoftLayerAPIError)(
+        fault.faultCode, fault.faultString)
+
+
+class ConnectionPool(object):
+    """ Holds a keep-alive HTTP session which is shared between API calls.
+
+    Reusing one session means that TCP connections (and their TLS sessions)
+    to the endpoint are kept open and reused instead of being established for
+    every single call. The underlying urllib3 pools are thread-safe, so one
+    ConnectionPool can be shared by every thread using the same client.
+
+    :param int pool_connections: number of per-host pools to keep around
+    :param int pool_maxsize: maximum number of connections kept per host
+    :param float idle_timeout: if set, the session is dropped (and its
+                               connections closed) once it has been idle for
+                               this many seconds
+    :param cassette: a :class:`SoftLayer.cassette.Cassette` to record requests
+                     to or replay them from
+    """
+    def __init__(self, pool_connections=None, pool_maxsize=None,
+                 idle_timeout=None, cassette=None):
+        self.pool_connections = pool_connections or DEFAULT_POOL_CONNECTIONS
+        self.pool_maxsize = pool_maxsize or DEFAULT_POOL_MAXSIZE
+        self.idle_timeout = idle_timeout
+        self.cassette = cassette
+        self._lock = threading.Lock()
+        self._session = None
+        self._last_used = 0
+
+    def _new_session(self):
+        """ Builds a new session with adapters sized for this pool """
+        session = requests.Session()
+        for prefix in ('http://', 'https://'):
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=self.pool_connections,
+                pool_maxsize=self.pool_maxsize)
+            if self.cassette is not None:
+                adapter = self.cassette.adapter(adapter)
+            session.mount(prefix, adapter)
+        return session
+
+    def get_session(self):
+        """ Returns the shared session, creating (or re-creating it after it
+            has been idle for too long) as needed. """
+        with self._lock:
+            now = time.time()
+            idle = now - self._last_used
+            if self._session is not None and self.idle_timeout \
+                    and idle > self.idle_timeout:
+                LOGGER.debug('Evicting HTTP session idle for %.1fs', idle)
+                self._session.close()
+                self._session = None
+
+            if self._session is None:
+                self._session = self._new_session()
+            self._last_used = now
+            return self._session
+
+    def close(self):
+        """ Closes every connection held by the pool """
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+def encode_xml_rpc_call(method, args=None, headers=None):
+    """ Encodes the body of an XML-RPC API call. Shared by every transport.
+
+    :param string method: method to call E.G.: 'getObject'
+    :param tuple args: arguments for the call
+    :param dict headers: XML-RPC headers to use for the request
+    """
+    largs = list(args or ())
+    largs.insert(0, {'headers': headers})
+
+    return xmlrpc_client.dumps(tuple(largs),
+                               methodname=method,
+                               allow_none=True)
+
+
+def decode_xml_rpc_response(content):
+    """ Decodes the body of an XML-RPC API response, raising API faults as
+        the matching SoftLayerAPIError. Shared by every transport.
+
+    :param content: the response body
+    """
+    try:
+        return xmlrpc_client.loads(content,)[0][0]
+    except xmlrpc_client.Fault as ex:
+        raise _fault_error(ex)
+
+
+def _xml_rpc_request(uri, method, args, headers, http_headers):
+    """ Builds the prepared HTTP request for an XML-RPC call """
+    payload = encode_xml_rpc_call(method, args, headers)
+    req = requests.Request('POST', uri, data=payload,
+                           headers=http_headers).prepare()
+    LOGGER.debug("=== REQUEST ===")
+    LOGGER.info('POST %s', uri)
+    LOGGER.debug(req.headers)
+    LOGGER.debug(payload)
+    return req
+
+
 def make_xml_rpc_api_call(uri, method, args=None, headers=None,
-                          http_headers=None, timeout=None, proxy=None):
+                          http_headers=None, timeout=None, proxy=None,
+                          session=None, stats=None):
     """ Makes a SoftLayer API call against the XML-RPC endpoint
 
     :param string uri: endpoint URL
@@ -34,71 +169,296 @@ def make_xml_rpc_api_call(uri, method, args=None, headers=None,
     :param dict headers: XML-RPC headers to use for the request
     :param dict http_headers: HTTP headers to use for the request
     :param int timeout: number of seconds to use as a timeout
+    :param session: a requests.Session to send the request with. A new one
+                    is created (and thrown away) when this isn't given.
+    :param dict stats: if given, filled with the serialize_time,
+                       network_time, decode_time, request_bytes,
+                       response_bytes and status of the call
     """
-    if args is None:
-        args = tuple()
+    if stats is None:
+        stats = {}
     try:
-        largs = list(args)
-        largs.insert(0, {'headers': headers})
-
-        payload = xmlrpc_client.dumps(tuple(largs),
-                                      methodname=method,
-                                      allow_none=True)
-        session = requests.Session()
-        req = requests.Request('POST', uri, data=payload,
-                               headers=http_headers).prepare()
-        LOGGER.debug("=== REQUEST ===")
-        LOGGER.info('POST %s', uri)
-        LOGGER.debug(req.headers)
-        LOGGER.debug(payload)
+        start = time.time()
+        req = _xml_rpc_request(uri, method, args, headers, http_headers)
+        stats['serialize_time'] = time.time() - start
+        stats['request_bytes'] = len(req.body or '')
+        if session is None:
+            session = requests.Session()
 
+        start = time.time()
         response = session.send(req,
                                 timeout=timeout,
                                 proxies=_proxies_dict(proxy))
+        stats['network_time'] = time.time() - start
+        stats['status'] = response.status_code
+        stats['response_bytes'] = len(response.content or '')
         LOGGER.debug("=== RESPONSE ===")
         LOGGER.debug(response.headers)
         LOGGER.debug(response.content)
         response.raise_for_status()
-        result = xmlrpc_client.loads(response.content,)[0][0]
-        return result
-    except xmlrpc_client.Fault as ex:
-        # These exceptions are formed from the XML-RPC spec
-        # http://xmlrpc-epi.sourceforge.net/specs/rfc.fault_codes.php
-        error_mapping = {
-            '-32700': NotWellFormed,
-            '-32701': UnsupportedEncoding,
-            '-32702': InvalidCharacter,
-            '-32600': SpecViolation,
-            '-32601': MethodNotFound,
-            '-32602': InvalidMethodParameters,
-            '-32603': InternalError,
-            '-32500': ApplicationError,
-            '-32400': RemoteSystemError,
-            '-32300': TransportError,
-        }
-        raise error_mapping.get(ex.faultCode, SoftLayerAPIError)(
-            ex.faultCode, ex.faultString)
+
+        start = time.time()
+        try:
+            return decode_xml_rpc_response(response.content)
+        finally:
+            stats['decode_time'] = time.time() - start
+    except requests.HTTPError as ex:
+        raise TransportError(ex.response.status_code, str(ex))
+    except requests.RequestException as ex:
+        raise TransportError(0, str(ex))
+
+
+def iter_xml_rpc_api_call(uri, method, args=None, headers=None,
+                          http_headers=None, timeout=None, proxy=None,
+                          session=None, chunk_size=DEFAULT_STREAM_CHUNK_SIZE,
+                          stats=None):
+    """ Makes a SoftLayer API call against the XML-RPC endpoint without
+        buffering the response.
+
+    The request is sent (and HTTP errors are raised) straight away. The
+    returned :class:`XmlRpcStream` reads and parses the response body as it
+    is iterated over, so API faults are raised during iteration.
+
+    Takes the same arguments as :func:`make_xml_rpc_api_call` as well as:
+
+    :param int chunk_size: number of bytes to read from the socket at a time
+
+    Only the time taken to receive the response headers is included in the
+    network_time put in stats, and the response size and decode time aren't
+    known yet.
+    """
+    if stats is None:
+        stats = {}
+    try:
+        start = time.time()
+        req = _xml_rpc_request(uri, method, args, headers, http_headers)
+        stats['serialize_time'] = time.time() - start
+        stats['request_bytes'] = len(req.body or '')
+        if session is None:
+            session = requests.Session()
+
+        start = time.time()
+        response = session.send(req,
+                                timeout=timeout,
+                                proxies=_proxies_dict(proxy),
+                                stream=True)
+        stats['network_time'] = time.time() - start
+        stats['status'] = response.status_code
+        LOGGER.debug("=== RESPONSE ===")
+        LOGGER.debug(response.headers)
+        try:
+            response.raise_for_status()
+        except requests.HTTPError:
+            response.close()
+            raise
+        return XmlRpcStream(response, chunk_size=chunk_size)
     except requests.HTTPError as ex:
         raise TransportError(ex.response.status_code, str(ex))
     except requests.RequestException as ex:
         raise TransportError(0, str(ex))
 
 
+class XmlRpcStream(object):
+    """ An iterator over a streamed XML-RPC response.
+
+    When the response is an array, each member is yielded as soon as it has
+    been parsed, so only one member is held in memory at a time. Any other
+    response is yielded as a single item.
+
+    :param response: a requests response opened with ``stream=True``
+    :param int chunk_size: number of bytes to read at a time
+    """
+    def __init__(self, response, chunk_size=DEFAULT_STREAM_CHUNK_SIZE):
+        self.response = response
+        self.chunk_size = chunk_size
+        self.decoder = XmlRpcStreamDecoder()
+
+    @property
+    def is_list(self):
+        """ True if the response is an array, False if it isn't and None if
+            that isn't known yet. """
+        return self.decoder.is_list
+
+    def __iter__(self):
+        try:
+            for chunk in self.response.iter_content(self.chunk_size):
+                for item in self.decoder.feed(chunk):
+                    yield item
+            for item in self.decoder.close():
+                yield item
+        except xmlrpc_client.Fault as ex:
+            raise _fault_error(ex)
+        except requests.RequestException as ex:
+            raise TransportError(0, str(ex))
+        finally:
+            self.close()
+
+    def close(self):
+        """ Releases the connection the response is read from """
+        self.response.close()
+
+
+class XmlRpcStreamDecoder(object):
+    """ Incrementally decodes an XML-RPC method response.
+
+    Data is passed to :meth:`feed` in arbitrary chunks. Each call returns
+    the members of the top-level array which were completed by that chunk.
+    :meth:`close` returns anything left, including the whole result when it
+    isn't an array. Faults are raised as ``xmlrpc_client.Fault``.
+
+    Usage:
+
+        >>> decoder = XmlRpcStreamDecoder()
+        >>> decoder.feed(b'<methodResponse><params><param><value><array>'
+        ...              b'<data><value><int>1</int></value><value><int>2')
+        [1]
+        >>> decoder.feed(b'</int></value></data></array></value></param>'
+        ...              b'</params></methodResponse>')
+        [2]
+        >>> decoder.close()
+        []
+
+    """
+    def __init__(self):
+        self.is_list = None
+        self._parser = expat.ParserCreate()
+        self._parser.buffer_text = True
+        self._parser.StartElementHandler = self._start
+        self._parser.EndElementHandler = self._end
+        self._parser.CharacterDataHandler = self._data
+        # Open arrays and structs. Each frame is [container, member name];
+        # the top-level array's container is None since its members are
+        # handed out instead of being collected.
+        self._stack = []
+        self._text = []
+        self._typed = False
+        self._fault = None
+        self._ready = []
+
+    def feed(self, data):
+        """ Parses a chunk of the response and returns the top-level array
+            members it completed. """
+        try:
+            self._parser.Parse(data, False)
+        except expat.ExpatError as ex:
+            raise xmlrpc_client.Fault('-32700', 'Invalid XML-RPC response: %s'
+                                      % ex)
+        ready, self._ready = self._ready, []
+        return ready
+
+    def close(self):
+        """ Finishes parsing and returns anything not returned yet """
+        ready = self.feed(b'')
+        try:
+            self._parser.Parse(b'', True)
+        except expat.ExpatError as ex:
+            raise xmlrpc_client.Fault('-32700', 'Invalid XML-RPC response: %s'
+                                      % ex)
+        return ready + self._ready
+
+    def _start(self, tag, _):
+        """ Handles an opening tag """
+        if tag == 'array':
+            if not self._stack and self.is_list is None \
+                    and self._fault is None:
+                self.is_list = True
+                self._stack.append([None, None])
+            else:
+                self._stack.append([[], None])
+        elif tag == 'struct':
+            self._stack.append([{}, None])
+        elif tag == 'value':
+            self._typed = False
+        elif tag == 'fault':
+            self._fault = {}
+        self._text = []
+
+    def _data(self, text):
+        """ Handles character data """
+        self._text.append(text)
+
+    def _end(self, tag):
+        """ Handles a closing tag """
+        text = ''.join(self._text)
+        self._text = []
+        if tag in ('string', 'dateTime.iso8601', 'base64', 'int', 'i4',
+                   'i8', 'boolean', 'double', 'nil'):
+            self._add(self._scalar(tag, text))
+        elif tag == 'value':
+            # A value without a type element is a string
+            if not self._typed:
+                self._add(text)
+        elif tag == 'name':
+            self._stack[-1][1] = text
+        elif tag in ('array', 'struct'):
+            container, _ = self._stack.pop()
+            self._typed = True
+            if container is not None:
+                self._add(container)
+        elif tag == 'fault':
+            raise xmlrpc_client.Fault(self._fault.get('faultCode'),
+                                      self._fault.get('faultString'))
+
+    @staticmethod
+    def _scalar(tag, text):
+        """ Converts the text of a scalar element to a Python value """
+        if tag in ('int', 'i4', 'i8'):
+            return int(text)
+        elif tag == 'boolean':
+            return text.strip() == '1'
+        elif tag == 'double':
+            return float(text)
+        elif tag == 'nil':
+            return None
+        elif tag == 'dateTime.iso8601':
+            return xmlrpc_client.DateTime(text)
+        elif tag == 'base64':
+            return xmlrpc_client.Binary(
+                base64.b64decode(text.encode('ascii')))
+        return text
+
+    def _add(self, value):
+        """ Adds a completed value to the innermost open array or struct """
+        self._typed = True
+        if not self._stack:
+            if self._fault is not None:
+                self._fault = value
+                return
+            if self.is_list is None:
+                self.is_list = False
+            self._ready.append(value)
+            return
+
+        container, name = self._stack[-1]
+        if container is None:
+            self._ready.append(value)
+        elif isinstance(container, list):
+            container.append(value)
+        else:
+            container[name] = value
+
+
 def make_rest_api_call(method, url,
-                       http_headers=None, timeout=None, proxy=None):
+                       http_headers=None, timeout=None, proxy=None,
+                       session=None):
     """ Makes a SoftLayer API call against the REST endpoint
 
     :param string method: HTTP method: GET, POST, PUT, DELETE
     :param string url: endpoint URL
     :param dict http_headers: HTTP headers to use for the request
     :param int timeout: number of seconds to use as a timeout
+    :param session: a requests.Session to send the request with. A new one
+                    is created (and thrown away) when this isn't given.
     """
     LOGGER.info('%s %s', method, url)
+    send = requests.request
+    if session is not None:
+        send = session.request
     try:
-        resp = requests.request(method, url,
-                                headers=http_headers,
-                                timeout=timeout,
-                                proxies=_proxies_dict(proxy))
+        resp = send(method, url,
+                    headers=http_headers,
+                    timeout=timeout,
+                    proxies=_proxies_dict(proxy))
         resp.raise_for_status()
         LOGGER.debug(resp.content)
         if url.endswith('.json'):
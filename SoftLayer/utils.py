@@ -5,17 +5,45 @@
 
     :license: MIT, see LICENSE for more details.
 """
+from importlib import import_module
 import re
 import six
 
 UUID_RE = re.compile(r'^[0-9a-f\-]{36}$', re.I)
 KNOWN_OPERATIONS = ['<=', '>=', '<', '>', '~', '!~', '*=', '^=', '$=', '_=']
 
+
+class LazyModule(object):
+    """ Stands in for a module which is only imported when one of its
+        attributes is first used. This keeps modules which are slow to import
+        (and which many programs never need) off of the startup path.
+
+    :param string name: name of the module, E.G. 'requests'
+    """
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        """ Imports the module """
+        if self._module is None:
+            self.__dict__['_module'] = import_module(self._name)
+        return self._module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        return "<LazyModule: %s>" % self._name
+
+
 configparser = six.moves.configparser  # pylint: disable=E1101,C0103
 console_input = six.moves.input  # pylint: disable=E1101,C0103
 string_types = six.string_types  # pylint: disable=C0103
+text_type = six.text_type  # pylint: disable=C0103
+PY2 = six.PY2
 StringIO = six.StringIO  # pylint: disable=C0103
-xmlrpc_client = six.moves.xmlrpc_client  # pylint: disable=E1101,C0103
+xmlrpc_client = LazyModule('six.moves.xmlrpc_client')  # pylint: disable=C0103
 
 
 def lookup(dic, key, *keys):
@@ -61,6 +89,38 @@ class NestedDict(dict):
         return new_dict
 
 
+def short_service_name(service):
+    """ Strips the SoftLayer_ prefix from a service name, E.G.:
+        'SoftLayer_Account' becomes 'Account' """
+    if service.startswith('SoftLayer_'):
+        return service[len('SoftLayer_'):]
+    return service
+
+
+def has_method_prefix(method, prefixes):
+    """ Returns True if a camel-cased method name starts with one of the
+        prefixes as a whole word, E.G.: 'setTags' starts with 'set' but
+        'settleInvoice' doesn't
+
+    :param string method: method name, E.G.: 'getObject'
+    :param tuple prefixes: the words to look for
+    """
+    for prefix in prefixes:
+        rest = method[len(prefix):]
+        if method.startswith(prefix) and (not rest or rest[0].isupper()):
+            return True
+    return False
+
+
+def in_filter(values):
+    """ Returns an object filter matching any of the values
+
+    :param list values: the values to match, E.G.: ids
+    """
+    return {'operation': 'in',
+            'options': [{'name': 'data', 'value': list(values)}]}
+
+
 def query_filter(query):
     """ Translate a query-style string to a 'filter'. Query can be the
     following formats:
@@ -121,6 +181,18 @@ class IdentifierMixin(object):
 
         return resolve_ids(identifier, self.resolvers)
 
+    def resolve_many(self, identifiers):
+        """ Resolves several identifiers. Managers which can resolve many
+            identifiers with fewer calls than one per identifier override
+            this.
+
+        :param list identifiers: identifying strings
+
+        :returns dict: the list of matching ids for each identifier
+        """
+        return dict((identifier, self.resolve_ids(identifier))
+                    for identifier in identifiers)
+
 
 def resolve_ids(identifier, resolvers):
     """ Resolves IDs given a list of functions
@@ -25,6 +25,24 @@ requires = [
 if sys.version_info < (2, 7):
     requires.append('importlib')
 
+if sys.version_info < (3, 2):
+    requires.append('futures')
+
+packages = [
+    'SoftLayer',
+    'SoftLayer.CLI',
+    'SoftLayer.CLI.modules',
+    'SoftLayer.managers',
+]
+
+# SoftLayer.aio (AsyncClient) uses syntax added in Python 3.6
+if sys.version_info >= (3, 6):
+    packages.append('SoftLayer.aio')
+
+extras_require = {
+    'async': ['aiohttp >= 3.0'],
+}
+
 description = "A library for SoftLayer's API"
 
 if os.path.exists('README.rst'):
@@ -43,12 +61,7 @@ setup(
     long_description=long_description,
     author='SoftLayer Technologies, Inc.',
     author_email='sldn@softlayer.com',
-    packages=[
-        'SoftLayer',
-        'SoftLayer.CLI',
-        'SoftLayer.CLI.modules',
-        'SoftLayer.managers',
-    ],
+    packages=packages,
     license='MIT',
     zip_safe=False,
     url='http://github.com/softlayer/softlayer-api-python-client',
@@ -62,6 +75,7 @@ setup(
     },
     test_suite='nose.collector',
     install_requires=requires,
+    extras_require=extras_require,
     classifiers=[
         'Environment :: Console',
         'Environment :: Web Environment',
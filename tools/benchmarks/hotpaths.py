@@ -0,0 +1,413 @@
+"""
+usage: hotpaths.py [options] [<name>...]
+
+Times the library's hot paths: XML-RPC encoding and decoding of realistic
+payloads, request header assembly, filter building, identifier resolution,
+CLI output formatting, product package parsing and package item lookups.
+Benchmarks whose name contains one of the given names are run; by default all
+of them are.
+
+Results can be saved as JSON and compared with an earlier run. Benchmarks
+which got slower than the threshold are flagged as regressions and make the
+script exit with status 1. The fastest run of each benchmark is compared,
+since it's the least affected by noise.
+
+The fixtures in SoftLayer/tests are used as payloads, so the packages in
+tools/test-requirements.txt must be installed.
+
+Options:
+  -o FILE --output=FILE      Save the results as JSON to FILE
+  -c FILE --compare=FILE     Compare with results saved earlier
+  -t PCT --threshold=PCT     Slowdown, in percent, which counts as a
+                             regression [Default: 10]
+  -r N --repeat=N            Timed runs per benchmark [Default: 5]
+  --min-time=SECONDS         Minimum length of each timed run [Default: 0.2]
+  -l --list                  List the benchmarks and exit
+  -h --help                  Show this screen
+"""
+# :license: MIT, see LICENSE for more details.
+from __future__ import print_function
+
+import datetime
+import json
+import platform
+import subprocess
+import sys
+import time
+
+from docopt import docopt
+
+from SoftLayer import Client, CCIManager, HardwareManager
+from SoftLayer.API import Batch, Service
+from SoftLayer.cache import IdentifierIndex
+from SoftLayer.CLI.formatting import (
+    Table, format_output, blank, mb_to_gb, active_txn)
+from SoftLayer.consts import VERSION
+from SoftLayer.tests.fixtures import Account
+from SoftLayer.tests.standin import load_fixture, scale_result
+from SoftLayer.transports import encode_xml_rpc_call
+from SoftLayer.utils import NestedDict, query_filter, resolve_ids, \
+    xmlrpc_client
+
+# Number of guests in the getVirtualGuests payloads and rows in the tables
+GUESTS = 1000
+TABLE_ROWS = 10000
+
+BENCHMARKS = []
+
+
+def benchmark(setup):
+    """ Registers a benchmark. The decorated function does any setup and
+        returns the function to time. Its docstring describes it. """
+    BENCHMARKS.append(setup)
+    return setup
+
+
+def guests(count):
+    """ Returns a getVirtualGuests result with count guests """
+    fixture = Account.getVirtualGuests
+    return scale_result(fixture, count // len(fixture))
+
+
+class FixtureCalls(object):
+    """ A client whose calls are answered in-process with the fixtures, so
+        that only the code around the calls is measured """
+    def __getitem__(self, name):
+        return Service(self, name)
+
+    def call(self, service, method, *_, **__):
+        """ Returns the fixture for a call """
+        return load_fixture(service, method)
+
+    def batch(self, max_workers=10):
+        """ Returns a batch which makes calls through this client """
+        return Batch(self, max_workers=max_workers)
+
+
+@benchmark
+def xmlrpc_dumps_guests():
+    """ xmlrpc_client.dumps of a 1000 guest getVirtualGuests response """
+    result = (guests(GUESTS),)
+    return lambda: xmlrpc_client.dumps(result, methodresponse=True,
+                                       allow_none=True)
+
+
+@benchmark
+def xmlrpc_loads_guests():
+    """ xmlrpc_client.loads of a 1000 guest getVirtualGuests response """
+    payload = xmlrpc_client.dumps((guests(GUESTS),), methodresponse=True,
+                                  allow_none=True)
+    return lambda: xmlrpc_client.loads(payload)
+
+
+@benchmark
+def encode_request():
+    """ encode_xml_rpc_call of a masked, filtered and paged call """
+    client = Client(username='user', api_key='key')
+    _, headers, _ = client._build_request('SoftLayer_Account', {
+        'mask': 'id,hostname,datacenter.name,billingItem.recurringFee',
+        'filter': {'virtualGuests': {'hostname': {'operation': '_= web'}}},
+        'limit': 100,
+    })
+    return lambda: encode_xml_rpc_call('getVirtualGuests', (), headers)
+
+
+@benchmark
+def build_request_mask():
+    """ Client header assembly: auth, object mask, filter and limit """
+    client = Client(username='user', api_key='key')
+    kwargs = {
+        'id': 1234,
+        'mask': 'id,hostname,datacenter.name,billingItem.recurringFee',
+        'filter': {'virtualGuests': {'hostname': {'operation': '_= web'}}},
+        'limit': 100,
+    }
+    # pylint: disable=W0212
+    return lambda: client._build_request('SoftLayer_Account', kwargs)
+
+
+@benchmark
+def build_request_plain():
+    """ Client header assembly: auth and a full mask[] only """
+    client = Client(username='user', api_key='key')
+    kwargs = {'mask': 'mask[id,hostname]'}
+    # pylint: disable=W0212
+    return lambda: client._build_request('SoftLayer_Account', kwargs)
+
+
+@benchmark
+def query_filters():
+    """ utils.query_filter of 10 typical queries """
+    queries = ['1234', 'web*', '*.example.com', '*db*', 'exact',
+               '>= 2048', '<= 4', '!~ test', '~ prod', '^= web']
+    return lambda: [query_filter(query) for query in queries]
+
+
+@benchmark
+def nested_dict_to_dict():
+    """ NestedDict.to_dict of a `sl cci list` style filter """
+    _filter = NestedDict()
+    guest = _filter['virtualGuests']
+    guest['hostname'] = query_filter('web*')
+    guest['domain'] = query_filter('example.com')
+    guest['maxCpu'] = query_filter('4')
+    guest['maxMemory'] = query_filter('>= 2048')
+    guest['datacenter']['name'] = query_filter('dal05')
+    guest['networkComponents']['maxSpeed'] = query_filter('100')
+    guest['tagReferences']['tag']['name'] = {
+        'operation': 'in',
+        'options': [{'name': 'data', 'value': ['production', 'db']}]}
+    return _filter.to_dict
+
+
+@benchmark
+def resolve_identifiers():
+    """ utils.resolve_ids of an id, a UUID and a hostname """
+    identifiers = ['1234', '1a2b3c4d-1234-5678-9abc-def012345678',
+                   'web01.example.com']
+    resolvers = [lambda identifier: [],
+                 lambda identifier: [1234]]
+    return lambda: [resolve_ids(identifier, resolvers)
+                    for identifier in identifiers]
+
+
+@benchmark
+def resolve_many_hostnames():
+    """ CCIManager.resolve_many of 500 hostnames, with a fresh identifier
+        index over 1000 guests """
+    everyone = guests(GUESTS)
+    identifiers = [guest['hostname'] for guest in everyone[:500]]
+
+    class Guests(FixtureCalls):
+        """ Answers getVirtualGuests with 1000 guests """
+        def call(self, service, method, *_, **__):
+            return everyone
+
+    client = Guests()
+
+    def resolve():
+        """ Resolves the identifiers, sweeping once """
+        client.identifier_index = IdentifierIndex()
+        return CCIManager(client).resolve_many(identifiers)
+    return resolve
+
+
+@benchmark
+def upgrade_item_lookup():
+    """ CCIManager._get_item_id_for_upgrade of cpus, memory and nic_speed,
+        with a warm package item index """
+    manager = CCIManager(FixtureCalls())
+    options = [('cpus', 4, True), ('cpus', 4, False), ('memory', 2, True),
+               ('nic_speed', 1000, True)]
+    # pylint: disable=W0212
+    return lambda: [manager._get_item_id_for_upgrade(*option)
+                    for option in options]
+
+
+def guest_table():
+    """ Returns a function which builds a 10k row `sl cci list` table """
+    rows = []
+    for guest in guests(TABLE_ROWS):
+        guest = NestedDict(guest)
+        rows.append([
+            guest['id'],
+            guest['datacenter']['name'] or blank(),
+            guest['fullyQualifiedDomainName'],
+            guest['maxCpu'],
+            mb_to_gb(guest['maxMemory']),
+            guest['primaryIpAddress'] or blank(),
+            guest['primaryBackendIpAddress'] or blank(),
+            active_txn(guest),
+        ])
+
+    def build():
+        """ Builds the table. Formatting changes the rows, so they're
+            copied. """
+        table = Table(['id', 'datacenter', 'host', 'cores', 'memory',
+                       'primary_ip', 'backend_ip', 'active_transaction'])
+        table.sortby = 'host'
+        table.rows = [list(row) for row in rows]
+        return table
+    return build
+
+
+@benchmark
+def format_table():
+    """ format_output of a 10k row table as a table """
+    build = guest_table()
+    return lambda: format_output(build(), fmt='table')
+
+
+@benchmark
+def format_raw():
+    """ format_output of a 10k row table as raw output """
+    build = guest_table()
+    return lambda: format_output(build(), fmt='raw')
+
+
+@benchmark
+def format_json():
+    """ format_output of a 10k row table as JSON """
+    build = guest_table()
+    return lambda: format_output(build(), fmt='json')
+
+
+@benchmark
+def format_csv():
+    """ format_output of a 10k row table as CSV """
+    build = guest_table()
+    return lambda: format_output(build(), fmt='csv')
+
+
+@benchmark
+def format_ndjson():
+    """ format_output of a 10k row table as newline-delimited JSON """
+    build = guest_table()
+    return lambda: format_output(build(), fmt='ndjson')
+
+
+@benchmark
+def parse_package_data():
+    """ HardwareManager._parse_package_data of the Product_Package
+        fixtures """
+    manager = HardwareManager(FixtureCalls())
+    # pylint: disable=W0212
+    return lambda: manager._parse_package_data(50)
+
+
+def measure(func, repeat=5, min_time=0.2):
+    """ Times func, calling it enough times per run for each run to take at
+        least min_time seconds. Returns the seconds per call of the fastest
+        run and the median run.
+    """
+    func()  # warm-up
+
+    number = 1
+    while True:
+        start = time.time()
+        for _ in range(number):
+            func()
+        elapsed = time.time() - start
+        if elapsed >= min_time:
+            break
+        number *= max(2, int(min_time / max(elapsed, 1e-6) * 1.2))
+
+    runs = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.time()
+        for _ in range(number):
+            func()
+        runs.append((time.time() - start) / number)
+
+    runs.sort()
+    return {
+        'min': runs[0],
+        'median': runs[len(runs) // 2],
+        'number': number,
+        'repeat': repeat,
+    }
+
+
+def compare(baseline, results, threshold):
+    """ Returns (name, old seconds, new seconds, change) for every benchmark
+        in both runs, and the names of those which regressed.
+
+    :param dict baseline: results saved earlier
+    :param dict results: results of this run
+    :param float threshold: relative slowdown counted as a regression
+    """
+    changes = []
+    regressions = []
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        old = baseline[name]['min']
+        new = results[name]['min']
+        change = (new - old) / old
+        changes.append((name, old, new, change))
+        if change > threshold:
+            regressions.append(name)
+    return changes, regressions
+
+
+def git_revision():
+    """ Returns the current git revision, if there is one """
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.STDOUT).decode('ascii').strip()
+    except Exception:  # pylint: disable=W0703
+        return None
+
+
+def format_time(seconds):
+    """ Formats seconds per call in a readable unit """
+    if seconds < 1e-3:
+        return '%.2f us' % (seconds * 1e6)
+    if seconds < 1:
+        return '%.2f ms' % (seconds * 1e3)
+    return '%.2f s' % seconds
+
+
+def main(args=None):
+    """ Runs the benchmarks """
+    arguments = docopt(__doc__, argv=args)
+    selected = [setup for setup in BENCHMARKS
+                if not arguments['<name>']
+                or any(name in setup.__name__
+                       for name in arguments['<name>'])]
+
+    if arguments['--list']:
+        for setup in selected:
+            print('%-22s %s' % (setup.__name__, ' '.join(
+                setup.__doc__.split())))
+        return 0
+
+    results = {}
+    for setup in selected:
+        result = measure(setup(),
+                         repeat=int(arguments['--repeat']),
+                         min_time=float(arguments['--min-time']))
+        results[setup.__name__] = result
+        print('%-22s %12s  (median %s)' % (
+            setup.__name__, format_time(result['min']),
+            format_time(result['median'])))
+
+    if arguments['--output']:
+        with open(arguments['--output'], 'w') as output:
+            json.dump({
+                'meta': {
+                    'time': datetime.datetime.utcnow().isoformat(),
+                    'python': platform.python_version(),
+                    'implementation': platform.python_implementation(),
+                    'platform': platform.platform(),
+                    'version': VERSION,
+                    'revision': git_revision(),
+                },
+                'results': results,
+            }, output, indent=2, sort_keys=True)
+
+    if arguments['--compare']:
+        with open(arguments['--compare']) as saved:
+            baseline = json.load(saved)
+        threshold = float(arguments['--threshold']) / 100
+        changes, regressions = compare(baseline['results'], results,
+                                       threshold)
+
+        print('\nCompared with %s (%s):' % (
+            arguments['--compare'],
+            baseline['meta'].get('revision') or baseline['meta']['time']))
+        for name, old, new, change in changes:
+            flag = '  REGRESSION' if name in regressions else ''
+            print('%-22s %12s -> %12s  %+6.1f%%%s' % (
+                name, format_time(old), format_time(new), change * 100,
+                flag))
+        if regressions:
+            print('\n%d benchmark(s) regressed by more than %s%%'
+                  % (len(regressions), arguments['--threshold']))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
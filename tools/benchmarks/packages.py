@@ -0,0 +1,105 @@
+"""
+usage: packages.py [options]
+
+Compares the wall time of HardwareManager's dedicated server package listing
+(`sl server list-chassis`) made with one Product_Package.getObject call per
+package, sequentially and concurrently, against the single filtered
+getAllObjects call and a catalog cache hit. The API is replaced by the
+stand-in server (see SoftLayer.tests.standin), which waits --latency seconds
+before answering each call.
+
+Options:
+  -r N --runs=N              Timed runs of each approach [Default: 5]
+  --latency=SECONDS          Seconds to wait before answering each call
+                             [Default: 0.05]
+  -h --help                  Show this screen
+"""
+# :license: MIT, see LICENSE for more details.
+from __future__ import print_function
+
+import shutil
+import sys
+import tempfile
+import time
+
+from docopt import docopt, DocoptExit
+
+from SoftLayer import Client, HardwareManager
+from SoftLayer.cache import CatalogCache
+from SoftLayer.tests.standin import StandInServer
+
+# The packages listed by get_available_dedicated_server_packages
+PACKAGE_IDS = [13, 15, 23, 25, 26, 27, 29, 32, 41, 42, 43, 44, 49, 51, 52,
+               53, 54, 55, 56, 57, 126, 140, 141, 142, 143, 144, 145, 146,
+               147, 148, 158]
+MASK = 'mask[id, name, description]'
+
+
+def timeit(func, runs):
+    """ Returns the average time (in milliseconds) of calling func """
+    func()  # warm-up
+    start = time.time()
+    for _ in range(runs):
+        func()
+    return (time.time() - start) / runs * 1000
+
+
+def compare(runs=5, latency=0.05):
+    """ Times each approach and prints the results """
+    server = StandInServer(latency=latency).start()
+    path = tempfile.mkdtemp()
+    try:
+        client = Client(username='bench', api_key='bench',
+                        endpoint_url=server.endpoint_url)
+        catalog_cache = CatalogCache(path)
+
+        def sequential():
+            """ One getObject call per package, one after the other """
+            return [client['Product_Package'].getObject(id=package_id,
+                                                        mask=MASK)
+                    for package_id in PACKAGE_IDS]
+
+        def concurrent():
+            """ One getObject call per package, through a batch """
+            with client.batch() as batch:
+                results = [batch['Product_Package'].getObject(id=package_id,
+                                                              mask=MASK)
+                           for package_id in PACKAGE_IDS]
+            return [result.result() for result in results]
+
+        timings = [
+            ('getObject per package', timeit(sequential, runs)),
+            ('concurrent getObject', timeit(concurrent, runs)),
+            # New managers, since each one keeps the list it fetched
+            ('filtered getAllObjects', timeit(
+                lambda: HardwareManager(client)
+                .get_available_dedicated_server_packages(), runs)),
+            ('catalog cache', timeit(
+                lambda: HardwareManager(client, catalog_cache=catalog_cache)
+                .get_available_dedicated_server_packages(), runs)),
+        ]
+    finally:
+        server.stop()
+        shutil.rmtree(path)
+
+    print('packages: %d, latency: %.0f ms, runs: %d'
+          % (len(PACKAGE_IDS), latency * 1000, runs))
+    for name, elapsed in timings:
+        print('%-24s %9.2f ms  (%.1fx)'
+              % (name, elapsed, timings[0][1] / elapsed))
+
+
+def main(args=None):
+    """ Runs the benchmark """
+    arguments = docopt(__doc__, argv=args)
+    try:
+        runs = int(arguments['--runs'])
+        latency = float(arguments['--latency'])
+    except ValueError:
+        raise DocoptExit('--runs and --latency must be numbers')
+    compare(runs, latency)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+    Connection pooling benchmark
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    Compares per-call latency of the XML-RPC transport when every call opens
+    a fresh connection against calls sharing a Client's connection pool. The
+    API is replaced by the stand-in server (see SoftLayer.tests.standin),
+    which answers without any latency so that only the connection overhead
+    is measured.
+
+    Usage:
+
+        $ python tools/benchmarks/pooling.py [CALLS]
+
+    :license: MIT, see LICENSE for more details.
+"""
+import sys
+import time
+
+from SoftLayer import Client
+from SoftLayer.tests.standin import StandInServer
+from SoftLayer.transports import make_xml_rpc_api_call
+
+
+def timeit(func, calls):
+    """ Returns the average time (in milliseconds) of calling func """
+    func()  # warm-up
+    start = time.time()
+    for _ in range(calls):
+        func()
+    return (time.time() - start) / calls * 1000
+
+
+def main(calls=500):
+    """ Runs the benchmark """
+    server = StandInServer().start()
+    endpoint = server.endpoint_url
+
+    client = Client(username='bench', api_key='bench', endpoint_url=endpoint)
+
+    def unpooled():
+        """ The pre-pooling behavior: a new session for every call """
+        make_xml_rpc_api_call(endpoint + '/SoftLayer_Account', 'getObject')
+
+    def pooled():
+        """ Calls through the client's shared connection pool """
+        client['Account'].getObject()
+
+    try:
+        unpooled_ms = timeit(unpooled, calls)
+        pooled_ms = timeit(pooled, calls)
+    finally:
+        server.stop()
+
+    print('calls:              %d' % calls)
+    print('new session / call: %.3f ms' % unpooled_ms)
+    print('pooled session:     %.3f ms' % pooled_ms)
+    print('speedup:            %.2fx' % (unpooled_ms / pooled_ms))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
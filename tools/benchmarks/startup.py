@@ -0,0 +1,179 @@
+"""
+usage: startup.py [options] [<name>...]
+
+Times how long it takes to start up: `import SoftLayer`, `sl help cci` and
+`sl cci list` against a stand-in API server (see SoftLayer.tests.standin).
+Each command is run in a fresh interpreter, so the times include starting
+Python. Scenarios whose name contains one of the given names are run; by
+default all of them are.
+
+Results can be saved as JSON and compared with an earlier run, the same way
+as with hotpaths.py. With --importtime, the modules which took longest to
+import for each scenario are listed, as reported by `python -X importtime`.
+
+Options:
+  -o FILE --output=FILE      Save the results as JSON to FILE
+  -c FILE --compare=FILE     Compare with results saved earlier
+  -t PCT --threshold=PCT     Slowdown, in percent, which counts as a
+                             regression [Default: 10]
+  -r N --repeat=N            Runs per scenario [Default: 20]
+  --importtime=N             List the N slowest imports of each scenario
+  -l --list                  List the scenarios and exit
+  -h --help                  Show this screen
+"""
+# :license: MIT, see LICENSE for more details.
+from __future__ import print_function
+
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from docopt import docopt
+
+from hotpaths import compare, format_time, git_revision
+from SoftLayer.consts import VERSION
+from SoftLayer.tests.standin import StandInServer
+
+# Runs the command-line client the way the `sl` entry point does
+SL = 'import sys; from SoftLayer.CLI.core import main; main(sys.argv[1:])'
+
+# name: (description, arguments for python)
+SCENARIOS = {
+    'import': ('import SoftLayer', ['-c', 'import SoftLayer']),
+    'import_cli': ('import SoftLayer.CLI.core',
+                   ['-c', 'import SoftLayer.CLI.core']),
+    'sl_help': ('sl help cci', ['-c', SL, 'help', 'cci']),
+    'sl_cci_list': ('sl cci list, against the stand-in server',
+                    ['-c', SL, 'cci', 'list', '--config={config}']),
+}
+
+CONFIG = """[softlayer]
+username = benchmark
+api_key = benchmark
+endpoint_url = {endpoint_url}
+"""
+
+
+def run(arguments, python_args=()):
+    """ Runs python with the given arguments and returns how long it took
+        and what it wrote to stderr """
+    command = [sys.executable] + list(python_args) + list(arguments)
+    start = time.time()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    _, err = process.communicate()
+    elapsed = time.time() - start
+    if process.returncode != 0:
+        raise RuntimeError('%s failed:\n%s' % (
+            ' '.join(command), err.decode('utf-8', 'replace')))
+    return elapsed, err.decode('utf-8', 'replace')
+
+
+def measure(arguments, repeat=20):
+    """ Runs a scenario repeat times. Returns the seconds taken by the
+        fastest run and the median run. """
+    run(arguments)  # warm-up, so every run finds compiled bytecode
+    runs = sorted(run(arguments)[0] for _ in range(repeat))
+    return {
+        'min': runs[0],
+        'median': runs[len(runs) // 2],
+        'number': 1,
+        'repeat': repeat,
+    }
+
+
+def slowest_imports(arguments, count):
+    """ Returns (cumulative seconds, module) of the count modules which took
+        the longest to import, including the modules they imported """
+    _, err = run(arguments, python_args=['-X', 'importtime'])
+    imports = []
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        imports.append((int(cumulative) / 1e6, module.rstrip()))
+    imports.sort(reverse=True)
+    return imports[:count]
+
+
+def main(args=None):
+    """ Runs the scenarios """
+    arguments = docopt(__doc__, argv=args)
+    selected = [name for name in sorted(SCENARIOS)
+                if not arguments['<name>']
+                or any(wanted in name for wanted in arguments['<name>'])]
+
+    if arguments['--list']:
+        for name in selected:
+            print('%-14s %s' % (name, SCENARIOS[name][0]))
+        return 0
+
+    path = tempfile.mkdtemp()
+    server = StandInServer().start()
+    try:
+        config = os.path.join(path, 'softlayer.conf')
+        with open(config, 'w') as config_file:
+            config_file.write(CONFIG.format(endpoint_url=server.endpoint_url))
+
+        results = {}
+        for name in selected:
+            command = [argument.format(config=config)
+                       for argument in SCENARIOS[name][1]]
+            result = measure(command, repeat=int(arguments['--repeat']))
+            results[name] = result
+            print('%-14s %12s  (median %s)' % (
+                name, format_time(result['min']),
+                format_time(result['median'])))
+
+            if arguments['--importtime']:
+                for seconds, module in slowest_imports(
+                        command, int(arguments['--importtime'])):
+                    print('    %10s  %s' % (format_time(seconds), module))
+    finally:
+        server.stop()
+        shutil.rmtree(path)
+
+    if arguments['--output']:
+        with open(arguments['--output'], 'w') as output:
+            json.dump({
+                'meta': {
+                    'time': datetime.datetime.utcnow().isoformat(),
+                    'python': platform.python_version(),
+                    'implementation': platform.python_implementation(),
+                    'platform': platform.platform(),
+                    'version': VERSION,
+                    'revision': git_revision(),
+                },
+                'results': results,
+            }, output, indent=2, sort_keys=True)
+
+    if arguments['--compare']:
+        with open(arguments['--compare']) as saved:
+            baseline = json.load(saved)
+        threshold = float(arguments['--threshold']) / 100
+        changes, regressions = compare(baseline['results'], results,
+                                       threshold)
+
+        print('\nCompared with %s (%s):' % (
+            arguments['--compare'],
+            baseline['meta'].get('revision') or baseline['meta']['time']))
+        for name, old, new, change in changes:
+            flag = '  REGRESSION' if name in regressions else ''
+            print('%-14s %12s -> %12s  %+6.1f%%%s' % (
+                name, format_time(old), format_time(new), change * 100,
+                flag))
+        if regressions:
+            print('\n%d scenario(s) regressed by more than %s%%'
+                  % (len(regressions), arguments['--threshold']))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())